@@ -0,0 +1,127 @@
+"""
+Benchmark du chemin d'authentification sous concurrence : blocage de la boucle d'événements.
+
+Compare, pour N requêtes authentifiées simultanées (JWT + recherche de l'utilisateur) :
+- avant : la requête SQL synchrone exécutée directement dans `get_current_user` (async),
+  donc **sur** la boucle d'événements ;
+- après : `security.get_current_user`, qui déporte la requête dans le threadpool.
+
+La latence réseau d'une base distante (PostgreSQL) est simulée par une pause de
+`--db-latency-ms` à chaque requête SQL (base SQLite temporaire). Un « battement »
+(`asyncio.sleep(1 ms)` en boucle) mesure le retard maximal de la boucle : c'est le
+temps pendant lequel aucune autre coroutine (health check, autre requête...) ne peut avancer.
+
+NB : garder `--requests` sous la capacité du pool SQLAlchemy (5 + 10 par défaut). Au-delà,
+l'ancien chemin se bloque : la boucle attend une connexion (`pool_timeout`, 30 s) que seules
+des requêtes… bloquées par cette même boucle pourraient rendre.
+
+Usage
+-----
+python benchmarks/bench_auth.py
+python benchmarks/bench_auth.py --requests 12 --db-latency-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+_db_dir = tempfile.mkdtemp(prefix="bench_auth_")
+os.environ["DATABASE_ENABLED"] = "true"
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_db_dir, 'bench.db').as_posix()}"
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI, HTTPException, Security  # noqa: E402
+from fastapi.security import SecurityScopes  # noqa: E402
+from jose import jwt  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from futurisys_churn_api.api import security as sec  # noqa: E402
+from futurisys_churn_api.database import connection as db_conn  # noqa: E402
+from futurisys_churn_api.database.models import Base, User  # noqa: E402
+
+EMAIL = "bench@futurisys.fr"
+
+
+async def get_current_user_blocking(
+    security_scopes: SecurityScopes,
+    token: str = Depends(sec.oauth2_scheme),
+    db=Depends(sec.get_db),
+) -> User:
+    """Ancien chemin : même logique, mais `db.query(...)` directement sur la boucle."""
+    payload = jwt.decode(token, sec.JWT_SECRET_KEY, algorithms=[sec.JWT_ALGORITHM])
+    user = db.query(User).filter(User.email == payload["sub"]).first()
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=401)
+    return user
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before")
+    async def before(user: User = Security(get_current_user_blocking, scopes=["predict:read"])):
+        return {"id": user.id}
+
+    @app.get("/after")
+    async def after(user: User = Security(sec.get_current_user, scopes=["predict:read"])):
+        return {"id": user.id}
+
+    return app
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    """Mesure le retard de réveil d'un `sleep(1 ms)` : blocage de la boucle."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - start - 0.001) * 1000.0)
+
+
+async def run(app: FastAPI, path: str, token: str, n_requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        await client.get(path)  # échauffement (connexion du pool, compilation SQL)
+
+        stop, lags = asyncio.Event(), []
+        beat = asyncio.create_task(heartbeat(stop, lags))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.get(path) for _ in range(n_requests)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await beat
+
+    assert all(r.status_code == 200 for r in responses), responses[0].text
+    return {"total_ms": elapsed * 1000.0, "max_loop_lag_ms": max(lags, default=0.0)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=db_conn.engine)
+    with db_conn.SessionLocal() as db:
+        db.add(User(email=EMAIL, hashed_password="x", role="user", is_active=True))
+        db.commit()
+
+    @event.listens_for(db_conn.engine, "before_cursor_execute")
+    def simulate_network(*_):
+        time.sleep(args.db_latency_ms / 1000.0)
+
+    token = sec.create_access_token(EMAIL, ["predict:read"])
+    app = build_app()
+
+    print(f"{args.requests} requêtes simultanées, latence SQL simulée {args.db_latency_ms:.1f} ms")
+    print(f"{'chemin':<10}{'total (ms)':>14}{'retard max boucle (ms)':>26}")
+    for label, path in (("avant", "/before"), ("après", "/after")):
+        result = asyncio.run(run(app, path, token, args.requests))
+        print(f"{label:<10}{result['total_ms']:>14.1f}{result['max_loop_lag_ms']:>26.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark mémoire du job `batch_predict` : tout l'arriéré en une fois vs paquets.
+
+Compare, pour un arriéré de N entrées sans sortie (base SQLite temporaire) :
+- avant : `.all()` sur les objets ORM `PredictionInput`, copie en DataFrame,
+  `bulk_save_objects` de tous les `PredictionOutput`, un seul commit ;
+- après : `batch_predict.batch_predict(chunk_size)` (pagination sur clé, INSERT Core,
+  commit par paquet).
+
+Le pic mémoire Python (`tracemalloc`) du premier croît avec N ; celui du second doit
+rester à peu près constant (borné par `--chunk-size`).
+
+Usage
+-----
+python benchmarks/bench_batch_predict.py
+python benchmarks/bench_batch_predict.py --rows 10000 50000 --chunk-size 1000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+_db_dir = tempfile.mkdtemp(prefix="bench_batch_")
+os.environ["DATABASE_ENABLED"] = "false"
+
+import pandas as pd  # noqa: E402
+from sqlalchemy import create_engine, delete, insert, not_  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from futurisys_churn_api.api import inference  # noqa: E402
+from futurisys_churn_api.api.preprocessing import encode_batch  # noqa: E402
+from futurisys_churn_api.api.readiness import warmup_rows  # noqa: E402
+from futurisys_churn_api.database import batch_predict as bp  # noqa: E402
+from futurisys_churn_api.database.models import (  # noqa: E402
+    Base,
+    PredictionInput,
+    PredictionOutput,
+    ScoringWatermark,
+)
+
+
+def seed(factory, n_rows: int) -> None:
+    """
+    Remplace les entrées par `n_rows` lignes (profils de chauffe en boucle), sans sortie ;
+    marques hautes vidées (SQLite réutilise les ids supprimés).
+    """
+    profiles = [row.model_dump() for row in warmup_rows()]
+    with factory() as db:
+        db.execute(delete(PredictionOutput))
+        db.execute(delete(PredictionInput))
+        db.execute(delete(ScoringWatermark))
+        for start in range(0, n_rows, 10_000):
+            db.execute(
+                insert(PredictionInput),
+                [profiles[i % len(profiles)] for i in range(start, min(n_rows, start + 10_000))],
+            )
+        db.commit()
+
+
+def score_all_at_once(factory) -> int:
+    """Ancien chemin : tout l'arriéré en mémoire (objets ORM + DataFrame), un commit."""
+    loaded = bp.load_artifacts()
+    with factory() as db:
+        inputs = db.query(PredictionInput).filter(not_(PredictionInput.output.has())).all()
+        cols = [c.name for c in PredictionInput.__table__.columns]
+        df = pd.DataFrame([{c: getattr(o, c) for c in cols} for o in inputs])
+        preds, proba = inference.predict(loaded.model, encode_batch(df, loaded.feature_plan))
+        db.bulk_save_objects([
+            PredictionOutput(input_id=o.id, user_id=o.user_id, prediction=int(p), churn_probability=float(q))
+            for o, p, q in zip(inputs, preds, proba)
+        ])
+        db.commit()
+        return len(inputs)
+
+
+def measure(fn) -> tuple:
+    """(résultat, durée en s, pic mémoire en Mo) de `fn()`."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 40_000])
+    parser.add_argument("--chunk-size", type=int, default=bp.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{Path(_db_dir, 'bench.db').as_posix()}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    bp.load_artifacts()  # chargement du modèle hors mesure
+
+    print(f"{'lignes':>8}  {'chemin':<22}{'durée (s)':>10}{'pic (Mo)':>10}")
+    for n_rows in args.rows:
+        for label, fn in (
+            ("avant (tout d'un coup)", lambda: score_all_at_once(factory)),
+            (f"après (paquets {args.chunk_size})", lambda: bp.batch_predict(args.chunk_size, factory)),
+        ):
+            seed(factory, n_rows)
+            scored, elapsed, peak_mb = measure(fn)
+            assert scored == n_rows, (label, scored)
+            print(f"{n_rows:>8}  {label:<22}{elapsed:>10.2f}{peak_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
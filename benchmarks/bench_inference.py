@@ -0,0 +1,101 @@
+"""
+Benchmark de l'inférence : `predict` + `predict_proba` (avant) vs un seul `predict_proba`.
+
+Deux scénarios :
+- endpoint `/predict` : une ligne, appel répété (latence par requête) ;
+- job `batch_predict` : tout un lot en une matrice (1k / 100k lignes par défaut).
+
+Avec `--trees <export.npy>` (cf. `python -m futurisys_churn_api.api.tree_model`), ajoute
+l'évaluateur NumPy `TreeEnsemble` (backend `MODEL_BACKEND=numpy`) à la comparaison.
+
+Usage
+-----
+python benchmarks/bench_inference.py
+python benchmarks/bench_inference.py --sizes 1000 100000 --repeat 5 --single-calls 2000
+python benchmarks/bench_inference.py --trees models/churn_model_trees.npy
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from futurisys_churn_api.api import inference
+from futurisys_churn_api.api.feature_plan import FeaturePlan
+from futurisys_churn_api.api.preprocessing import encode_batch
+from futurisys_churn_api.api.tree_model import TreeEnsemble
+
+DATASET_PATH = Path("data/data_employees.csv")
+FEATURES_PATH = Path("models/input_features.json")
+MODEL_PATH = Path("models/churn_model.joblib")
+
+
+def best_of(fn, repeat: int) -> float:
+    """Meilleur temps (secondes) sur `repeat` exécutions."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def two_calls(model, X):
+    """Ancien chemin : deux parcours de l'ensemble d'arbres."""
+    return model.predict(X), model.predict_proba(X)[:, 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--single-calls", type=int, default=1_000)
+    parser.add_argument("--trees", type=Path, default=None, help="export NumPy à comparer")
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_PATH)
+    with open(FEATURES_PATH, "r", encoding="utf-8") as f:
+        plan = FeaturePlan.compile(json.load(f))
+    X_all = encode_batch(pd.read_csv(DATASET_PATH), plan)
+
+    # Sanity check : mêmes classes que model.predict au seuil par défaut
+    np.testing.assert_array_equal(inference.predict(model, X_all)[0], model.predict(X_all))
+
+    # 1) Endpoint : une ligne par appel
+    row = X_all[:1]
+    n = args.single_calls
+    t_old = best_of(lambda: [two_calls(model, row) for _ in range(n)], args.repeat) / n
+    t_new = best_of(lambda: [inference.predict(model, row) for _ in range(n)], args.repeat) / n
+    print("Endpoint /predict (1 ligne)")
+    print(f"  predict + predict_proba : {t_old * 1e6:9.1f} µs/appel")
+    print(f"  predict_proba seul      : {t_new * 1e6:9.1f} µs/appel  ({t_old / t_new:.1f}x)")
+
+    trees = None
+    if args.trees is not None:
+        start = time.perf_counter()
+        trees = TreeEnsemble.load(args.trees)
+        print(f"  TreeEnsemble.load (mmap): {(time.perf_counter() - start) * 1e3:9.1f} ms")
+        t_np = best_of(lambda: [inference.predict(trees, row) for _ in range(n)], args.repeat) / n
+        print(f"  TreeEnsemble (NumPy)    : {t_np * 1e6:9.1f} µs/appel  ({t_old / t_np:.1f}x)")
+
+    # 2) Job batch_predict : une matrice par lot
+    print("\nJob batch_predict")
+    print(f"{'lignes':>10} | {'2 appels (s)':>12} | {'1 appel (s)':>11} | {'gain':>6}")
+    print("-" * 50)
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        X = X_all[rng.integers(0, len(X_all), size)]
+        t_old = best_of(lambda: two_calls(model, X), args.repeat)
+        t_new = best_of(lambda: inference.predict(model, X), args.repeat)
+        line = f"{size:>10} | {t_old:>12.4f} | {t_new:>11.4f} | {t_old / t_new:>5.1f}x"
+        if trees is not None:
+            line += f" | NumPy {best_of(lambda: inference.predict(trees, X), args.repeat):.4f} s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
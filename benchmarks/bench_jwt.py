@@ -0,0 +1,73 @@
+"""
+Microbenchmark de la dépendance d'authentification : JWT redécodé à chaque appel vs cache.
+
+Mesure le coût par appel de :
+- `decode_token` seul (HMAC + parsing JSON + validation des claims, ou lecture du cache) ;
+- `get_current_user` complet en mode sans BDD (token + utilisateur factice + scopes).
+
+Le même bearer token est réutilisé, comme le fait un client pendant `JWT_EXPIRE_MINUTES`.
+
+Usage
+-----
+python benchmarks/bench_jwt.py
+python benchmarks/bench_jwt.py --calls 50000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ["DATABASE_ENABLED"] = "false"
+
+from fastapi.security import SecurityScopes  # noqa: E402
+
+from futurisys_churn_api.api import security as sec, settings  # noqa: E402
+
+SCOPES = SecurityScopes(scopes=["predict:read"])
+
+
+def best_of(fn, repeat: int) -> float:
+    """Meilleur temps (secondes) sur `repeat` exécutions."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def decode_loop(token: str, calls: int) -> None:
+    for _ in range(calls):
+        sec.decode_token(token)
+
+
+def dependency_loop(token: str, calls: int) -> None:
+    async def loop():
+        for _ in range(calls):
+            await sec.get_current_user(SCOPES, token=token, db=None)
+
+    asyncio.run(loop())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    token = sec.create_access_token("futurisys_user", ["predict:read", "predict:write", "admin"])
+
+    print(f"{args.calls} appels avec le même token (meilleur de {args.repeat})")
+    print(f"{'scénario':<28}{'sans cache (µs)':>18}{'avec cache (µs)':>18}{'gain':>8}")
+    for label, loop in (("decode_token", decode_loop), ("get_current_user (sans BDD)", dependency_loop)):
+        per_call = {}
+        for enabled in (False, True):
+            settings.JWT_CACHE_ENABLED = enabled
+            sec.token_cache.invalidate()
+            per_call[enabled] = best_of(lambda: loop(token, args.calls), args.repeat) / args.calls * 1e6
+        print(f"{label:<28}{per_call[False]:>18.2f}{per_call[True]:>18.2f}{per_call[False] / per_call[True]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark du préprocessing par lot : pipeline pandas de référence vs moteur vectorisé.
+
+Compare, pour 1k / 100k / 1M lignes (échantillonnées avec remise dans le dataset) :
+- `preprocess_dataframe` (convert_binary_to_int + add_features + encode_categorical + reindex),
+- `encode_batch` sur colonnes `object`,
+- `encode_batch` sur colonnes catégorielles pandas.
+
+Usage
+-----
+python benchmarks/bench_preprocessing.py
+python benchmarks/bench_preprocessing.py --sizes 1000 100000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from futurisys_churn_api.api.feature_plan import FeaturePlan
+from futurisys_churn_api.api.preprocessing import encode_batch, preprocess_dataframe
+
+DATASET_PATH = Path("data/data_employees.csv")
+FEATURES_PATH = Path("models/input_features.json")
+
+
+def load_api_style_dataset() -> pd.DataFrame:
+    """Dataset au format des entrées API/BDD (binaires en texte)."""
+    df = pd.read_csv(DATASET_PATH)
+    df["genre"] = df["genre"].map({1: "F", 0: "M"})
+    df["heure_supplementaires"] = df["heure_supplementaires"].map({1: "Oui", 0: "Non"})
+    return df
+
+
+def best_of(fn, repeat: int) -> float:
+    """Meilleur temps (secondes) sur `repeat` exécutions."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(FEATURES_PATH, "r", encoding="utf-8") as f:
+        model_features = json.load(f)
+    plan = FeaturePlan.compile(model_features)
+    base = load_api_style_dataset()
+
+    print(f"{'lignes':>10} | {'pandas (s)':>11} | {'vect. obj (s)':>13} | {'vect. cat (s)':>13} | {'gain':>6}")
+    print("-" * 66)
+    for n in args.sizes:
+        df = base.sample(n, replace=True, random_state=0).reset_index(drop=True)
+        df_cat = df.astype({c: "category" for c in df.select_dtypes("object")})
+
+        # Sanity check : mêmes valeurs que la référence
+        np.testing.assert_array_equal(
+            encode_batch(df, plan), preprocess_dataframe(df, model_features).to_numpy()
+        )
+
+        t_ref = best_of(lambda: preprocess_dataframe(df, model_features), args.repeat)
+        t_obj = best_of(lambda: encode_batch(df, plan), args.repeat)
+        t_cat = best_of(lambda: encode_batch(df_cat, plan), args.repeat)
+        print(f"{n:>10} | {t_ref:>11.4f} | {t_obj:>13.4f} | {t_cat:>13.4f} | {t_ref / t_obj:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
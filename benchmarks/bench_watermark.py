@@ -0,0 +1,100 @@
+"""
+Benchmark de la marque haute de `batch_predict` : coût d'un petit delta vs historique.
+
+Pour un historique de N entrées déjà scorées (base SQLite temporaire) et `--delta`
+nouvelles entrées, compare la durée de `batch_predict` :
+- incrémental : marque haute à jour, seules les entrées d'id > marque sont parcourues ;
+- réconciliation (`full=True`) : parcours de tout l'historique en plus du delta.
+
+La durée incrémentale doit rester à peu près constante quand N grandit ; celle de la
+réconciliation croît avec N.
+
+Usage
+-----
+python benchmarks/bench_watermark.py
+python benchmarks/bench_watermark.py --rows 10000 100000 500000 --delta 200
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+_db_dir = tempfile.mkdtemp(prefix="bench_watermark_")
+os.environ["DATABASE_ENABLED"] = "false"
+
+from sqlalchemy import create_engine, delete, func, insert, literal, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from futurisys_churn_api.api.readiness import warmup_rows  # noqa: E402
+from futurisys_churn_api.database import batch_predict as bp  # noqa: E402
+from futurisys_churn_api.database import watermarks  # noqa: E402
+from futurisys_churn_api.database.models import (  # noqa: E402
+    Base,
+    PredictionInput,
+    PredictionOutput,
+    ScoringWatermark,
+)
+
+
+def add_inputs(db, n_rows: int) -> None:
+    profiles = [row.model_dump() for row in warmup_rows()]
+    for start in range(0, n_rows, 10_000):
+        db.execute(
+            insert(PredictionInput),
+            [profiles[i % len(profiles)] for i in range(start, min(n_rows, start + 10_000))],
+        )
+
+
+def seed(factory, n_rows: int, delta: int, version: str) -> None:
+    """`n_rows` entrées scorées (sorties factices), marque à jour, puis `delta` nouvelles entrées."""
+    inputs = PredictionInput.__table__
+    with factory() as db:
+        for model in (PredictionOutput, PredictionInput, ScoringWatermark):
+            db.execute(delete(model))
+        add_inputs(db, n_rows)
+        db.execute(
+            insert(PredictionOutput).from_select(
+                ["input_id", "prediction", "churn_probability"],
+                select(inputs.c.id, literal(0), literal(0.0)),
+            )
+        )
+        last_id = db.scalar(select(func.max(inputs.c.id)))
+        watermarks.save_watermark(db, version, last_id, reconciled=True)
+        add_inputs(db, delta)
+        db.commit()
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--delta", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int, default=bp.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{Path(_db_dir, 'bench.db').as_posix()}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    version = bp.load_artifacts().version  # chargement du modèle hors mesure
+
+    print(f"{'historique':>10}  {'delta':>6}  {'chemin':<16}{'durée (s)':>10}")
+    for n_rows in args.rows:
+        for label, full in (("incrémental", False), ("réconciliation", True)):
+            seed(factory, n_rows, args.delta, version)
+            scored, elapsed = timed(lambda: bp.batch_predict(args.chunk_size, factory, full=full))
+            assert scored == args.delta, (label, scored)
+            print(f"{n_rows:>10}  {args.delta:>6}  {label:<16}{elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Écriture différée (write-behind) des entrées/sorties de `/predict`.
+
+Pourquoi ?
+----------
+En mode synchrone, `/predict` attend l'insertion de l'entrée, puis de la sortie, puis le
+commit avant de répondre : plusieurs allers-retours avec la base par prédiction.
+
+Avec `AUDIT_WRITE_BEHIND=true`, l'endpoint répond dès l'inférence terminée ; le couple
+entrée/sortie est déposé dans une file **en mémoire** que `AuditWriter` vide en tâche de
+fond :
+- un lot = jusqu'à `AUDIT_BATCH_SIZE` couples, ou ce qui s'est accumulé en
+  `AUDIT_FLUSH_INTERVAL_MS` ;
+- un lot = un INSERT multi-lignes par table + un seul commit ;
+- à l'arrêt de l'application (`shutdown_audit_writer`), la file est vidée avant de rendre la main.
+
+Identifiants
+------------
+Les ids générés par la base ne sont pas connus au moment de la réponse : chaque couple
+porte le `request_id` fourni par le client (en-tête `X-Request-ID`, généré sinon),
+enregistré dans `prediction_outputs.request_id` et renvoyé dans la réponse.
+
+Durabilité
+----------
+- `AUDIT_QUEUE_MAX_SIZE` borne la file (mémoire et perte maximale en cas d'arrêt brutal).
+- File pleine, selon `AUDIT_QUEUE_FULL_POLICY` (appliqué par l'endpoint) :
+  "sync" (défaut, écriture synchrone classique), "reject" (503 + `AUDIT_RETRY_AFTER_SECONDS`),
+  "drop" (prédiction servie, ligne d'audit perdue et comptée).
+- Un lot en échec est annulé (rollback) et compté (`failed_rows`, `last_error`).
+- Un arrêt brutal du processus (kill -9, OOM) perd la file : c'est le compromis de ce mode.
+
+Observabilité (`/metrics`, composant `audit_writer`) : taille de file, lignes écrites,
+perdues, lots ; résumés `audit_writer.batch_size` et `audit_writer.flush_ms`.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import metrics, settings
+from ..database import connection as db_conn
+from ..database import models
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    """Un couple entrée/sortie de `/predict` à persister."""
+    request_id: str
+    input_data: Dict[str, Any]
+    user_id: Optional[int]
+    prediction: int
+    churn_probability: float
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def write_records(db: Session, records: List[AuditRecord]) -> None:
+    """Insère `records` (un INSERT multi-lignes par table) et valide la transaction."""
+    input_ids = db.scalars(
+        insert(models.PredictionInput).returning(
+            models.PredictionInput.id, sort_by_parameter_order=True
+        ),
+        [{**r.input_data, "user_id": r.user_id} for r in records],
+    ).all()
+    db.execute(
+        insert(models.PredictionOutput),
+        [
+            {
+                "input_id": input_id,
+                "user_id": r.user_id,
+                "request_id": r.request_id,
+                "timestamp": r.timestamp,
+                "prediction": r.prediction,
+                "churn_probability": r.churn_probability,
+            }
+            for input_id, r in zip(input_ids, records)
+        ],
+    )
+    db.commit()
+
+
+class AuditWriter:
+    """File bornée + thread d'écriture par lots."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_ms: float = 200.0,
+        name: str = "audit_writer",
+    ):
+        self._session_factory = session_factory
+        self.max_queue = max_queue
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_ms = flush_interval_ms
+        self.name = name
+        self._queue: "queue.Queue[AuditRecord]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0  # en file + en cours d'écriture
+        self._counts = dict.fromkeys(("written_rows", "failed_rows", "dropped_rows", "batches"), 0)
+        self._last_error: Optional[str] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        metrics.register_collector(name, self.stats)
+
+    def offer(self, record: AuditRecord) -> bool:
+        """Dépose `record` dans la file ; False si elle est pleine (ou l'écrivain arrêté)."""
+        # Test d'arrêt et dépôt sous le verrou de `close` : aucun dépôt après la fin du thread
+        with self._lock:
+            if self._closed:
+                return False
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                return False
+            self._pending += 1
+        return True
+
+    def count_dropped(self, n: int = 1) -> None:
+        """Comptabilise des lignes d'audit abandonnées (politique "drop")."""
+        with self._lock:
+            self._counts["dropped_rows"] += n
+        metrics.inc(f"{self.name}.dropped_rows", n)
+
+    def _next_batch(self) -> List[AuditRecord]:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval_ms / 1000.0
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                if self._closed:  # arrêt : on écrit sans attendre la fin de l'intervalle
+                    break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._closed and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[AuditRecord]) -> None:
+        start = time.perf_counter()
+        db = None
+        try:
+            db = self._session_factory()
+            write_records(db, batch)
+            ok, error = True, None
+        except Exception as e:
+            if db is not None:
+                db.rollback()
+            ok, error = False, f"{type(e).__name__}: {e}"
+        finally:
+            if db is not None:
+                db.close()
+
+        metrics.observe(f"{self.name}.batch_size", len(batch))
+        metrics.observe(f"{self.name}.flush_ms", (time.perf_counter() - start) * 1000.0)
+        with self._lock:
+            self._counts["batches"] += 1
+            if ok:
+                self._counts["written_rows"] += len(batch)
+            else:
+                self._counts["failed_rows"] += len(batch)
+                self._last_error = error
+            self._pending -= len(batch)
+            self._idle.notify_all()
+        if not ok:
+            metrics.inc(f"{self.name}.failed_rows", len(batch))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend que tout ce qui a été déposé soit écrit (ou en échec) ; False si délai dépassé."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Refuse les nouveaux dépôts, vide la file puis arrête le thread d'écriture."""
+        with self._lock:
+            self._closed = True
+        self._thread.join(timeout)
+        metrics.unregister_collector(self.name)
+
+    def stats(self) -> dict:
+        """Configuration, état de la file et compteurs (pour /metrics)."""
+        with self._lock:
+            return {
+                "max_queue": self.max_queue,
+                "batch_size": self.batch_size,
+                "flush_interval_ms": self.flush_interval_ms,
+                "queued": self._queue.qsize(),
+                "pending": self._pending,
+                **self._counts,
+                "last_error": self._last_error,
+            }
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditWriter:
+    """Écrivain partagé du processus (créé à la première utilisation, réglages `settings`)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter(
+                lambda: db_conn.SessionLocal(),
+                max_queue=settings.AUDIT_QUEUE_MAX_SIZE,
+                batch_size=settings.AUDIT_BATCH_SIZE,
+                flush_interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+            )
+        return _writer
+
+
+def shutdown_audit_writer(timeout: Optional[float] = None) -> None:
+    """Vide la file puis arrête l'écrivain partagé (arrêt de l'application)."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close(timeout)
+            _writer = None
@@ -6,6 +6,8 @@ Contenu :
   la feature dérivée `ratio_revenu_poste = revenu_mensuel / (moyenne_poste + 1)`.
 - MAPPING_POSTE : encodage ordinal des intitulés de poste (entiers).
 - MAPPING_FREQ : encodage ordinal de la fréquence de déplacement (entiers).
+- SEUIL_REVENU_BAS / SEUIL_SATISFACTION_BASSE / COLONNES_SATISFACTION : définition
+  de la feature dérivée `revenu_satisfaction` (bas revenu ET faible satisfaction).
 
 Notes importantes
 -----------------
@@ -55,4 +57,16 @@ MAPPING_FREQ = {
     'Occasionnel': 1, 
     "Fréquent": 2,
     "Frequent": 2,
-}
\ No newline at end of file
+}
+
+# Feature dérivée `revenu_satisfaction` (telle que calculée à l'entraînement) :
+# 1 si revenu_mensuel <= 1er quartile du dataset d'entraînement ET
+# moyenne des 4 satisfactions <= 2.5, sinon 0.
+SEUIL_REVENU_BAS = 2911.0
+SEUIL_SATISFACTION_BASSE = 2.5
+COLONNES_SATISFACTION = (
+    "satisfaction_employee_nature_travail",
+    "satisfaction_employee_environnement",
+    "satisfaction_employee_equipe",
+    "satisfaction_employee_equilibre_pro_perso",
+)
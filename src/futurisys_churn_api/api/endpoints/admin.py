@@ -0,0 +1,59 @@
+"""
+Endpoints d'administration du modèle servi (scope JWT `admin` requis).
+
+Résumé
+------
+- GET  /admin/model           : versions courante / précédente, réglages, dernière erreur.
+- POST /admin/model/reload    : relit les artefacts et bascule si la version a changé.
+  - artefacts illisibles / invalides => 500 (la version courante reste servie).
+- POST /admin/model/rollback  : revient à la version précédente gardée en mémoire.
+  - pas de version précédente => 409.
+
+Les requêtes en cours terminent avec la version qu'elles ont prise au début
+(cf. `api/model_registry.py`) : un swap ne coupe rien.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Security
+
+from ..model_registry import ModelRegistryError, registry
+from ..security import get_current_user, verify_api_key
+from ...database.models import User
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/model")
+def model_info(
+    _api_key_ok = Security(verify_api_key),
+    _user: User = Security(get_current_user, scopes=["admin"]),
+) -> Dict[str, Any]:
+    """État du registre de modèles."""
+    return registry.info()
+
+
+@router.post("/model/reload")
+def reload_model(
+    _api_key_ok = Security(verify_api_key),
+    _user: User = Security(get_current_user, scopes=["admin"]),
+) -> Dict[str, Any]:
+    """Recharge les artefacts ; `swapped` indique si une nouvelle version est servie."""
+    try:
+        loaded, swapped = registry.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rechargement impossible : {e}")
+    return {"swapped": swapped, **loaded.describe()}
+
+
+@router.post("/model/rollback")
+def rollback_model(
+    _api_key_ok = Security(verify_api_key),
+    _user: User = Security(get_current_user, scopes=["admin"]),
+) -> Dict[str, Any]:
+    """Rebascule sur la version précédente (instantané : déjà en mémoire)."""
+    try:
+        loaded = registry.rollback()
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return loaded.describe()
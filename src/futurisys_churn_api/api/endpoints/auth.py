@@ -11,6 +11,12 @@ Résumé
   - Identifiants invalides => 400 (conforme aux tests).
   - Scopes dans le JWT selon le rôle (viewer/analyst/admin).
 
+Exécution
+---------
+Les endpoints sont `async` : bcrypt (volontairement lent) tourne sur le pool de processus
+dédié (`api/passwords.py`, 503 + Retry-After s'il est saturé) et les requêtes SQL via
+`run_db` (threadpool, ou driver async avec `DATABASE_ASYNC=true`). Une rafale de connexions ne consomme donc pas les threads qui servent `/predict`.
+
 Note Swagger
 ------------
 La fenêtre "Authorize" de Swagger utilise un modal OAuth2 générique et peut afficher
@@ -23,8 +29,10 @@ from sqlalchemy.orm import Session
 
 from ..security import (
     get_db,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
+    lookup_user,
+    run_db,
     create_access_token,
     fake_users_db,  # fallback si la BDD est désactivée
     User,           # modèle SQLAlchemy (importé via security)
@@ -33,8 +41,19 @@ from ..security import (
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def create_user(db: Session, email: str, hashed_password: str, role: str) -> dict:
+    """Insère l'utilisateur et renvoie {id, email, role} (appel bloquant)."""
+    user = User(email=email, hashed_password=hashed_password, role=role)
+    db.add(user)
+    db.flush()
+    # Lu avant le commit : après, l'objet est expiré (relecture = nouvel emprunt au pool)
+    created = {"id": user.id, "email": user.email, "role": user.role}
+    db.commit()
+    return created
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     email: str,
     password: str,
     role: str = "viewer",
@@ -46,23 +65,21 @@ def register(
     - 503 si la base est désactivée.
     - 400 si l'email est déjà enregistré.
     - 201 avec {id, email, role} en cas de succès.
+    - 503 (+ Retry-After) si le pool de hachage est saturé.
     """
     if not db:
         raise HTTPException(status_code=503, detail="La création de compte est désactivée.")
 
-    existing = db.query(User).filter(User.email == email).first()
+    existing = await run_db(db, lookup_user, email)
     if existing:
         raise HTTPException(status_code=400, detail="Email déjà enregistré.")
 
-    user = User(email=email, hashed_password=get_password_hash(password), role=role)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return {"id": user.id, "email": user.email, "role": user.role}
+    hashed_password = await get_password_hash_async(password)
+    return await run_db(db, create_user, email, hashed_password, role)
 
 
 @router.post("/token")
-def login(
+async def login(
     # ⬇️ Formulaire minimal (Swagger affichera uniquement ces deux champs ici)
     username: str = Form(...),
     password: str = Form(...),
@@ -74,19 +91,20 @@ def login(
     - Avec BDD : recherche par email (= username) et vérification du hash.
     - Sans BDD : fallback sur `fake_users_db`.
     - 400 si identifiants invalides.
+    - 503 (+ Retry-After) si le pool de hachage est saturé.
     - Scopes ajoutés au JWT selon le rôle.
     """
     user_data = None
 
     if db:
         # Mode AVEC base de données
-        user_in_db = db.query(User).filter(User.email == username).first()
-        if user_in_db and verify_password(password, user_in_db.hashed_password):
+        user_in_db = await run_db(db, lookup_user, username)
+        if user_in_db and await verify_password_async(password, user_in_db.hashed_password):
             user_data = user_in_db
     else:
         # Mode SANS base de données (démo/tests)
         user_dict = fake_users_db.get(username)
-        if user_dict and verify_password(password, user_dict["hashed_password"]):
+        if user_dict and await verify_password_async(password, user_dict["hashed_password"]):
             user_data = User(**user_dict)
 
     if not user_data:
@@ -4,13 +4,53 @@ Endpoint de prédiction du churn (probabilité de démission).
 Fonctionnement (vue d'ensemble)
 -------------------------------
 1) Valide et reçoit un payload conforme à `EmployeeData` (Pydantic).
-2) Prépare les données (binarisation, features dérivées, encodage).
-3) Aligne les colonnes avec celles attendues par le modèle (input_features.json).
-4) Appelle le modèle (joblib) pour obtenir:
-   - `prediction` : 0 (reste) ou 1 (part)
-   - `churn_probability` : probabilité associée (0.0–1.0)
-5) Si une base de données est active, enregistre l'entrée/sortie.
-6) Retourne la réponse JSON (et ajoute les ids si DB active).
+2) Prépare les données (binarisation, features dérivées, encodage) et les aligne
+   sur les colonnes attendues par le modèle (input_features.json) :
+   - par défaut via le `FeaturePlan` compilé au démarrage (ligne NumPy directe, sans pandas),
+   - ou via le pipeline pandas de référence si `PREPROCESSING_MODE=pandas`.
+3) Appelle le modèle (joblib) **une fois** (`predict_proba`) pour obtenir:
+   - `churn_probability` : probabilité de départ (0.0–1.0)
+   - `prediction` : 0 (reste) ou 1 (part), soit `churn_probability > DECISION_THRESHOLD`
+4) Si une base de données est active, enregistre l'entrée/sortie.
+5) Retourne la réponse JSON (et ajoute les ids si DB active).
+
+Prédiction par lot
+------------------
+`POST /predict/batch` reçoit une liste de payloads (au plus `PREDICT_BATCH_MAX_SIZE`) :
+- chaque élément est validé séparément ; un élément invalide est signalé dans la
+  réponse (`errors`) sans faire échouer le reste du lot ;
+- les éléments valides sont encodés en **une** matrice (`encode_batch`) et le modèle
+  est appelé une seule fois ;
+- si la BDD est active, entrées et sorties sont insérées en masse (un INSERT par table) ;
+- la réponse conserve l'ordre des éléments (`index` = position dans la requête).
+
+Cache de prédictions
+--------------------
+Un profil déjà scoré par la même version du modèle (hash du fichier joblib) est servi
+depuis un cache (`api/prediction_cache.py`), sans préprocessing ni appel modèle :
+LRU+TTL en mémoire, ou table mmap partagée par les workers (`PREDICTION_CACHE_BACKEND=shared`). Les hits sont **quand même** journalisés en base (audit complet).
+
+Micro-batching (opt-in)
+-----------------------
+Avec `MICRO_BATCH_ENABLED=true`, `/predict` ne score plus sa ligne seul : la ligne
+encodée est confiée au `MicroBatcher`, qui regroupe les requêtes concurrentes et
+appelle `model.predict_proba` une fois par micro-lot (voir `api/micro_batching.py`).
+Seul l'encodage passe par l'exécuteur d'inférence ; le résultat du micro-lot est attendu
+sur la boucle d'événements (`asyncio.wrap_future`), sans bloquer de thread : la taille
+des lots n'est donc pas plafonnée par `INFERENCE_WORKERS`.
+La file du micro-batcher est bornée (`MICRO_BATCH_QUEUE_SIZE`) : pleine, la requête est
+rejetée (503 + `Retry-After`) comme lorsque l'exécuteur est saturé.
+
+Exécution
+---------
+Les endpoints sont `async` : préprocessing + inférence partent sur l'exécuteur d'inférence
+dédié et borné (`api/executor.py`) ; file pleine => 503 + `Retry-After`. L'écriture en
+base passe par `security.run_db` : threadpool AnyIO avec l'engine synchrone, driver async
+(sans thread) avec `DATABASE_ASYNC=true`.
+
+Avec `AUDIT_WRITE_BEHIND=true`, `/predict` ne l'attend même plus : le couple entrée/sortie
+part dans la file d'écriture différée (`api/audit_writer.py`) et la réponse ne porte que
+le `request_id` (en-tête `X-Request-ID` ou UUID généré).
 
 Sécurité
 --------
@@ -21,61 +61,301 @@ Sécurité
 
 Notes
 -----
-- Le chargement du modèle et des features se fait au démarrage du module.
+- Le modèle et les features viennent du `ModelRegistry` partagé (`api/model_registry.py`) :
+  chargés à la première requête, rechargeables à chaud (fichiers modifiés ou `/admin/model/reload`).
 - Les tests couvrent le mode avec BDD et sans BDD.
 """
-import json
-import joblib
-from typing import Generator, Optional, Dict, Any
+import asyncio
+import uuid
+from typing import Optional, Dict, Any, List, Tuple
 
 import pandas as pd
-from fastapi import APIRouter, HTTPException, Depends, Security
+from fastapi import APIRouter, Body, HTTPException, Depends, Header, Security
+from pydantic import ValidationError
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from ..preprocessing import convert_binary_to_int, add_features, encode_categorical
+from .. import inference, settings
+from ..audit_writer import AuditRecord, get_audit_writer
+from ..executor import ExecutorSaturated, get_inference_executor
+from ..micro_batching import VersionedMicroBatchers
+from ..model_registry import LoadedModel, registry
+from ..prediction_cache import build_prediction_cache, payload_key
+from ..preprocessing import encode_batch, preprocess_dataframe
 from ..schemas import EmployeeData
-from ..security import get_current_user, verify_api_key
-from ...database.connection import SessionLocal
+from ..security import get_current_user, get_db, run_db, verify_api_key
 from ...database import models
 from ...database.models import User
 
 # Routeur du "module" prediction
 router = APIRouter()
 
-# --- CHARGEMENT DES ARTEFACTS AU DÉMARRAGE ---
-# Modèle et liste des features attendues (contrat d'interface avec le préprocessing)
-model = joblib.load("models/churn_model.joblib")
-with open("models/input_features.json", "r") as f:
-    model_features = json.load(f)
+# --- ARTEFACTS ---
+# Modèle, features et FeaturePlan sont fournis par le registre partagé (chargement
+# paresseux, version = hash du contenu, rechargement à chaud). Chaque requête prend
+# `registry.current()` une fois et s'y tient, même si un swap survient entre-temps.
+
+# Cache de prédictions : par processus ou partagé entre workers (PREDICTION_CACHE_BACKEND)
+prediction_cache = build_prediction_cache()
+
+# Micro-batchers par version de modèle, créés à la première utilisation. Pendant un swap,
+# les requêtes en vol finissent sur le batcher de leur version ; il est fermé une fois vidé.
+micro_batchers = VersionedMicroBatchers(
+    lambda version: registry.loaded is not None and registry.loaded.version == version,
+    max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+    max_queue=settings.MICRO_BATCH_QUEUE_SIZE,
+)
+
+
+def encode_employee(employee_data: EmployeeData, loaded: LoadedModel):
+    """
+    Transforme le payload validé en entrée du modèle (une ligne, ordre `model_features`).
+
+    Lève
+    ----
+    HTTPException 400
+        Si les données ne peuvent pas être converties en numériques.
+    """
+    try:
+        # "fast" (défaut) : FeaturePlan ; "pandas" : pipeline de référence (debug / comparaison)
+        if settings.PREPROCESSING_MODE == "pandas":
+            return preprocess_dataframe(
+                pd.DataFrame([employee_data.model_dump()]), list(loaded.model_features)
+            )
+        return loaded.feature_plan.encode(employee_data)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Erreur de conversion de type des données : {e}"
+        )
+
+
+def current_model() -> LoadedModel:
+    """
+    Version du modèle à utiliser pour la requête.
+
+    Lève
+    ----
+    HTTPException 503
+        Si les artefacts ne peuvent pas être chargés.
+    """
+    try:
+        return registry.current()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Modèle indisponible : {e}")
+
+
+async def run_inference(fn, *args):
+    """
+    Exécute `fn(*args)` sur l'exécuteur d'inférence dédié (hors threadpool AnyIO).
+
+    Lève
+    ----
+    HTTPException 503 (+ Retry-After)
+        Si la file de l'exécuteur est pleine (rejet de charge).
+    """
+    try:
+        return await get_inference_executor().run(fn, *args)
+    except ExecutorSaturated:
+        raise saturated()
+
+
+def saturated() -> HTTPException:
+    """503 + Retry-After : exécuteur d'inférence ou file du micro-batching pleine."""
+    return HTTPException(
+        status_code=503,
+        detail="Service saturé : trop de prédictions en attente, réessayez plus tard.",
+        headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER_SECONDS)},
+    )
 
 
-def get_db() -> Generator[Optional[Session], None, None]:
+def lookup_or_encode(employee_data: EmployeeData) -> Tuple[LoadedModel, Optional[str], Optional[float], Any]:
     """
-    Fournit une session SQLAlchemy si la base est activée, sinon `None`.
+    Cache puis, sur un miss, préprocessing du payload (exécuté sur l'exécuteur d'inférence).
 
-    Yields
+    Retour
+    ------
+    (loaded, cache_key, churn_probability, X)
+        `churn_probability` vient du cache (X = None), ou vaut None et X est la ligne encodée.
+    """
+    loaded = current_model()
+
+    # 1) Cache : même profil + même version de modèle -> ni préprocessing ni appel modèle
+    cache_key = payload_key(employee_data) if settings.PREDICTION_CACHE_ENABLED else None
+    churn_probability = prediction_cache.get(cache_key, loaded.version) if cache_key else None
+    if churn_probability is not None:
+        return loaded, cache_key, churn_probability, None
+
+    # 2) Préprocessing + alignement sur le contrat du modèle
+    return loaded, cache_key, None, encode_employee(employee_data, loaded)
+
+
+def finish_prediction(
+    loaded: LoadedModel, cache_key: Optional[str], churn_probability: float, cached: bool
+) -> Tuple[int, float]:
+    """Mise en cache d'une probabilité calculée, puis décision avec le seuil courant."""
+    if cache_key and not cached:
+        prediction_cache.put(cache_key, loaded.version, float(churn_probability))
+    prediction = inference.decide([churn_probability])
+    return int(prediction[0]), float(churn_probability)
+
+
+def score_employee(employee_data: EmployeeData) -> Tuple[int, float]:
+    """
+    Cache, préprocessing et prédiction d'un payload (exécuté sur l'exécuteur d'inférence).
+
+    Retour
+    ------
+    (prediction, churn_probability)
+    """
+    try:
+        loaded, cache_key, churn_probability, X = lookup_or_encode(employee_data)
+        cached = churn_probability is not None
+        if not cached:
+            # 3) Prédiction
+            churn_probability = inference.churn_probabilities(loaded.model, X)[0]
+        return finish_prediction(loaded, cache_key, churn_probability, cached)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Erreur lors de la prédiction : {e}"
+        )
+
+
+async def score_employee_micro_batched(employee_data: EmployeeData) -> Tuple[int, float]:
+    """
+    Variante micro-batchée de `score_employee` (`MICRO_BATCH_ENABLED`).
+
+    L'encodage passe par l'exécuteur d'inférence ; la ligne est ensuite soumise au
+    micro-batcher de sa version et son résultat attendu sur la boucle d'événements.
+
+    Retour
     ------
-    Session | None
-        Une session active à utiliser dans la requête, ou None si BDD désactivée.
-    """
-    if SessionLocal is None:
-        # Mode "sans base" (ex: Hugging Face Space) : on renvoie None.
-        yield None
-        return
-        
-    db = SessionLocal()
+    (prediction, churn_probability)
+    """
     try:
-        yield db
-    finally:
-        db.close()
+        loaded, cache_key, churn_probability, X = await run_inference(lookup_or_encode, employee_data)
+        cached = churn_probability is not None
+        if not cached:
+            # 3) Prédiction : un appel modèle par micro-lot
+            with micro_batchers.lease(loaded.version, loaded.model.predict_proba) as batcher:
+                try:
+                    future = batcher.submit(X)
+                except ExecutorSaturated:
+                    raise saturated()
+                churn_probability = (await asyncio.wrap_future(future))[1]
+        return finish_prediction(loaded, cache_key, churn_probability, cached)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Erreur lors de la prédiction : {e}"
+        )
+
+
+def save_prediction(
+    db: Session,
+    employee_data: EmployeeData,
+    current_user: Optional[User],
+    prediction: int,
+    churn_probability: float,
+    request_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Journalise entrée + sortie et renvoie la réponse avec leurs identifiants (500 si échec)."""
+    try:
+        # Entrée (brute) + rattachement utilisateur
+        input_data_dict = employee_data.model_dump()
+        if current_user:
+            input_data_dict['user_id'] = current_user.id
+
+        db_input = models.PredictionInput(**input_data_dict)
+        db.add(db_input)
+        db.flush()  # récupère db_input.id sans commit total
+
+        # Sortie (résultat du modèle)
+        db_output = models.PredictionOutput(
+            input_id=db_input.id,
+            user_id=current_user.id if current_user else None,
+            request_id=request_id,
+            prediction=prediction,
+            churn_probability=churn_probability,
+        )
+        db.add(db_output)
+        db.flush()
+        # Ids lus avant le commit : après, les objets sont expirés et les relire
+        # emprunterait à nouveau une connexion au pool.
+        prediction_id, input_id = db_output.id, db_input.id
+        db.commit()
+
+        return {
+            "prediction_id": prediction_id,
+            "input_id": input_id,
+            "request_id": request_id,
+            "prediction": prediction,
+            "churn_probability": churn_probability,
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Erreur de base de données : {e}"
+        )
+
+
+async def save_prediction_write_behind(
+    db: Session,
+    employee_data: EmployeeData,
+    current_user: Optional[User],
+    prediction: int,
+    churn_probability: float,
+    request_id: str,
+) -> Dict[str, Any]:
+    """
+    Dépose le couple entrée/sortie dans la file d'écriture différée et répond aussitôt.
+
+    File pleine : politique `AUDIT_QUEUE_FULL_POLICY` ("sync" = écriture synchrone,
+    "reject" = 503 + Retry-After, "drop" = ligne d'audit abandonnée et comptée).
+    """
+    record = AuditRecord(
+        request_id=request_id,
+        input_data=employee_data.model_dump(),
+        user_id=current_user.id if current_user else None,
+        prediction=prediction,
+        churn_probability=churn_probability,
+    )
+    writer = get_audit_writer()
+    if not writer.offer(record):
+        policy = settings.AUDIT_QUEUE_FULL_POLICY
+        if policy == "reject":
+            raise HTTPException(
+                status_code=503,
+                detail="File d'écriture des prédictions pleine, réessayez plus tard.",
+                headers={"Retry-After": str(settings.AUDIT_RETRY_AFTER_SECONDS)},
+            )
+        if policy == "drop":
+            writer.count_dropped()
+        else:
+            return await run_db(
+                db, save_prediction, employee_data, current_user, prediction, churn_probability, request_id
+            )
+    return {
+        "request_id": request_id,
+        "prediction": prediction,
+        "churn_probability": churn_probability,
+    }
 
 
 @router.post("/predict", tags=["Predictions"])
-def predict_churn(
+async def predict_churn(
     employee_data: EmployeeData,
     _api_key_ok = Security(verify_api_key),
     current_user: User = Security(get_current_user, scopes=["predict:read"]),
-    db: Optional[Session] = Depends(get_db)
+    db: Optional[Session] = Depends(get_db),
+    x_request_id: Optional[str] = Header(default=None, alias="X-Request-ID", max_length=64),
     ) -> Dict[str, Any]:
     """
     Prédit la probabilité de démission d'un employé et journalise (si DB active).
@@ -91,93 +371,165 @@ def predict_churn(
         Utilisateur authentifié (JWT) avec le scope `predict:read`.
     db : Session | None
         Session SQLAlchemy si base activée, sinon None.
+    x_request_id : str | None
+        En-tête `X-Request-ID` (64 caractères max.) ; généré (UUID4) s'il est absent.
 
     Retour
     ------
     dict
         - Sans DB : {"prediction": int, "churn_probability": float}
-        - Avec DB : {"prediction_id": int, "input_id": int, "prediction": int, "churn_probability": float}
+        - Avec DB : {"prediction_id": int, "input_id": int, "request_id": str,
+          "prediction": int, "churn_probability": float}
+        - Avec DB et `AUDIT_WRITE_BEHIND` : {"request_id": str, "prediction": int,
+          "churn_probability": float} (écriture en base différée)
 
     Erreurs
     -------
     400 : problème de typage/convertibilité des features
     500 : erreur lors de la prédiction ou lors de l'écriture en base
+    503 : exécuteur d'inférence saturé ou file d'écriture pleine (en-tête Retry-After)
     """
-    # 1) DataFrame à une ligne à partir du payload validé
-    input_df = pd.DataFrame([employee_data.model_dump()])
+    # 1-3) Cache + préprocessing + prédiction sur l'exécuteur dédié
+    if settings.MICRO_BATCH_ENABLED:
+        prediction, churn_probability = await score_employee_micro_batched(employee_data)
+    else:
+        prediction, churn_probability = await run_inference(score_employee, employee_data)
 
-    # 2) Préprocessing
-    # 2.1 binarisation de colonnes (Oui/Non, F/M => 1/0)
-    input_df = convert_binary_to_int(input_df, 'heure_supplementaires', positive_value='Oui')
-    input_df = convert_binary_to_int(input_df, 'genre', positive_value='F')
+    # 4) Persistance si DB active (y compris sur un hit du cache)
+    if db:
+        request_id = x_request_id or uuid.uuid4().hex
+        if settings.AUDIT_WRITE_BEHIND:
+            return await save_prediction_write_behind(
+                db, employee_data, current_user, prediction, churn_probability, request_id
+            )
+        # E/S SQL hors de la boucle (threadpool ou driver async)
+        return await run_db(
+            db, save_prediction, employee_data, current_user, prediction, churn_probability, request_id
+        )
+
+    # 5) Mode sans base : on répond simplement le résultat
+    return {
+        "prediction": prediction,
+        "churn_probability": churn_probability,
+    }
 
-    # 2.2 création de features dérivées
-    input_df = add_features(input_df)
 
-    # 2.3 encodage catégoriel (one-hot + mapping ordinal)
-    input_df = encode_categorical(input_df)
+def score_batch(records: List[Dict[str, Any]]) -> Tuple[Any, Any]:
+    """Préprocessing vectorisé + un appel modèle pour tout le lot (exécuteur d'inférence)."""
+    loaded = current_model()
 
-    # 2.4 alignement des colonnes avec le contrat du modèle
-    final_df = input_df.reindex(columns=model_features, fill_value=0)
+    # Préprocessing du lot en une seule matrice
+    try:
+        plan = loaded.feature_plan
+        columns = {name: [r[name] for r in records] for name in plan.input_columns}
+        X = encode_batch(columns, plan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Erreur de conversion de type des données : {e}")
 
-    # 2.5 cast en float (certaines libs de ML exigent des numériques purs)
+    # Un seul appel modèle pour tout le lot
     try:
-        final_df = final_df.astype(float)
+        return inference.predict(loaded.model, X)
     except Exception as e:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Erreur de conversion de type des données : {e}"
-        )
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction : {e}")
 
-    # 3) Prédiction
+
+def save_batch(db: Session, records: List[Dict[str, Any]], valid_results: List[Dict[str, Any]], user_id) -> None:
+    """Insertion en masse (un INSERT par table) ; complète `valid_results` avec les ids."""
     try:
-        prediction = model.predict(final_df)
-        probability = model.predict_proba(final_df)
-        churn_probability = probability[0][1]
+        input_ids = db.scalars(
+            insert(models.PredictionInput).returning(
+                models.PredictionInput.id, sort_by_parameter_order=True
+            ),
+            [{**record, "user_id": user_id} for record in records],
+        ).all()
+        output_ids = db.scalars(
+            insert(models.PredictionOutput).returning(
+                models.PredictionOutput.id, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    "input_id": input_id,
+                    "user_id": user_id,
+                    "prediction": result["prediction"],
+                    "churn_probability": result["churn_probability"],
+                }
+                for input_id, result in zip(input_ids, valid_results)
+            ],
+        ).all()
+        db.commit()
     except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erreur de base de données : {e}")
+
+    for result, input_id, output_id in zip(valid_results, input_ids, output_ids):
+        result["prediction_id"] = output_id
+        result["input_id"] = input_id
+
+
+@router.post("/predict/batch", tags=["Predictions"])
+async def predict_churn_batch(
+    items: List[Any] = Body(..., description="Liste de payloads au format EmployeeData."),
+    _api_key_ok = Security(verify_api_key),
+    current_user: User = Security(get_current_user, scopes=["predict:read"]),
+    db: Optional[Session] = Depends(get_db)
+    ) -> Dict[str, Any]:
+    """
+    Prédit le risque de départ pour une liste d'employés en un seul appel modèle.
+
+    Retour
+    ------
+    dict
+        {"results": [...], "n_predictions": int, "n_errors": int}, où chaque élément de
+        `results` (dans l'ordre de la requête) vaut :
+        - {"index", "prediction", "churn_probability"} (+ "input_id", "prediction_id" si DB active)
+        - ou {"index", "errors"} si l'élément n'a pas passé la validation.
+
+    Erreurs
+    -------
+    413 : lot plus grand que PREDICT_BATCH_MAX_SIZE
+    400 : problème de typage/convertibilité des features
+    500 : erreur lors de la prédiction ou lors de l'écriture en base
+    503 : exécuteur d'inférence saturé (en-tête Retry-After)
+    """
+    if len(items) > settings.PREDICT_BATCH_MAX_SIZE:
         raise HTTPException(
-            status_code=500, 
-            detail=f"Erreur lors de la prédiction : {e}"
+            status_code=413,
+            detail=f"Lot trop volumineux : {len(items)} éléments (max {settings.PREDICT_BATCH_MAX_SIZE}).",
         )
 
-    # 4) Persistance si DB active
-    if db:
+    # 1) Validation élément par élément (les erreurs n'interrompent pas le lot)
+    results: List[Dict[str, Any]] = []
+    valid: List[EmployeeData] = []
+    valid_results: List[Dict[str, Any]] = []
+    for index, item in enumerate(items):
         try:
-            # Entrée (brute) + rattachement utilisateur
-            input_data_dict = employee_data.model_dump()
-            if current_user:
-                input_data_dict['user_id'] = current_user.id
-            
-            db_input = models.PredictionInput(**input_data_dict)
-            db.add(db_input)
-            db.flush()  # récupère db_input.id sans commit total
-
-            # Sortie (résultat du modèle)
-            db_output = models.PredictionOutput(
-                input_id=db_input.id,
-                user_id=current_user.id if current_user else None,
-                prediction=int(prediction[0]),
-                churn_probability=float(churn_probability),
-            )
-            db.add(db_output)
-            db.commit()
-            db.refresh(db_output)
-
-            return {
-                "prediction_id": db_output.id,
-                "input_id": db_input.id,
-                "prediction": int(prediction[0]),
-                "churn_probability": float(churn_probability),
-            }
-        except Exception as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Erreur de base de données : {e}"
-            )
-    else:
-        # 5) Mode sans base : on répond simplement le résultat
-        return {
-            "prediction": int(prediction[0]),
-            "churn_probability": float(churn_probability),
-        }
\ No newline at end of file
+            employee = EmployeeData.model_validate(item)
+        except ValidationError as e:
+            results.append({
+                "index": index,
+                "errors": e.errors(include_url=False, include_context=False, include_input=False),
+            })
+            continue
+        valid.append(employee)
+        valid_results.append({"index": index})
+        results.append(valid_results[-1])
+
+    if valid:
+        records = [employee.model_dump() for employee in valid]
+
+        # 2-3) Préprocessing + un seul appel modèle, sur l'exécuteur dédié
+        predictions, probabilities = await run_inference(score_batch, records)
+        for result, pred, proba in zip(valid_results, predictions, probabilities):
+            result["prediction"] = int(pred)
+            result["churn_probability"] = float(proba)
+
+        # 4) Persistance en masse si DB active
+        if db:
+            user_id = current_user.id if current_user else None
+            await run_db(db, save_batch, records, valid_results, user_id)
+
+    return {
+        "results": results,
+        "n_predictions": len(valid),
+        "n_errors": len(items) - len(valid),
+    }
@@ -0,0 +1,142 @@
+"""
+Exécuteur d'inférence dédié, borné, avec rejet de charge (backpressure).
+
+Pourquoi ?
+----------
+Un endpoint `def` synchrone tourne dans le threadpool AnyIO par défaut, partagé avec
+toutes les autres dépendances synchrones : sous forte charge, l'inférence (CPU) occupe
+tous les threads et affame l'authentification, `/health`, `/ready`...
+
+Ici, préprocessing + inférence sont soumis à un `ThreadPoolExecutor` **dédié** de
+`INFERENCE_WORKERS` threads, précédé d'une file bornée à `INFERENCE_QUEUE_SIZE` tâches :
+- au-delà de `workers + queue` tâches en cours/en attente, `submit` lève
+  `ExecutorSaturated` immédiatement ; l'API répond alors 503 + `Retry-After` au lieu de
+  laisser la latence exploser ;
+- une tâche dont le client abandonne avant son démarrage est annulée et libère sa place.
+
+Un pool de threads (et non de processus) : le modèle, le registre, les caches et le
+micro-batcher vivent dans le processus, et XGBoost / NumPy relâchent le GIL pendant le
+calcul. Pour plus de cœurs, multiplier les workers uvicorn.
+
+Observabilité (`/metrics`, composant `inference_executor`) : taille du pool, file max,
+tâches en attente / en cours, rejets ; résumés `queue_wait_ms` et `run_ms`.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from . import metrics, settings
+
+
+class ExecutorSaturated(RuntimeError):
+    """La file de l'exécuteur est pleine : la requête doit être rejetée (503)."""
+
+
+class InferenceExecutor:
+    """Pool de threads dédié dont la file d'attente est bornée."""
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "inference_executor"):
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError("max_workers doit être >= 1 et max_queue >= 0")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._rejected = 0
+        metrics.register_collector(name, self.stats)
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Soumet `fn(*args, **kwargs)` ; renvoie un `concurrent.futures.Future`.
+
+        Lève
+        ----
+        ExecutorSaturated
+            Si `max_workers + max_queue` tâches sont déjà en cours ou en attente.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            metrics.inc(f"{self.name}.rejected")
+            raise ExecutorSaturated(f"File d'inférence pleine ({self.max_workers + self.max_queue} tâches)")
+
+        enqueued = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            metrics.observe(f"{self.name}.queue_wait_ms", (started - enqueued) * 1000.0)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                metrics.observe(f"{self.name}.run_ms", (time.perf_counter() - started) * 1000.0)
+
+        try:
+            future = self._pool.submit(task)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():  # annulée avant démarrage : jamais sortie de la file
+            with self._lock:
+                self._queued -= 1
+        self._slots.release()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Version `await`-able de `submit` (annule la tâche si la requête est abandonnée)."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        metrics.unregister_collector(self.name)
+
+    def stats(self) -> dict:
+        """Configuration et état courant de la file (pour /metrics)."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "rejected": self._rejected,
+            }
+
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """Exécuteur partagé du processus (créé à la première utilisation, réglages `settings`)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = InferenceExecutor(settings.INFERENCE_WORKERS, settings.INFERENCE_QUEUE_SIZE)
+        return _executor
+
+
+def shutdown_inference_executor() -> None:
+    """Arrête l'exécuteur partagé (arrêt de l'application)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,247 @@
+"""
+Plan de features compilé une fois à partir du contrat `models/input_features.json`.
+
+Pourquoi ?
+----------
+Le pipeline pandas (`preprocessing.preprocess_dataframe`) redécouvre à chaque appel
+la disposition des colonnes (get_dummies + clean_col_names + reindex). Le `FeaturePlan`
+résout tout cela **au démarrage** :
+- pour chaque colonne du modèle, la règle qui la produit (copie brute, binaire,
+  ordinal, one-hot, feature dérivée) et son index de sortie ;
+- pour chaque valeur catégorielle autorisée par `EmployeeData`, le code ordinal
+  ou l'index one-hot correspondant ;
+- les formules des features dérivées (mêmes définitions que `add_features`).
+
+Une colonne du contrat qu'aucune règle ne sait produire lève `FeaturePlanError`
+à la compilation (l'API refuse de démarrer) au lieu d'être remplie de 0 à chaque requête.
+
+Les formules dérivées sont écrites avec NumPy et fonctionnent aussi bien sur des
+scalaires (une requête) que sur des colonnes entières (traitement par lot).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Literal, Mapping, Optional, Sequence, Tuple, get_args, get_origin
+
+import numpy as np
+
+from .constants import (
+    MOYENNES_POSTE,
+    MAPPING_POSTE,
+    MAPPING_FREQ,
+    SEUIL_REVENU_BAS,
+    SEUIL_SATISFACTION_BASSE,
+    COLONNES_SATISFACTION,
+)
+from .schemas import EmployeeData
+
+# Colonnes binaires : valeur considérée comme positive (1)
+BINARY_POSITIVE = {"heure_supplementaires": "Oui", "genre": "F"}
+# Colonnes encodées en one-hot (cf. encode_categorical)
+ONE_HOT_COLUMNS = ("statut_marital", "domaine_etude", "departement")
+
+
+class FeaturePlanError(ValueError):
+    """Le contrat de features ne peut pas être produit à partir des entrées de l'API."""
+
+
+def dummy_name(column: str, value: str) -> str:
+    """Nom de colonne one-hot tel que produit par get_dummies + clean_col_names."""
+    return re.sub(r'[^A-Za-z0-9_]+', '', f"{column}_{value}")
+
+
+@dataclass(frozen=True)
+class DerivedFeature:
+    """
+    Feature dérivée : `compute(*valeurs des inputs)`.
+
+    `lookups` remplace, avant l'appel, la valeur brute d'un input catégoriel par une
+    valeur numérique précalculée (NaN si la valeur est absente de la table).
+    """
+    name: str
+    inputs: Tuple[str, ...]
+    formula: str
+    compute: Callable[..., Any]
+    lookups: Mapping[str, Mapping[str, float]] = field(default_factory=dict)
+
+
+def _ratio_revenu_poste(revenu, denominateur):
+    ratio = np.divide(revenu, denominateur, dtype=np.float64)
+    # Poste inconnu (dénominateur NaN) -> 1.0, comme le fillna(1.0) de add_features
+    return np.where(np.isnan(ratio), 1.0, ratio)
+
+
+def _ratio_augmentation_promotion(augmentation, annees):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.divide(augmentation, np.add(annees, 1), dtype=np.float64)
+
+
+def _revenu_satisfaction(revenu, *satisfactions):
+    moyenne = np.divide(sum(satisfactions), len(satisfactions), dtype=np.float64)
+    bas_revenu = np.less_equal(revenu, SEUIL_REVENU_BAS)
+    return np.logical_and(bas_revenu, moyenne <= SEUIL_SATISFACTION_BASSE).astype(np.float64)
+
+
+def derived_features(moyennes_poste: Mapping[str, float] = MOYENNES_POSTE) -> Dict[str, DerivedFeature]:
+    """Catalogue des features dérivées connues (mêmes définitions que `add_features`)."""
+    return {
+        "ratio_revenu_poste": DerivedFeature(
+            name="ratio_revenu_poste",
+            inputs=("revenu_mensuel", "poste"),
+            formula="revenu_mensuel / (MOYENNES_POSTE[poste] + 1), 1.0 si poste inconnu",
+            compute=_ratio_revenu_poste,
+            lookups={"poste": {poste: moyenne + 1 for poste, moyenne in moyennes_poste.items()}},
+        ),
+        "ratio_augmentation_promotion": DerivedFeature(
+            name="ratio_augmentation_promotion",
+            inputs=("augementation_salaire_precedente", "annees_depuis_la_derniere_promotion"),
+            formula="augementation_salaire_precedente / (annees_depuis_la_derniere_promotion + 1)",
+            compute=_ratio_augmentation_promotion,
+        ),
+        "revenu_satisfaction": DerivedFeature(
+            name="revenu_satisfaction",
+            inputs=("revenu_mensuel", *COLONNES_SATISFACTION),
+            formula=(
+                f"revenu_mensuel <= {SEUIL_REVENU_BAS} et "
+                f"moyenne(satisfactions) <= {SEUIL_SATISFACTION_BASSE}"
+            ),
+            compute=_revenu_satisfaction,
+        ),
+    }
+
+
+def _allowed_values(annotation) -> Optional[Tuple[str, ...]]:
+    """Valeurs d'un champ `Literal[...]` (None si le champ n'est pas catégoriel)."""
+    if get_origin(annotation) is Literal:
+        return get_args(annotation)
+    return None
+
+
+@dataclass(frozen=True)
+class FeaturePlan:
+    """
+    Règles de production de chaque colonne du modèle, indexées par position de sortie.
+
+    Utiliser `FeaturePlan.compile(model_features)` plutôt que le constructeur.
+    """
+    model_features: Tuple[str, ...]
+    passthrough: Tuple[Tuple[int, str], ...]
+    binary: Tuple[Tuple[int, str, str], ...]
+    ordinal: Tuple[Tuple[int, str, Mapping[str, float]], ...]
+    one_hot: Tuple[Tuple[str, Mapping[str, int]], ...]
+    derived: Tuple[Tuple[int, DerivedFeature], ...]
+
+    @property
+    def n_features(self) -> int:
+        return len(self.model_features)
+
+    @property
+    def input_columns(self) -> Tuple[str, ...]:
+        """Colonnes brutes (champs `EmployeeData`) lues par le plan, sans doublon."""
+        names = [name for _, name in self.passthrough]
+        names += [name for _, name, _ in self.binary]
+        names += [name for _, name, _ in self.ordinal]
+        names += [name for name, _ in self.one_hot]
+        names += [name for _, feature in self.derived for name in feature.inputs]
+        return tuple(dict.fromkeys(names))
+
+    @classmethod
+    def compile(
+        cls,
+        model_features: Sequence[str],
+        mapping_poste: Mapping[str, int] = MAPPING_POSTE,
+        mapping_freq: Mapping[str, int] = MAPPING_FREQ,
+        moyennes_poste: Mapping[str, float] = MOYENNES_POSTE,
+    ) -> "FeaturePlan":
+        """
+        Compile le plan pour `model_features` (ordre = ordre des colonnes de sortie).
+
+        Lève
+        ----
+        FeaturePlanError
+            - colonne du contrat dupliquée ou impossible à produire,
+            - valeur autorisée par le schéma sans code ordinal (elle deviendrait NaN).
+        """
+        model_features = tuple(model_features)
+        duplicates = sorted({f for f in model_features if model_features.count(f) > 1})
+        if duplicates:
+            raise FeaturePlanError(f"Colonnes dupliquées dans le contrat du modèle : {duplicates}")
+
+        schema_fields = EmployeeData.model_fields
+        allowed = {name: _allowed_values(info.annotation) for name, info in schema_fields.items()}
+        ordinal_mappings = {"poste": mapping_poste, "frequence_deplacement": mapping_freq}
+        derived_catalog = derived_features(moyennes_poste)
+
+        # Colonnes one-hot atteignables : nom nettoyé -> (colonne brute, valeur)
+        dummies = {
+            dummy_name(column, value): (column, value)
+            for column in ONE_HOT_COLUMNS
+            for value in allowed[column] or ()
+        }
+
+        passthrough, binary, ordinal, derived = [], [], [], []
+        one_hot: Dict[str, Dict[str, int]] = {}
+        unresolved = []
+
+        for slot, name in enumerate(model_features):
+            if name in BINARY_POSITIVE:
+                binary.append((slot, name, BINARY_POSITIVE[name]))
+            elif name in ordinal_mappings:
+                mapping = ordinal_mappings[name]
+                unmapped = [v for v in allowed[name] or () if v not in mapping]
+                if unmapped:
+                    raise FeaturePlanError(
+                        f"Valeurs autorisées sans code ordinal pour '{name}' : {unmapped}"
+                    )
+                ordinal.append((slot, name, {k: float(v) for k, v in mapping.items()}))
+            elif name in derived_catalog:
+                derived.append((slot, derived_catalog[name]))
+            elif name in dummies:
+                column, value = dummies[name]
+                one_hot.setdefault(column, {})[value] = slot
+            elif name in schema_fields and allowed[name] is None:
+                passthrough.append((slot, name))
+            else:
+                unresolved.append(name)
+
+        if unresolved:
+            raise FeaturePlanError(
+                f"Colonnes du contrat du modèle impossibles à produire : {unresolved}"
+            )
+
+        return cls(
+            model_features=model_features,
+            passthrough=tuple(passthrough),
+            binary=tuple(binary),
+            ordinal=tuple(ordinal),
+            one_hot=tuple(one_hot.items()),
+            derived=tuple(derived),
+        )
+
+    def encode(self, employee) -> np.ndarray:
+        """
+        Encode un `EmployeeData` (ou tout objet exposant les mêmes attributs) en une
+        ligne float64 de forme (1, n_features), dans l'ordre de `model_features`.
+        """
+        row = np.zeros((1, self.n_features), dtype=np.float64)
+        out = row[0]
+
+        for slot, name in self.passthrough:
+            out[slot] = getattr(employee, name)
+        for slot, name, positive in self.binary:
+            out[slot] = 1.0 if getattr(employee, name) == positive else 0.0
+        for slot, name, codes in self.ordinal:
+            out[slot] = codes.get(getattr(employee, name), np.nan)
+        for column, slots in self.one_hot:
+            slot = slots.get(getattr(employee, column))
+            if slot is not None:
+                out[slot] = 1.0
+        for slot, feature in self.derived:
+            args = []
+            for name in feature.inputs:
+                value = getattr(employee, name)
+                table = feature.lookups.get(name)
+                args.append(table.get(value, np.nan) if table is not None else value)
+            out[slot] = feature.compute(*args)
+
+        return row
@@ -0,0 +1,60 @@
+"""
+Inférence : un seul passage dans le modèle par lot de lignes.
+
+Pourquoi ?
+----------
+Appeler `model.predict(X)` puis `model.predict_proba(X)` parcourt deux fois tout
+l'ensemble d'arbres. On n'appelle plus que `predict_proba` et la classe est déduite
+de la probabilité de départ :
+
+    prediction = 1 si churn_probability > DECISION_THRESHOLD, sinon 0
+
+Avec le seuil par défaut (0.5), c'est exactement la règle de `model.predict` pour un
+classifieur binaire XGBoost/sklearn (classe de plus forte probabilité, égalité -> 0).
+Le seuil se règle via `DECISION_THRESHOLD` (cf. `settings.py`) sans ré-entraînement.
+"""
+
+import hashlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+from . import settings
+
+
+def churn_probabilities(model, X: np.ndarray) -> np.ndarray:
+    """Probabilité de la classe 1 (départ) pour chaque ligne de `X` — un appel modèle."""
+    return np.asarray(model.predict_proba(X))[:, 1]
+
+
+def decide(probabilities, threshold: Optional[float] = None) -> np.ndarray:
+    """
+    Classe prédite (0/1, int64) à partir des probabilités de départ.
+
+    Sans `threshold`, applique `settings.DECISION_THRESHOLD`, déjà validé au chargement
+    des réglages (aucun contrôle par requête).
+
+    Lève
+    ----
+    ValueError
+        Si le seuil passé en argument n'est pas dans [0, 1].
+    """
+    if threshold is None:
+        threshold = settings.DECISION_THRESHOLD
+    elif not 0.0 <= threshold <= 1.0:
+        raise ValueError(f"Seuil de décision invalide : {threshold} (attendu dans [0, 1])")
+    return (np.asarray(probabilities) > threshold).astype(np.int64)
+
+
+def predict(model, X: np.ndarray, threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(predictions, churn_probabilities) pour chaque ligne de `X`, en un seul appel modèle."""
+    probabilities = churn_probabilities(model, X)
+    return decide(probabilities, threshold), probabilities
+
+
+def artifact_version(*contents: bytes) -> str:
+    """Version d'artefacts = SHA-256 (12 premiers caractères hex) de leurs contenus concaténés."""
+    digest = hashlib.sha256()
+    for content in contents:
+        digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()[:12]
@@ -4,22 +4,53 @@ Point d’entrée FastAPI de l’API Futurisys Churn (sans rate limiting).
 Ce module :
 - crée l’application FastAPI (titre, description, version),
 - configure la CORS,
-- branche les routeurs `auth` et `prediction`,
-- expose des endpoints de santé ("/" et "/health").
+- branche les routeurs `auth`, `prediction` et `admin`,
+- charge et chauffe le modèle au démarrage (lifespan, cf. `readiness.py`),
+- expose des endpoints de santé ("/", "/health" = liveness, "/ready" = readiness)
+  et les métriques ("/metrics").
 
 ⚠️ En production, remplace `allow_origins=["*"]` par la liste des domaines front autorisés.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from . import metrics, readiness
+from .audit_writer import shutdown_audit_writer
+from .executor import shutdown_inference_executor
+from .passwords import shutdown_password_hasher
+from .endpoints import prediction, auth, admin  # Routes métier
+from ..database import connection as db_conn
+
+# État des pools de connexions sur /metrics (lu à chaque export : suit les rechargements)
+metrics.register_collector("db_pool", db_conn.pool_metrics)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Démarrage : chargement + warmup du modèle.
+    Arrêt : fin des pools d'inférence et de hachage, vidage de la file d'écriture différée,
+    puis fermeture des connexions de l'engine asynchrone (`DATABASE_ASYNC`).
+    """
+    readiness.startup()
+    yield
+    shutdown_inference_executor()
+    shutdown_password_hasher()
+    shutdown_audit_writer()
+    if db_conn.async_engine is not None:
+        await db_conn.async_engine.dispose()
 
-from .endpoints import prediction, auth  # Routes métier
 
 # -- Métadonnées de l’API (affichées dans /docs)
 app = FastAPI(
     title="Futurisys Turnover Prediction API",
     description="API pour prédire la probabilité de démission d'un employé.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # -- CORS (qui peut appeler l’API ?)
@@ -35,6 +66,7 @@ app.add_middleware(
 # -- Routeurs
 app.include_router(auth.router)        # /auth/...
 app.include_router(prediction.router)  # /predict
+app.include_router(admin.router)       # /admin/model...
 
 # -- Endpoints de santé
 @app.get("/", tags=["Health"])
@@ -44,5 +76,20 @@ def read_root() -> dict[str, str]:
 
 @app.get("/health", tags=["Health"])
 def health() -> dict[str, str]:
-    """Endpoint de santé pour monitoring."""
+    """Liveness : le processus répond (aucune vérification coûteuse)."""
     return {"status": "ok"}
+
+@app.get("/ready", tags=["Health"])
+def ready() -> JSONResponse:
+    """Readiness : 200 si modèle chargé + chauffé (+ BDD joignable si activée), sinon 503."""
+    is_ready, checks = readiness.readiness()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "not_ready", "checks": checks},
+    )
+
+
+@app.get("/metrics", tags=["Health"])
+def get_metrics() -> dict:
+    """Métriques applicatives du processus (compteurs, résumés, état des composants)."""
+    return metrics.snapshot()
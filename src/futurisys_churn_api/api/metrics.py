@@ -0,0 +1,76 @@
+"""
+Métriques applicatives en mémoire (par processus), exposées en JSON sur `GET /metrics`.
+
+Trois types de mesures :
+- compteurs (`inc`)      : nombre d'événements (ex: lots traités) ;
+- résumés (`observe`)    : count / sum / min / max / avg d'une valeur (ex: taille de lot) ;
+- collecteurs (`register_collector`) : fonctions appelées au moment de l'export, pour
+  publier l'état courant d'un composant (configuration, profondeur de file...).
+
+Notes
+-----
+- Pas de dépendance externe (pas de client Prometheus) : un simple dictionnaire JSON.
+- Thread-safe : les endpoints sync tournent dans le threadpool de FastAPI.
+"""
+
+import threading
+from typing import Any, Callable, Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_summaries: Dict[str, Dict[str, float]] = {}
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def inc(name: str, amount: float = 1.0) -> None:
+    """Incrémente le compteur `name`."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name: str, value: float) -> None:
+    """Ajoute une observation au résumé `name` (count, sum, min, max)."""
+    with _lock:
+        s = _summaries.get(name)
+        if s is None:
+            _summaries[name] = {"count": 1, "sum": value, "min": value, "max": value}
+        else:
+            s["count"] += 1
+            s["sum"] += value
+            s["min"] = min(s["min"], value)
+            s["max"] = max(s["max"], value)
+
+
+def register_collector(name: str, fn: Callable[[], Dict[str, Any]]) -> None:
+    """Enregistre (ou remplace) un collecteur appelé à chaque export."""
+    with _lock:
+        _collectors[name] = fn
+
+
+def unregister_collector(name: str) -> None:
+    """Retire un collecteur (sans erreur s'il n'existe pas)."""
+    with _lock:
+        _collectors.pop(name, None)
+
+
+def snapshot() -> Dict[str, Any]:
+    """État courant de toutes les métriques (structure JSON-sérialisable)."""
+    with _lock:
+        counters = dict(_counters)
+        summaries = {
+            name: {**s, "avg": s["sum"] / s["count"] if s["count"] else 0.0}
+            for name, s in _summaries.items()
+        }
+        collectors = dict(_collectors)
+    return {
+        "counters": counters,
+        "summaries": summaries,
+        "components": {name: fn() for name, fn in collectors.items()},
+    }
+
+
+def reset() -> None:
+    """Remet compteurs et résumés à zéro (les collecteurs sont conservés)."""
+    with _lock:
+        _counters.clear()
+        _summaries.clear()
@@ -0,0 +1,259 @@
+"""
+Micro-batching des requêtes /predict concurrentes (opt-in : `MICRO_BATCH_ENABLED=true`).
+
+Principe
+--------
+Chaque requête dépose sa ligne encodée dans une file et attend un `Future`.
+Un thread "dispatcher" vide la file dès que :
+- `max_batch_size` lignes attendent, ou
+- `max_wait_ms` millisecondes se sont écoulées depuis la première ligne du lot.
+Il empile alors les lignes en une matrice, appelle **une fois** la fonction de scoring
+(ex: `model.predict_proba`, vectorisée) et résout le `Future` de chaque appelant.
+
+Compromis latence / débit
+-------------------------
+- `max_wait_ms` borne la latence ajoutée à une requête isolée.
+- `max_batch_size` borne la taille des appels modèle sous forte charge.
+- `max_queue` borne la file : au-delà, `submit` lève `ExecutorSaturated` (même contrat
+  que l'exécuteur d'inférence, l'API répond 503 + `Retry-After`) au lieu d'accumuler
+  des lignes en mémoire et de laisser la latence croître sans limite.
+Les réglages, les rejets et les tailles de lots observées sont publiés dans `/metrics`
+(composant `micro_batching`).
+
+Versions de modèle
+------------------
+`VersionedMicroBatchers` tient un `MicroBatcher` par version de modèle : un lot ne
+mélange jamais deux versions, et un swap ne ferme pas le batcher de l'ancienne version
+tant que des requêtes l'utilisent encore (fermé une fois vidé).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import metrics
+from .executor import ExecutorSaturated
+
+
+class MicroBatcher:
+    """
+    Regroupe des lignes soumises par plusieurs threads en appels de scoring vectorisés.
+
+    `score_fn(X)` reçoit une matrice (n, n_features) et renvoie une séquence de n
+    résultats ; le i-ème résultat est transmis au i-ème appelant.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[np.ndarray], Sequence[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        name: str = "micro_batching",
+        register_metrics: bool = True,
+        max_queue: int = 256,
+    ):
+        if max_batch_size < 1 or max_queue < 1:
+            raise ValueError("max_batch_size et max_queue doivent être >= 1")
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self.name = name
+        self._queue: "queue.Queue[Optional[Tuple[np.ndarray, Future, float]]]" = queue.Queue(maxsize=max_queue)
+        self._rejected = 0
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._registered = register_metrics
+        if register_metrics:
+            metrics.register_collector(name, self.stats)
+
+    # --------------------------
+    # API appelant
+    # --------------------------
+    def submit(self, row: np.ndarray) -> Future:
+        """
+        Dépose une ligne (forme (n_features,) ou (1, n_features)) ; renvoie son Future.
+
+        Lève
+        ----
+        ExecutorSaturated
+            Si `max_queue` lignes attendent déjà leur micro-lot.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((np.asarray(row).reshape(-1), future, time.perf_counter()))
+        except queue.Full:
+            with self._start_lock:
+                self._rejected += 1
+            metrics.inc(f"{self.name}.rejected")
+            raise ExecutorSaturated("File du micro-batching pleine")
+        return future
+
+    def score(self, row: np.ndarray, timeout: Optional[float] = None) -> Any:
+        """Version bloquante de `submit` : attend et renvoie le résultat de la ligne."""
+        return self.submit(row).result(timeout=timeout)
+
+    def close(self) -> None:
+        """Arrête le dispatcher après avoir traité les lignes déjà en file."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._registered:
+            metrics.unregister_collector(self.name)
+
+    def stats(self) -> dict:
+        """Configuration + profondeur de file courante (pour /metrics)."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize(),
+            "rejected": self._rejected,
+        }
+
+    # --------------------------
+    # Dispatcher
+    # --------------------------
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name=f"{self.name}-dispatcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """Complète le lot jusqu'à max_batch_size ou l'échéance ; indique si stop demandé."""
+        batch = [first]
+        deadline = first[2] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[np.ndarray, Future, float]]) -> None:
+        started = time.perf_counter()
+        futures = [future for _, future, _ in batch]
+        try:
+            results = self.score_fn(np.vstack([row for row, _, _ in batch]))
+        except Exception as e:  # l'erreur est propagée à chaque appelant
+            for future in futures:
+                future.set_exception(e)
+            metrics.inc(f"{self.name}.errors")
+            return
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+        metrics.inc(f"{self.name}.batches")
+        metrics.observe(f"{self.name}.batch_size", len(batch))
+        metrics.observe(f"{self.name}.queue_wait_ms", (started - batch[0][2]) * 1000.0)
+        metrics.observe(f"{self.name}.score_ms", (time.perf_counter() - started) * 1000.0)
+
+
+class VersionedMicroBatchers:
+    """
+    Un `MicroBatcher` par version de modèle, prêté aux requêtes par `lease`.
+
+    Une requête garde la version prise au début (`registry.current()`) : pendant un swap,
+    les requêtes en vol sur l'ancienne version continuent avec son batcher, sans toucher
+    à celui de la nouvelle. Un batcher dont la version n'est plus courante (`is_current`)
+    est fermé quand plus aucune requête ne le tient : aucune soumission à un batcher fermé.
+
+    Paramètres
+    ----------
+    is_current : callable
+        `is_current(version)` : version servie actuellement par le registre ?
+    max_batch_size, max_wait_ms, max_queue : cf. `MicroBatcher` (file bornée par version).
+    name : str
+        Composant `/metrics` (configuration, file cumulée, versions actives) et préfixe
+        des compteurs/résumés partagés par les batchers.
+    """
+
+    def __init__(
+        self,
+        is_current: Callable[[str], bool],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        name: str = "micro_batching",
+        max_queue: int = 256,
+    ):
+        self.is_current = is_current
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self.name = name
+        self._lock = threading.Lock()
+        self._batchers: Dict[str, List] = {}  # version -> [MicroBatcher, requêtes en cours]
+        metrics.register_collector(name, self.stats)
+
+    @contextmanager
+    def lease(self, version: str, score_fn: Callable[[Any], Sequence[Any]]) -> Iterator[MicroBatcher]:
+        """Batcher de `version` (créé au besoin autour de `score_fn`), réservé le temps du bloc."""
+        with self._lock:
+            entry = self._batchers.get(version)
+            if entry is None:
+                batcher = MicroBatcher(
+                    score_fn, self.max_batch_size, self.max_wait_ms, name=self.name,
+                    register_metrics=False, max_queue=self.max_queue,
+                )
+                entry = self._batchers[version] = [batcher, 0]
+            entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                drained = self._pop_drained()
+            for batcher in drained:
+                batcher.close()  # termine sa file (vide : plus aucune requête ne le tient)
+
+    def _pop_drained(self) -> List[MicroBatcher]:
+        # Sous verrou : batchers d'anciennes versions que plus aucune requête n'utilise
+        retired = [v for v, (_, users) in self._batchers.items() if users == 0 and not self.is_current(v)]
+        return [self._batchers.pop(v)[0] for v in retired]
+
+    def close(self) -> None:
+        """Ferme tous les batchers (arrêt de l'application)."""
+        with self._lock:
+            batchers = [batcher for batcher, _ in self._batchers.values()]
+            self._batchers.clear()
+        for batcher in batchers:
+            batcher.close()
+        metrics.unregister_collector(self.name)
+
+    def stats(self) -> dict:
+        """Configuration, file cumulée et versions actives (pour /metrics)."""
+        with self._lock:
+            entries = list(self._batchers.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_queue": self.max_queue,
+            "queue_depth": sum(batcher._queue.qsize() for _, (batcher, _) in entries),
+            "rejected": sum(batcher._rejected for _, (batcher, _) in entries),
+            "versions": {version: users for version, (_, users) in entries},
+        }
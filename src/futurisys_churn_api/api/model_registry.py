@@ -0,0 +1,267 @@
+"""
+Registre du modèle servi : chargement paresseux, version, rechargement à chaud, rollback.
+
+Pourquoi ?
+----------
+Charger `churn_model.joblib` à l'import imposait un redémarrage pour changer de modèle
+(et un premier appel "à froid"). Le `ModelRegistry` :
+- charge modèle + contrat de features **à la première demande** (`current()`) ;
+- calcule une version = hash du contenu des fichiers ;
+- recharge sur changement des fichiers (vérification au plus toutes les
+  `check_interval` secondes, chargement dans un thread de fond) ou sur appel explicite
+  (`reload()`, exposé par `POST /admin/model/reload`) ;
+- garde la version précédente en mémoire pour un retour arrière instantané (`rollback()`) ;
+- appelle `on_load(loaded)` (ex: warmup, cf. `api/readiness.py`) **avant** de servir une
+  nouvelle version : une erreur à cette étape annule le chargement.
+
+Atomicité
+---------
+Un `LoadedModel` est immuable (modèle, features, `FeaturePlan`, version). Une requête
+récupère **une** référence via `current()` au début et l'utilise jusqu'au bout : un swap
+concurrent ne touche pas les requêtes en vol, qui terminent avec l'ancienne version.
+
+Deux backends (`MODEL_BACKEND`) :
+- "joblib" (défaut) : le pipeline d'entraînement (xgboost / sklearn / imblearn) ;
+- "numpy" : l'export à plat `TreeEnsemble` (`api/tree_model.py`, `.npy` + `.json`), sans
+  importer la pile d'entraînement.
+Dans les deux cas, le modèle est construit à partir des octets mêmes qui ont servi au
+calcul de la version (jamais relus sur disque) : un export concurrent ne peut pas
+associer une version à un autre contenu.
+
+Utilisé par l'API (`endpoints/prediction.py`, `endpoints/admin.py`) et par les scripts
+batch (`database/batch_predict.py`) via l'instance partagée `registry`.
+"""
+
+import io
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+import joblib
+
+from . import inference, metrics, settings, tree_model
+from .feature_plan import FeaturePlan
+
+
+class ModelRegistryError(RuntimeError):
+    """Artefacts illisibles / invalides, ou rollback impossible."""
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """Version chargée du modèle et tout ce qui en dépend (immuable)."""
+    model: Any
+    model_features: Tuple[str, ...]
+    feature_plan: FeaturePlan
+    version: str
+    loaded_at: str
+    backend: str = "joblib"
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "backend": self.backend,
+            "loaded_at": self.loaded_at,
+            "n_features": len(self.model_features),
+        }
+
+
+class ModelRegistry:
+    """
+    Détient la version courante du modèle (et la précédente, pour rollback).
+
+    Paramètres
+    ----------
+    model_path, features_path : str
+        Artefacts à charger (modèle + liste JSON ordonnée des colonnes).
+    backend : str
+        "joblib" (`model_path` = pipeline joblib) ou "numpy" (`model_path` = `.npy` exporté).
+    check_interval : float
+        Délai minimal (s) entre deux vérifications des fichiers ; <= 0 désactive
+        le rechargement automatique.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        features_path: str,
+        backend: str = "joblib",
+        check_interval: float = 0.0,
+        on_load: Optional[Callable[[LoadedModel], None]] = None,
+        name: str = "model_registry",
+    ):
+        self.model_path = model_path
+        self.features_path = features_path
+        if backend not in ("joblib", "numpy"):
+            raise ModelRegistryError(f"MODEL_BACKEND inconnu : {backend!r} (attendu 'joblib' ou 'numpy')")
+        self.backend = backend
+        self.check_interval = check_interval
+        self.on_load = on_load
+        self._lock = threading.Lock()
+        self._current: Optional[LoadedModel] = None
+        self._previous: Optional[LoadedModel] = None
+        self._seen_signature = None
+        self._last_check = time.monotonic()
+        self._last_error: Optional[str] = None
+        metrics.register_collector(name, self.info)
+
+    # --------------------------
+    # Chargement
+    # --------------------------
+    def _artifact_paths(self) -> Tuple[str, ...]:
+        """Fichiers dont le contenu définit la version (modèle d'abord, features en dernier)."""
+        if self.backend == "numpy":
+            return (self.model_path, str(tree_model.metadata_path(self.model_path)), self.features_path)
+        return (self.model_path, self.features_path)
+
+    def _signature(self):
+        """(mtime, taille) des artefacts : détecte un changement sans les relire."""
+        try:
+            return tuple((s.st_mtime_ns, s.st_size) for s in map(os.stat, self._artifact_paths()))
+        except OSError:
+            return None
+
+    def _load_model(self, contents: Sequence[bytes], model_features: Sequence[str]):
+        # Toujours depuis les octets hachés pour la version : un export concurrent ne peut
+        # pas publier la version X avec le contenu Y
+        if self.backend == "joblib":
+            return joblib.load(io.BytesIO(contents[0]))
+        ensemble = tree_model.TreeEnsemble.from_bytes(contents[0], contents[1])
+        names = ensemble.feature_names
+        if ensemble.n_features != len(model_features) or (names and list(names) != list(model_features)):
+            raise ModelRegistryError(
+                f"L'export '{self.model_path}' ne correspond pas au contrat '{self.features_path}'."
+            )
+        return ensemble
+
+    def _load(self) -> LoadedModel:
+        """
+        Lit et valide les artefacts (hors verrou de swap).
+
+        Lève
+        ----
+        FileNotFoundError
+            Si un artefact est absent.
+        ModelRegistryError
+            Si la liste de features n'est pas une liste non vide, ou ne correspond pas
+            aux colonnes de l'export NumPy.
+        FeaturePlanError
+            Si le contrat de features ne peut pas être produit.
+        """
+        contents = []
+        for path in self._artifact_paths():
+            with open(path, "rb") as f:
+                contents.append(f.read())
+
+        model_features = json.loads(contents[-1].decode("utf-8"))
+        if not isinstance(model_features, list) or not model_features:
+            raise ModelRegistryError(f"'{self.features_path}' n'est pas une liste valide de colonnes.")
+
+        loaded = LoadedModel(
+            model=self._load_model(contents, model_features),
+            model_features=tuple(model_features),
+            feature_plan=FeaturePlan.compile(model_features),
+            version=inference.artifact_version(*contents),
+            backend=self.backend,
+            loaded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        if self.on_load is not None:
+            self.on_load(loaded)
+        return loaded
+
+    @property
+    def loaded(self) -> Optional[LoadedModel]:
+        """Version courante si déjà chargée (ne déclenche aucun chargement)."""
+        return self._current
+
+    def current(self) -> LoadedModel:
+        """
+        Version à utiliser pour **toute** la requête en cours (chargée au besoin).
+
+        Déclenche en arrière-plan un rechargement si les fichiers ont changé.
+        """
+        loaded = self._current
+        if loaded is None:
+            with self._lock:
+                if self._current is None:
+                    self._seen_signature = self._signature()
+                    self._current = self._load()
+                return self._current
+
+        if self.check_interval > 0 and time.monotonic() - self._last_check >= self.check_interval:
+            self._last_check = time.monotonic()
+            if self._signature() != self._seen_signature and not self._lock.locked():
+                threading.Thread(target=self._reload_quietly, name="model-reload", daemon=True).start()
+        return loaded
+
+    def reload(self) -> Tuple[LoadedModel, bool]:
+        """
+        Recharge les artefacts et bascule dessus si la version a changé.
+
+        Retour
+        ------
+        (LoadedModel courant, True si un swap a eu lieu)
+        """
+        with self._lock:
+            self._seen_signature = self._signature()
+            try:
+                new = self._load()
+            except Exception as e:
+                self._last_error = f"{type(e).__name__}: {e}"
+                metrics.inc("model_registry.reload_errors")
+                raise
+            self._last_error = None
+            if self._current is not None and new.version == self._current.version:
+                return self._current, False
+            self._previous, self._current = self._current, new
+            metrics.inc("model_registry.reloads")
+            return new, True
+
+    def _reload_quietly(self) -> None:
+        # Rechargement automatique : une erreur garde la version courante (cf. last_error)
+        try:
+            self.reload()
+        except Exception:
+            pass
+
+    def rollback(self) -> LoadedModel:
+        """
+        Rebascule sur la version précédente (gardée en mémoire) ; l'actuelle devient la précédente.
+
+        Lève
+        ----
+        ModelRegistryError
+            S'il n'y a pas de version précédente.
+        """
+        with self._lock:
+            if self._previous is None:
+                raise ModelRegistryError("Aucune version précédente à restaurer.")
+            self._previous, self._current = self._current, self._previous
+            metrics.inc("model_registry.rollbacks")
+            return self._current
+
+    def info(self) -> dict:
+        """Versions courante / précédente, réglages et dernière erreur (pour /metrics et /admin)."""
+        current, previous = self._current, self._previous
+        return {
+            "backend": self.backend,
+            "model_path": self.model_path,
+            "features_path": self.features_path,
+            "check_interval": self.check_interval,
+            "current": current.describe() if current else None,
+            "previous": previous.describe() if previous else None,
+            "last_error": self._last_error,
+        }
+
+
+# Instance partagée par l'API et les scripts batch
+registry = ModelRegistry(
+    settings.TREE_MODEL_PATH if settings.MODEL_BACKEND == "numpy" else settings.MODEL_PATH,
+    settings.MODEL_FEATURES_PATH,
+    backend=settings.MODEL_BACKEND,
+    check_interval=settings.MODEL_RELOAD_CHECK_SECONDS,
+)
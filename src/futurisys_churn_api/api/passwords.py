@@ -0,0 +1,154 @@
+"""
+Hachage / vérification bcrypt hors des threads qui servent les requêtes.
+
+Pourquoi ?
+----------
+bcrypt est lent **par construction** (~0,2 s par opération au coût 12). Appelé en ligne
+dans `/auth/token` ou `/auth/register`, une rafale de connexions occupe le threadpool
+partagé avec le reste de l'API et dégrade la latence de `/predict`.
+
+Ici, `hash` / `verify` sont confiés à un pool de **processus** dédié
+(`PASSWORD_HASH_WORKERS`), précédé d'une file bornée (`PASSWORD_HASH_QUEUE_SIZE`) :
+- le calcul ne prend ni le GIL ni les cœurs du processus de l'API au-delà de ce pool ;
+- au-delà de `workers + queue` opérations en cours, `submit` lève `ExecutorSaturated`
+  (même contrat que l'exécuteur d'inférence) et l'API répond 503 + `Retry-After`.
+
+`PASSWORD_HASH_WORKERS=0` exécute bcrypt dans un thread dédié du processus de l'API (sans
+pool de processus), avec la même limite de concurrence : la boucle d'événements n'est
+jamais bloquée, mais le calcul partage le GIL avec le reste de l'API.
+
+Les fonctions exécutées dans les processus (`hash_password`, `check_password`) sont
+définies au niveau module et ce module n'importe que passlib (+ réglages / métriques)
+pour que le démarrage des processus (contexte "spawn") reste léger.
+
+Observabilité (`/metrics`, composant `password_hasher`) : taille du pool, file max,
+opérations en cours, rejets ; résumé `password_hasher.wait_ms` (soumission -> résultat).
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from passlib.context import CryptContext
+
+from . import metrics, settings
+from .executor import ExecutorSaturated
+
+# Contexte de hachage (bcrypt)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(pw: str) -> str:
+    """Hachage `bcrypt` de `pw` (appel bloquant, CPU)."""
+    return pwd_context.hash(pw)
+
+
+def check_password(plain: str, hashed: str) -> bool:
+    """Vérifie `plain` contre le hachage `hashed` (appel bloquant, CPU)."""
+    return pwd_context.verify(plain, hashed)
+
+
+class PasswordHasher:
+    """Pool de processus bcrypt dont le nombre d'opérations en cours est borné."""
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "password_hasher"):
+        if max_workers < 0 or max_queue < 0:
+            raise ValueError("max_workers et max_queue doivent être >= 0")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._pool: Executor
+        if max_workers:
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            # Sans processus dédiés : un thread, jamais celui de la boucle d'événements
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        metrics.register_collector(name, self.stats)
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """
+        Soumet `fn(*args)` au pool ; renvoie un `concurrent.futures.Future`.
+
+        Lève
+        ----
+        ExecutorSaturated
+            Si `max_workers + max_queue` opérations sont déjà en cours ou en attente.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            metrics.inc(f"{self.name}.rejected")
+            raise ExecutorSaturated("File de hachage des mots de passe pleine")
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+
+        def done(_future: Future) -> None:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+            metrics.observe(f"{self.name}.wait_ms", (time.perf_counter() - submitted) * 1000.0)
+
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(done)
+        return future
+
+    async def hash(self, pw: str) -> str:
+        """Hachage bcrypt de `pw` sans bloquer la boucle d'événements."""
+        return await asyncio.wrap_future(self.submit(hash_password, pw))
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        """Vérification bcrypt sans bloquer la boucle d'événements."""
+        return await asyncio.wrap_future(self.submit(check_password, plain, hashed))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        metrics.unregister_collector(self.name)
+
+    def stats(self) -> dict:
+        """Configuration et état courant (pour /metrics)."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Pool partagé du processus (créé à la première utilisation, réglages `settings`)."""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            _hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+        return _hasher
+
+
+def shutdown_password_hasher() -> None:
+    """Arrête le pool partagé (arrêt de l'application)."""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+            _hasher = None
@@ -0,0 +1,150 @@
+"""
+Cache de prédictions en mémoire (par processus) : LRU + TTL.
+
+Clé
+---
+`payload_key(employee)` = SHA-256 du `EmployeeData` **validé**, sérialisé de façon
+canonique (clés triées, séparateurs fixes). Deux requêtes décrivant le même profil
+(même si l'ordre des champs JSON diffère) partagent donc la même entrée.
+
+Valeur
+------
+La probabilité de départ uniquement : la classe est recalculée avec le seuil courant
+(`inference.decide`), un changement de `DECISION_THRESHOLD` n'invalide donc rien.
+
+Invalidation
+------------
+- Chaque lecture/écriture précise la version du modèle (hash du fichier joblib), qui fait
+  partie de la clé : une version ne lit jamais les entrées d'une autre. Un swap ne vide
+  rien (les requêtes en vol sur l'ancienne version et celles sur la nouvelle ne s'évincent
+  pas mutuellement) ; les entrées de l'ancienne version sortent par LRU/TTL.
+- Une entrée plus vieille que `ttl_seconds` est ignorée et retirée.
+- Au-delà de `max_size` entrées, la moins récemment utilisée est évincée.
+
+Compteurs (hits / misses / evictions / expirations / invalidations = `clear()`) publiés dans
+`/metrics` (composant `prediction_cache`).
+
+Backends
+--------
+`build_prediction_cache()` choisit selon `PREDICTION_CACHE_BACKEND` :
+- "memory" (défaut) : `PredictionCache`, propre à chaque processus ;
+- "shared" : `SharedPredictionCache` (`api/shared_cache.py`), table mmap commune à
+  tous les workers uvicorn de la machine.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from pydantic import BaseModel
+
+from . import metrics, settings
+from .shared_cache import SharedPredictionCache
+
+
+def payload_key(payload: BaseModel) -> str:
+    """Hash stable (hex SHA-256) d'un payload Pydantic validé."""
+    canonical = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """Cache LRU borné avec expiration, thread-safe, indexé par (version du modèle, clé)."""
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        name: str = "prediction_cache",
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+        self._version: Optional[str] = None  # dernière version vue (pour /metrics)
+        self._counts = dict.fromkeys(("hits", "misses", "evictions", "expirations", "invalidations"), 0)
+        metrics.register_collector(name, self.stats)
+
+    def get(self, key: str, version: str) -> Optional[float]:
+        """Probabilité en cache pour `key` et `version`, ou None (absente ou expirée)."""
+        key = (version, key)
+        with self._lock:
+            self._version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            value, stored_at = entry
+            if self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._counts["expirations"] += 1
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return value
+
+    def put(self, key: str, version: str, value: float) -> None:
+        """Mémorise `value` pour `key` (évince l'entrée la moins récente si plein)."""
+        if self.max_size <= 0:
+            return
+        key = (version, key)
+        with self._lock:
+            self._version = version
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def clear(self) -> None:
+        """Vide le cache (les compteurs sont conservés)."""
+        with self._lock:
+            self._entries.clear()
+            self._counts["invalidations"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Configuration, taille et compteurs (pour /metrics)."""
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "backend": "memory",
+                "size": len(self._entries),
+                "model_version": self._version,
+                **self._counts,
+                "hit_ratio": self._counts["hits"] / lookups if lookups else 0.0,
+            }
+
+
+def build_prediction_cache():
+    """
+    Cache de prédictions configuré par `settings` (backend, taille, TTL).
+
+    Lève
+    ----
+    ValueError
+        Si `PREDICTION_CACHE_BACKEND` n'est ni "memory" ni "shared".
+    """
+    backend = settings.PREDICTION_CACHE_BACKEND
+    if backend == "memory":
+        return PredictionCache(
+            max_size=settings.PREDICTION_CACHE_MAX_SIZE,
+            ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+        )
+    if backend == "shared":
+        return SharedPredictionCache(
+            settings.PREDICTION_CACHE_SHARED_PATH,
+            max_size=settings.PREDICTION_CACHE_MAX_SIZE,
+            ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+        )
+    raise ValueError(f"PREDICTION_CACHE_BACKEND inconnu : {backend!r} (attendu 'memory' ou 'shared')")
@@ -5,19 +5,31 @@ Ce module regroupe les fonctions utilisées par l’endpoint /predict pour :
 - nettoyer les noms de colonnes,
 - convertir des binaires textuels en entiers (0/1),
 - créer des variables dérivées (feature engineering),
-- encoder les variables catégorielles (one-hot + encodage ordinal).
+- encoder les variables catégorielles (one-hot + encodage ordinal),
+- encoder un lot complet de lignes en une seule matrice NumPy (`encode_batch`),
+  sans copies intermédiaires de DataFrame (traitement par lot / batch_predict).
 
 ⚠️ Important : ce module ne change pas le contrat avec le modèle.
 Les fonctions et leurs effets restent identiques à la version validée par les tests.
+Le pipeline pandas (`preprocess_dataframe`) est l'implémentation de référence :
+le chemin rapide de /predict (`feature_plan.FeaturePlan`) doit produire exactement
+les mêmes valeurs (test de parité sur le dataset).
 """
 
 import re
+from typing import Any, List, Mapping, Union
+
+import numpy as np
 import pandas as pd
 from .constants import (
     MOYENNES_POSTE,   # moyenne des salaires par poste (pour ratio_revenu_poste)
     MAPPING_POSTE,    # encodage ordinal du poste
     MAPPING_FREQ,     # encodage ordinal de la fréquence de déplacement
+    SEUIL_REVENU_BAS,          # revenu_satisfaction : seuil de revenu (1er quartile)
+    SEUIL_SATISFACTION_BASSE,  # revenu_satisfaction : seuil de satisfaction moyenne
+    COLONNES_SATISFACTION,     # revenu_satisfaction : colonnes de satisfaction
 )
+from .feature_plan import FeaturePlan
 
 def clean_col_names(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -85,6 +97,9 @@ def add_features(df: pd.DataFrame)-> pd.DataFrame:
     ----------------
     - ratio_revenu_poste : revenu_mensuel / (moyenne du poste + 1)
     - ratio_augmentation_promotion : augementation_salaire_precedente / (annees_depuis_la_derniere_promotion + 1)
+    - revenu_satisfaction : 1 si revenu_mensuel <= SEUIL_REVENU_BAS et moyenne des
+      COLONNES_SATISFACTION <= SEUIL_SATISFACTION_BASSE, sinon 0
+      (calculée uniquement si les colonnes de satisfaction sont présentes)
 
     Contraintes
     -----------
@@ -123,6 +138,14 @@ def add_features(df: pd.DataFrame)-> pd.DataFrame:
         (df["annees_depuis_la_derniere_promotion"] + 1)
     )
 
+    # Bas revenu ET faible satisfaction moyenne (même définition qu'à l'entraînement)
+    if set(COLONNES_SATISFACTION) <= set(df.columns):
+        satisfaction_moyenne = df[list(COLONNES_SATISFACTION)].mean(axis=1)
+        df["revenu_satisfaction"] = (
+            (df["revenu_mensuel"] <= SEUIL_REVENU_BAS)
+            & (satisfaction_moyenne <= SEUIL_SATISFACTION_BASSE)
+        ).astype(int)
+
     return df
 
 
@@ -159,4 +182,166 @@ def encode_categorical(df: pd.DataFrame)-> pd.DataFrame:
     df['poste'] = df['poste'].map(MAPPING_POSTE)
     df['frequence_deplacement'] = df['frequence_deplacement'].map(MAPPING_FREQ)
 
-    return df
\ No newline at end of file
+    return df
+
+def preprocess_dataframe(df_inputs: pd.DataFrame, model_features: List[str]) -> pd.DataFrame:
+    """
+    Pipeline pandas complet (implémentation de référence) :
+      - binarisation de 'heure_supplementaires' (Oui=1) et 'genre' (F=1)
+      - création de features dérivées
+      - encodage catégoriel
+      - alignement final sur `model_features` (colonnes absentes -> 0)
+      - conversion en float
+
+    Lève
+    ----
+    ValueError
+        Si la conversion finale en float échoue.
+    """
+    df_proc = df_inputs.copy()
+
+    df_proc = convert_binary_to_int(df_proc, "heure_supplementaires", positive_value="Oui")
+    df_proc = convert_binary_to_int(df_proc, "genre", positive_value="F")
+    df_proc = add_features(df_proc)
+    df_proc = encode_categorical(df_proc)
+
+    final_df = df_proc.reindex(columns=model_features, fill_value=0)
+    try:
+        return final_df.astype(float)
+    except Exception as e:
+        raise ValueError(f"Erreur de conversion de types pour le modèle: {e}") from e
+
+
+# --------------------------
+# Moteur vectorisé (lots de lignes)
+# --------------------------
+def _is_textual(values: Any) -> bool:
+    """Colonne texte (object/str) ou catégorielle pandas, à coder via une table."""
+    dtype = getattr(values, "dtype", None)
+    if dtype is None:
+        dtype = np.asarray(values).dtype
+    return isinstance(dtype, pd.CategoricalDtype) or dtype.kind in "OUS"
+
+
+def _factorize(values: Any) -> tuple[np.ndarray, pd.Index]:
+    """Codes entiers + valeurs distinctes (gratuit si la colonne est déjà catégorielle)."""
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        cat = pd.Categorical(values)
+        return np.asarray(cat.codes), cat.categories
+    codes, uniques = pd.factorize(np.asarray(values))
+    return codes, pd.Index(uniques)
+
+
+class _Coded:
+    """
+    Colonne catégorielle factorisée une seule fois : la table (valeur -> nombre) n'est
+    appliquée qu'aux valeurs distinctes, puis `take()` indexe par les codes entiers.
+    """
+
+    def __init__(self, factorized: tuple[np.ndarray, pd.Index], table: Mapping[str, float],
+                 default: float = np.nan, dtype: Any = np.float64):
+        self.codes, uniques = factorized
+        # Dernière case = valeur par défaut : les codes -1 (valeur manquante) tombent dessus.
+        self.lut = np.array([table.get(u, default) for u in uniques] + [default], dtype=dtype)
+
+    def take(self, start: int, stop: int) -> np.ndarray:
+        return self.lut[self.codes[start:stop]]
+
+
+# Nombre de lignes encodées par bloc (≈ 8192 x 25 x 8 octets : tient dans le cache L2)
+BATCH_BLOCK_ROWS = 8192
+
+
+def encode_batch(
+    data: Union[pd.DataFrame, Mapping[str, Any]],
+    plan: FeaturePlan,
+    dtype: Any = np.float64,
+) -> np.ndarray:
+    """
+    Encode un lot de lignes brutes en une matrice contiguë (n_lignes, n_features).
+
+    Équivalent vectorisé de `preprocess_dataframe` : chaque colonne du modèle est écrite
+    directement à son index (règles du `FeaturePlan`), sans get_dummies, ni reindex,
+    ni copie de DataFrame. Le coût est linéaire en nombre de lignes.
+
+    Paramètres
+    ----------
+    data : pd.DataFrame | Mapping[str, array-like]
+        Colonnes brutes (format API/BDD : "Oui"/"Non", "F"/"M"... ou binaires déjà en 0/1).
+        Les colonnes texte peuvent être `object` ou catégorielles pandas (plus rapide :
+        les codes existants sont réutilisés sans re-hachage).
+    plan : FeaturePlan
+        Plan compilé depuis le contrat du modèle.
+    dtype : np.float64 (défaut) ou np.float32
+        Type de la matrice de sortie.
+
+    Lève
+    ----
+    ValueError
+        Si une colonne requise est absente ou non convertible en numérique.
+    """
+    missing = [name for name in plan.input_columns if name not in data]
+    if missing:
+        raise ValueError(f"Colonnes manquantes pour encode_batch: {missing}")
+
+    columns = {name: data[name] for name in plan.input_columns}
+    n_rows = len(data) if isinstance(data, pd.DataFrame) else len(next(iter(data.values()), ()))
+    out = np.zeros((n_rows, plan.n_features), dtype=dtype)
+
+    try:
+        # 1) Préparation : chaque colonne texte est factorisée une seule fois (une passe
+        # de hachage), les colonnes numériques sont lues sans copie.
+        raw = columns
+        factorized = {name: _factorize(values) for name, values in raw.items() if _is_textual(values)}
+        columns = {name: np.asarray(values) for name, values in raw.items() if name not in factorized}
+
+        def coded(name: str, table: Mapping[str, float], default: float = np.nan, dtype: Any = np.float64) -> _Coded:
+            # Colonne à table (ordinal, one-hot, lookup) reçue en numérique ou toute NaN :
+            # factorisée en object, ses valeurs ne sont pas dans la table -> `default`,
+            # comme `.map()` / `get_dummies` côté pandas.
+            if name not in factorized:
+                factorized[name] = _factorize(np.asarray(raw[name], dtype=object))
+            return _Coded(factorized[name], table, default, dtype)
+
+        # Même règle que convert_binary_to_int : seules les colonnes textuelles sont mappées
+        binary = [
+            (slot, coded(name, {positive: 1.0}, default=0.0) if name in factorized else columns[name])
+            for slot, name, positive in plan.binary
+        ]
+        ordinal = [(slot, coded(name, codes)) for slot, name, codes in plan.ordinal]
+        one_hot = [coded(name, slots, default=-1, dtype=np.intp) for name, slots in plan.one_hot]
+        derived = [
+            (slot, feature, [
+                coded(name, feature.lookups[name]) if name in feature.lookups else columns[name]
+                for name in feature.inputs
+            ])
+            for slot, feature in plan.derived
+        ]
+
+        # 2) Remplissage par blocs de lignes : l'écriture colonne par colonne dans une
+        # matrice C-contiguë reste dans le cache CPU (sinon ~10x plus lent à 1M de lignes).
+        for start in range(0, n_rows, BATCH_BLOCK_ROWS):
+            stop = min(start + BATCH_BLOCK_ROWS, n_rows)
+            block = out[start:stop]
+
+            for slot, name in plan.passthrough:
+                block[:, slot] = columns[name][start:stop]
+            for slot, values in binary:
+                block[:, slot] = values.take(start, stop) if isinstance(values, _Coded) else values[start:stop]
+            for slot, values in ordinal:
+                block[:, slot] = values.take(start, stop)
+            for values in one_hot:
+                slots = values.take(start, stop)
+                rows = np.flatnonzero(slots >= 0)
+                block[rows, slots[rows]] = 1
+            for slot, feature, sources in derived:
+                args = [
+                    src.take(start, stop) if isinstance(src, _Coded)
+                    else src[start:stop].astype(np.float64)
+                    for src in sources
+                ]
+                block[:, slot] = feature.compute(*args)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Erreur de conversion de types pour le modèle: {e}") from e
+
+    return out
@@ -0,0 +1,129 @@
+"""
+Warmup du modèle et sonde de disponibilité (`/ready`).
+
+Pourquoi ?
+----------
+Le premier appel au modèle est bien plus lent que les suivants (allocations paresseuses
+dans XGBoost, premiers appels NumPy/pandas...). Au démarrage (lifespan de `main.py`),
+`startup()` charge les artefacts et exécute des inférences de chauffe sur **tout** le
+chemin de service :
+- encodage d'une ligne (`FeaturePlan.encode`) + `predict_proba` (comme `/predict`),
+- encodage vectorisé (`encode_batch`) + `predict_proba` (comme `/predict/batch`),
+- pipeline pandas de référence (`PREPROCESSING_MODE=pandas`).
+Les lignes de chauffe parcourent toutes les valeurs catégorielles du schéma.
+
+Le warmup est aussi branché sur `registry.on_load` : une nouvelle version (rechargement
+à chaud) est chauffée **avant** d'être servie.
+
+Disponibilité
+-------------
+- `/health` : liveness, ne fait rien (reste très bon marché).
+- `/ready`  : prêt si artefacts chargés, version courante chauffée (si `WARMUP_ENABLED`)
+  et, si la BDD est activée, une connexion du pool répond à `SELECT 1`.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple, get_args
+
+import pandas as pd
+from sqlalchemy import text
+
+from . import inference, metrics, settings
+from .model_registry import LoadedModel, registry
+from .preprocessing import encode_batch, preprocess_dataframe
+from .schemas import EmployeeData
+from ..database import connection as db_conn
+
+# Versions chauffées et dernière erreur de démarrage
+_warmed: Dict[str, float] = {}
+_startup_error: List[str] = []
+
+
+def warmup_rows() -> List[EmployeeData]:
+    """Payloads de chauffe : exemples du schéma, chaque valeur catégorielle au moins une fois."""
+    fields = EmployeeData.model_fields
+    choices = {name: get_args(info.annotation) for name, info in fields.items() if get_args(info.annotation)}
+    n_rows = max(len(values) for values in choices.values())
+    rows = []
+    for i in range(n_rows):
+        data = {
+            name: (choices[name][i % len(choices[name])] if name in choices else info.json_schema_extra["example"])
+            for name, info in fields.items()
+        }
+        rows.append(EmployeeData(**data))
+    return rows
+
+
+def warmup_model(loaded: LoadedModel, iterations: Optional[int] = None) -> float:
+    """
+    Exécute les inférences de chauffe pour `loaded` ; renvoie la durée (ms).
+
+    Lève
+    ----
+    Exception
+        Toute erreur du chemin de service (la version n'est alors pas servie).
+    """
+    iterations = settings.WARMUP_ITERATIONS if iterations is None else iterations
+    started = time.perf_counter()
+    rows = warmup_rows()
+    records = [row.model_dump() for row in rows]
+    plan = loaded.feature_plan
+
+    for _ in range(max(1, iterations)):
+        for row in rows:
+            inference.decide(inference.churn_probabilities(loaded.model, plan.encode(row)))
+    columns = {name: [r[name] for r in records] for name in plan.input_columns}
+    inference.predict(loaded.model, encode_batch(columns, plan))
+    inference.predict(loaded.model, preprocess_dataframe(pd.DataFrame(records), list(loaded.model_features)))
+
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    _warmed[loaded.version] = elapsed_ms
+    metrics.observe("warmup_ms", elapsed_ms)
+    return elapsed_ms
+
+
+def startup() -> None:
+    """Hook de démarrage : branche le warmup sur le registre puis charge + chauffe le modèle."""
+    _startup_error.clear()
+    registry.on_load = warmup_model if settings.WARMUP_ENABLED else None
+    try:
+        loaded = registry.current()
+        if settings.WARMUP_ENABLED and loaded.version not in _warmed:
+            warmup_model(loaded)
+    except Exception as e:
+        # L'API démarre quand même : /ready reste à 503 avec la cause
+        _startup_error.append(f"{type(e).__name__}: {e}")
+        print(f"ATTENTION: modèle non chargé au démarrage : {e}")
+
+
+def check_database() -> Tuple[bool, str]:
+    """(ok, détail) : "disabled" si pas de BDD, sinon un aller-retour `SELECT 1` via le pool."""
+    if db_conn.engine is None:
+        if db_conn.DATABASE_ENABLED:
+            return False, "unavailable"  # activée mais engine non créé (URL invalide...)
+        return True, "disabled"
+    try:
+        with db_conn.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True, "ok"
+    except Exception as e:
+        return False, f"error: {e}"
+
+
+def readiness() -> Tuple[bool, Dict[str, Any]]:
+    """(prêt ?, détail des vérifications) pour `/ready`."""
+    loaded = registry.loaded
+    model_ok = loaded is not None
+    warm_ok = model_ok and (not settings.WARMUP_ENABLED or loaded.version in _warmed)
+    db_ok, db_detail = check_database()
+
+    checks: Dict[str, Any] = {
+        "model_loaded": model_ok,
+        "model_version": loaded.version if model_ok else None,
+        "warmed_up": warm_ok,
+        "warmup_ms": _warmed.get(loaded.version) if model_ok else None,
+        "database": db_detail,
+    }
+    if _startup_error:
+        checks["startup_error"] = _startup_error[-1]
+    return model_ok and warm_ok and db_ok, checks
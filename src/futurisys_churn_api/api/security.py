@@ -2,7 +2,8 @@
 Sécurité & Authentification pour Futurisys Churn API.
 
 Fonctionnalités couvertes :
-- Hachage / vérification de mots de passe (Passlib + bcrypt)
+- Hachage / vérification de mots de passe (Passlib + bcrypt), côté endpoints sur un
+  pool de processus dédié et borné (`api/passwords.py`)
 - Création et validation de JWT (jose)
 - OAuth2 (flux "password") via FastAPI (OAuth2PasswordBearer)
 - Récupération de l'utilisateur courant avec vérification des scopes
@@ -13,6 +14,27 @@ Notes d'implémentation
 - Base de données optionnelle :
   - Si `SessionLocal` est indisponible (ex: mode déployé sans DB), on passe
     en mode "fake DB" via `fake_users_db`.
+- Boucle d'événements :
+  - `get_current_user` est `async` : la requête SQL de recherche de l'utilisateur
+    passe par `run_db` (threadpool avec le driver synchrone, driver async avec
+    `DATABASE_ASYNC=true`), pour ne jamais bloquer les autres coroutines pendant
+    l'aller-retour avec la base.
+- Cache des utilisateurs (`principal_cache`) :
+  - Après un premier chargement, l'utilisateur (id, email, rôle, actif) est gardé en
+    mémoire par sujet JWT pendant `AUTH_CACHE_TTL_SECONDS` : en régime établi,
+    l'authentification ne touche plus la base.
+  - Invalidation : toute insertion / modification / suppression d'un `User` via l'ORM
+    (inscription, changement de rôle, désactivation) retire l'entrée, au flush puis au
+    commit. Une mise à jour SQL directe (hors ORM) n'est vue qu'à expiration du TTL.
+  - Cette invalidation est **locale au processus** : avec `uvicorn --workers N`, les autres
+    workers gardent l'ancienne entrée jusqu'à expiration du TTL (un utilisateur désactivé
+    peut encore s'authentifier pendant au plus `AUTH_CACHE_TTL_SECONDS`).
+  - Taux de succès et borne de fraîcheur publiés dans `/metrics` (composant `auth_cache`).
+- Cache des JWT vérifiés (`token_cache`) :
+  - Un même bearer token est réutilisé pendant `JWT_EXPIRE_MINUTES` : ses claims, une fois
+    vérifiés par `jwt.decode`, sont gardés (clé = SHA-256 du token) jusqu'à son `exp`.
+    Les requêtes suivantes sautent la vérification HMAC + parsing JSON + claims.
+  - Composant `jwt_cache` dans `/metrics`.
 - API Key :
   - `verify_api_key()` relit `API_KEY` dans l'environnement **à chaque requête**,
     ce qui permet de l'activer/désactiver dynamiquement (utile en tests).
@@ -20,28 +42,37 @@ Notes d'implémentation
     endpoint avec `Security(verify_api_key, use_cache=False)`.
 """
 
+import hashlib
 import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Callable, List, Optional, TypeVar, Union
 
-from fastapi import Depends, Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database.connection import SessionLocal
+from . import metrics, settings
+from .executor import ExecutorSaturated
+from .passwords import check_password, get_password_hasher, hash_password, pwd_context  # noqa: F401
+from ..database.connection import AsyncSessionLocal, SessionLocal
 from ..database.models import User
 
+T = TypeVar("T")
+
 # --- Configuration JWT ---
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "une_cle_secrete_tres_complexe")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRE_MINUTES = 60
 
-# Contexte de hachage (bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 "Password" avec scopes
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/auth/token",
@@ -53,11 +84,13 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 # --- Base d'utilisateurs factice (mode sans BDD) ---
-# NB: le hachage est fait au chargement du module.
+# NB: hachage bcrypt **précalculé** de "futurisys_password" (pas de bcrypt au chargement
+# du module, donc au démarrage de chaque worker).
+FAKE_USER_PASSWORD_HASH = "$2b$12$CaC.qa2z5l8ookvnPku9HuqpvS18FvbkaYIN6FK3ogicPkhaf5dq."
 fake_users_db = {
     "futurisys_user": {
         "email": "futurisys_user",
-        "hashed_password": pwd_context.hash("futurisys_password"),
+        "hashed_password": FAKE_USER_PASSWORD_HASH,
         "role": "admin",
         "is_active": True
     }
@@ -68,32 +101,279 @@ fake_users_db = {
 # Utilitaires mot de passe
 # --------------------------
 def get_password_hash(pw: str) -> str:
-    """Retourne le hachage `bcrypt` du mot de passe en clair `pw`."""
-    return pwd_context.hash(pw)
+    """Retourne le hachage `bcrypt` du mot de passe en clair `pw` (bloquant : scripts)."""
+    return hash_password(pw)
 
 
 def verify_password(plain: str, hashed: str) -> bool: 
-    """Vérifie qu'un mot de passe en clair `plain` correspond au hachage `hashed`."""
-    return pwd_context.verify(plain, hashed)
+    """Vérifie qu'un mot de passe en clair `plain` correspond au hachage `hashed` (bloquant)."""
+    return check_password(plain, hashed)
+
+
+def _password_pool_saturated() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Trop d'authentifications en cours, réessayez plus tard.",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+async def get_password_hash_async(pw: str) -> str:
+    """
+    Hachage bcrypt sur le pool dédié (`api/passwords.py`), sans occuper les threads de requêtes.
+
+    Lève HTTPException 503 (+ Retry-After) si le pool de hachage est saturé.
+    """
+    try:
+        return await get_password_hasher().hash(pw)
+    except ExecutorSaturated:
+        raise _password_pool_saturated()
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """
+    Vérification bcrypt sur le pool dédié (`api/passwords.py`).
+
+    Lève HTTPException 503 (+ Retry-After) si le pool de hachage est saturé.
+    """
+    try:
+        return await get_password_hasher().verify(plain, hashed)
+    except ExecutorSaturated:
+        raise _password_pool_saturated()
 
 # --------------------------
 # Accès Base de données
 # --------------------------
-def get_db():
+async def get_db(request: Request):
     """
     Dépendance FastAPI : ouvre une session DB si possible, sinon yield None.
 
     Ce design permet de faire tourner l'API en mode "sans BDD" (ex: Spaces),
     tout en conservant la même signature de dépendance côté endpoints.
+
+    **Unique** fournisseur de session de l'API (auth, prédiction...) : une requête
+    n'ouvre qu'une session, soit au plus une connexion du pool (empruntée à la
+    première requête SQL). La session est rangée dans `request.state` : le cache de
+    dépendances de FastAPI ne suffit pas, sa clé inclut les scopes de sécurité, si
+    bien que `get_db` sous `Security(get_current_user, scopes=...)` et `get_db` côté
+    endpoint seraient deux dépendances distinctes. Seul le premier appel ferme la session.
+
+    Avec `DATABASE_ASYNC=true` (et le driver async installé), la session est une
+    `AsyncSession` ; les appelants passent par `run_db`, qui gère les deux cas.
     """
     if SessionLocal is None:
         yield None
         return
+    db = getattr(request.state, "db", None)
+    if db is not None:
+        yield db
+        return
+    if AsyncSessionLocal is not None:
+        db = AsyncSessionLocal()
+        request.state.db = db
+        try:
+            yield db
+        finally:
+            await db.close()
+        return
     db = SessionLocal()
+    request.state.db = db
     try:
         yield db
     finally:
-        db.close()
+        # Rendre la connexion au pool peut faire un aller-retour (rollback) -> threadpool
+        await run_in_threadpool(db.close)
+
+
+async def run_db(db: Union[Session, AsyncSession], fn: Callable[..., T], *args) -> T:
+    """
+    Exécute `fn(session_sync, *args)` (code ORM synchrone) sans bloquer la boucle.
+
+    - `AsyncSession` : `run_sync`, les E/S passent par le driver async (pas de thread) ;
+    - `Session` : dans le threadpool (`run_in_threadpool`).
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+def lookup_user(db: Session, email: str) -> Optional[User]:
+    """
+    Charge l'utilisateur `email` en base (appel **bloquant**).
+
+    À exécuter hors de la boucle d'événements (cf. `get_current_user`).
+    """
+    return db.query(User).filter(User.email == email).first()
+
+# --------------------------
+# Cache des utilisateurs authentifiés
+# --------------------------
+@dataclass(frozen=True)
+class Principal:
+    """Ce dont l'authentification a besoin d'un utilisateur (copie détachée de la base)."""
+    id: int
+    email: str
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=bool(user.is_active))
+
+    def to_user(self) -> User:
+        """Objet `User` transitoire (non rattaché à une session) pour les endpoints."""
+        return User(id=self.id, email=self.email, role=self.role, is_active=self.is_active)
+
+
+class _ExpiringCache:
+    """Cache LRU borné, thread-safe, dont chaque entrée porte sa propre échéance."""
+
+    def __init__(self, max_size: int, clock: Callable[[], float], name: str):
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counts = dict.fromkeys(("hits", "misses", "evictions", "expirations", "invalidations"), 0)
+        metrics.register_collector(name, self.stats)
+
+    def _get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            value, expires_at = entry
+            if self._clock() > expires_at:
+                del self._entries[key]
+                self._counts["expirations"] += 1
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return value
+
+    def _put(self, key: str, value, expires_at: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Retire `key` du cache (ou tout le cache si None)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._counts["invalidations"] += 1
+            elif self._entries.pop(key, None) is not None:
+                self._counts["invalidations"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Configuration, taille et compteurs (pour /metrics)."""
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                **self._counts,
+                "hit_ratio": self._counts["hits"] / lookups if lookups else 0.0,
+            }
+
+
+class PrincipalCache(_ExpiringCache):
+    """Utilisateurs résolus, indexés par sujet (email), gardés `ttl_seconds` au plus."""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        name: str = "auth_cache",
+    ):
+        self.ttl_seconds = ttl_seconds
+        super().__init__(max_size, clock, name)
+
+    def get(self, subject: str) -> Optional[Principal]:
+        """Utilisateur en cache pour `subject`, ou None (absent ou expiré)."""
+        return self._get(subject)
+
+    def put(self, principal: Principal) -> None:
+        """Mémorise `principal` (évince l'entrée la moins récente si plein)."""
+        self._put(principal.email, principal, self._clock() + self.ttl_seconds)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "ttl_seconds": self.ttl_seconds}
+
+
+class VerifiedTokenCache(_ExpiringCache):
+    """
+    Claims des JWT déjà vérifiés, indexés par empreinte SHA-256 du token.
+
+    Une entrée n'est créée qu'après un `jwt.decode` réussi (signature + claims) et
+    expire au `exp` du token : un token expiré repasse par `jwt.decode`, qui le refuse.
+    L'horloge est donc l'heure murale (`time.time`), comme `exp`.
+    """
+
+    def __init__(self, max_size: int = 4096, clock: Callable[[], float] = time.time, name: str = "jwt_cache"):
+        super().__init__(max_size, clock, name)
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Claims du token s'il a déjà été vérifié et n'a pas expiré, sinon None."""
+        return self._get(self.digest(token))
+
+    def put(self, token: str, claims: dict) -> None:
+        """Mémorise les claims vérifiés de `token` jusqu'à son `exp` (ignoré sans `exp`)."""
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            self._put(self.digest(token), claims, float(exp))
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+token_cache = VerifiedTokenCache(max_size=settings.JWT_CACHE_MAX_SIZE)
+
+
+def _changed_emails(user: User) -> set:
+    """Email courant + ancien email (si modifié) d'un `User`."""
+    history = inspect(user).attrs.email.history
+    return {e for e in (user.email, *history.deleted) if e}
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, user: User) -> None:
+    # Au flush : retire l'entrée et note le sujet pour une seconde invalidation au
+    # commit (une requête concurrente a pu remettre l'ancienne version entre-temps).
+    emails = _changed_emails(user)
+    for email in emails:
+        principal_cache.invalidate(email)
+    session = Session.object_session(user)
+    if session is not None:
+        session.info.setdefault("principal_invalidations", set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for email in session.info.pop("principal_invalidations", ()):
+        principal_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    session.info.pop("principal_invalidations", None)
 
 # --------------------------
 # JWT
@@ -110,6 +390,26 @@ def create_access_token(subject: str, scopes: List[str] = None) -> str:
     return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
+def decode_token(token: str) -> dict:
+    """
+    Claims vérifiés de `token` : lus dans `token_cache` si ce token a déjà été
+    validé et n'a pas expiré, sinon `jwt.decode` complet (puis mise en cache).
+
+    Lève
+    ----
+    JWTError
+        Signature invalide, token mal formé ou expiré.
+    """
+    if settings.JWT_CACHE_ENABLED:
+        claims = token_cache.get(token)
+        if claims is not None:
+            return claims
+    claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    if settings.JWT_CACHE_ENABLED:
+        token_cache.put(token, claims)
+    return claims
+
+
 # --------------------------
 # Authentification principale
 # --------------------------
@@ -120,7 +420,8 @@ async def get_current_user(
 ) -> User:
     """
     Récupère l'utilisateur courant depuis le JWT `token`, puis :
-      1) Si DB dispo, charge l'utilisateur en base ; sinon, cherche dans `fake_users_db`.
+      1) Si DB dispo, lit l'utilisateur dans `principal_cache` ou, à défaut, le charge
+         en base (puis le met en cache) ; sinon, cherche dans `fake_users_db`.
       2) Vérifie que l'utilisateur est actif.
       3) Vérifie la présence de tous les `security_scopes.scopes` dans le token.
 
@@ -135,7 +436,7 @@ async def get_current_user(
 
     # Décodage du token
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = decode_token(token)
         sub = payload.get("sub")
         token_scopes = payload.get("scopes", [])
         if sub is None:
@@ -146,7 +447,14 @@ async def get_current_user(
     # Recherche de l'utilisateur
     user = None
     if db:
-        user = db.query(User).filter(User.email == sub).first()
+        cached = principal_cache.get(sub) if settings.AUTH_CACHE_ENABLED else None
+        if cached is not None:
+            user = cached.to_user()
+        else:
+            # E/S SQL hors de la boucle : threadpool ou driver async (`run_db`)
+            user = await run_db(db, lookup_user, sub)
+            if user is not None and settings.AUTH_CACHE_ENABLED:
+                principal_cache.put(Principal.from_user(user))
     else:
         u = fake_users_db.get(sub)
         if u:
@@ -0,0 +1,153 @@
+"""
+Réglages d'exploitation de l'API Futurisys Churn (lus dans l'environnement).
+
+Principe
+--------
+- Comme `database/connection.py`, les valeurs sont lues **au chargement du module**.
+- Une valeur invalide (ex: seuil hors de [0, 1]) lève une erreur **au chargement** :
+  l'API (et `batch_predict`) refuse de démarrer plutôt que d'échouer à chaque requête.
+- Les modules consommateurs lisent `settings.<NOM>` au moment de l'utilisation
+  (et non `from .settings import NOM`) : les tests peuvent donc surcharger une valeur
+  avec `monkeypatch.setattr(settings, "NOM", ...)` sans recharger toute la stack.
+
+Variables d'environnement
+-------------------------
+MODEL_PATH              : artefact du modèle (défaut models/churn_model.joblib)
+MODEL_BACKEND           : "joblib" (pipeline d'entraînement, défaut) ou "numpy" (export TreeEnsemble)
+TREE_MODEL_PATH         : export NumPy du modèle (défaut models/churn_model_trees.npy, + .json)
+MODEL_FEATURES_PATH     : contrat de features (défaut models/input_features.json)
+MODEL_RELOAD_CHECK_SECONDS : vérification des fichiers du modèle toutes les N s (défaut 30, 0 = jamais)
+WARMUP_ENABLED          : inférences de chauffe au démarrage et avant chaque swap de modèle (défaut true)
+WARMUP_ITERATIONS       : nombre de passes de chauffe ligne à ligne (défaut 10)
+PREPROCESSING_MODE      : "fast" (FeaturePlan, défaut) ou "pandas" (pipeline de référence)
+PREDICT_BATCH_MAX_SIZE  : nombre maximal d'éléments acceptés par POST /predict/batch (défaut 500)
+DECISION_THRESHOLD      : seuil de probabilité au-delà duquel prediction = 1, dans [0, 1] (défaut 0.5 = model.predict)
+PREDICTION_CACHE_ENABLED     : cache LRU+TTL des probabilités de /predict (défaut true)
+PREDICTION_CACHE_MAX_SIZE    : nombre maximal d'entrées du cache (défaut 10000)
+PREDICTION_CACHE_TTL_SECONDS : durée de vie d'une entrée (défaut 300 s)
+PREDICTION_CACHE_BACKEND     : "memory" (par processus, défaut) ou "shared" (fichier mmap commun aux workers)
+PREDICTION_CACHE_SHARED_PATH : fichier du backend "shared" (défaut <tmp>/futurisys_prediction_cache.bin)
+INFERENCE_WORKERS       : threads dédiés au préprocessing + inférence (défaut min(4, nb CPU))
+INFERENCE_QUEUE_SIZE    : tâches en attente max. avant rejet 503 (défaut 64)
+INFERENCE_RETRY_AFTER_SECONDS : valeur de l'en-tête Retry-After des rejets de /predict (défaut 1)
+MICRO_BATCH_ENABLED     : regroupe les appels /predict concurrents en un appel modèle (défaut false)
+MICRO_BATCH_MAX_SIZE    : taille maximale d'un micro-lot (défaut 32)
+MICRO_BATCH_MAX_WAIT_MS : attente maximale avant de lancer un micro-lot incomplet (défaut 2 ms)
+MICRO_BATCH_QUEUE_SIZE  : lignes en attente d'un micro-lot max. avant rejet 503 (défaut 256)
+AUTH_CACHE_ENABLED      : cache des utilisateurs authentifiés (id, rôle, actif) par sujet JWT (défaut true)
+AUTH_CACHE_TTL_SECONDS  : durée de vie d'une entrée = borne de fraîcheur (défaut 10 s) ; avec
+                          plusieurs workers, seul le processus qui modifie un `User` l'invalide
+AUTH_CACHE_MAX_SIZE     : nombre maximal d'utilisateurs en cache (défaut 1024)
+JWT_CACHE_ENABLED       : cache des JWT déjà vérifiés, valable jusqu'à leur `exp` (défaut true)
+JWT_CACHE_MAX_SIZE      : nombre maximal de tokens en cache (défaut 4096)
+PASSWORD_HASH_WORKERS   : processus dédiés à bcrypt pour /auth/token et /auth/register (défaut 2, 0 = un thread)
+PASSWORD_HASH_QUEUE_SIZE : opérations bcrypt en attente max. avant rejet 503 (défaut 32)
+PASSWORD_HASH_RETRY_AFTER_SECONDS : valeur de l'en-tête Retry-After de ces rejets (défaut 1)
+AUDIT_WRITE_BEHIND      : /predict répond sans attendre la base ; écriture différée par lots (défaut false)
+AUDIT_QUEUE_MAX_SIZE    : couples entrée/sortie en attente d'écriture max. (défaut 10000)
+AUDIT_BATCH_SIZE        : couples max. par lot (un INSERT multi-lignes par table, défaut 500)
+AUDIT_FLUSH_INTERVAL_MS : délai max. entre la première ligne d'un lot et son commit (défaut 200 ms)
+AUDIT_QUEUE_FULL_POLICY : file pleine => "sync" (écriture synchrone, défaut), "reject" (503) ou "drop" ;
+                          toute autre valeur est refusée au chargement (l'application ne démarre pas)
+AUDIT_RETRY_AFTER_SECONDS : valeur de l'en-tête Retry-After des rejets "reject" (défaut 1)
+"""
+
+import os
+import tempfile
+
+
+def _env_int(name: str, default: int) -> int:
+    """Entier lu dans l'environnement (valeur par défaut si absent ou vide)."""
+    raw = os.getenv(name, "").strip()
+    return int(raw) if raw else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Flottant lu dans l'environnement (valeur par défaut si absent ou vide)."""
+    raw = os.getenv(name, "").strip()
+    return float(raw) if raw else default
+
+
+def _env_probability(name: str, default: float) -> float:
+    """Flottant de [0, 1] lu dans l'environnement ; ValueError (refus de démarrer) sinon."""
+    value = _env_float(name, default)
+    if not 0.0 <= value <= 1.0:
+        raise ValueError(f"{name}={value} invalide (attendu dans [0, 1])")
+    return value
+
+
+def _env_choice(name: str, default: str, choices: tuple) -> str:
+    """Valeur parmi `choices` lue dans l'environnement (insensible à la casse) ; ValueError sinon."""
+    value = (os.getenv(name, "").strip() or default).lower()
+    if value not in choices:
+        raise ValueError(f"{name}={value!r} invalide (attendu {', '.join(choices)})")
+    return value
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Booléen lu dans l'environnement ("true"/"1"/"yes"/"on" => True)."""
+    raw = os.getenv(name, "").strip().lower()
+    return raw in ("true", "1", "yes", "on") if raw else default
+
+
+# --- Modèle servi (ModelRegistry) ---
+MODEL_PATH = os.getenv("MODEL_PATH", "models/churn_model.joblib")
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "joblib").lower()
+TREE_MODEL_PATH = os.getenv("TREE_MODEL_PATH", "models/churn_model_trees.npy")
+MODEL_FEATURES_PATH = os.getenv("MODEL_FEATURES_PATH", "models/input_features.json")
+MODEL_RELOAD_CHECK_SECONDS = _env_float("MODEL_RELOAD_CHECK_SECONDS", 30.0)
+
+# --- Warmup / disponibilité (/ready) ---
+WARMUP_ENABLED = _env_bool("WARMUP_ENABLED", True)
+WARMUP_ITERATIONS = _env_int("WARMUP_ITERATIONS", 10)
+
+# --- Préprocessing ---
+PREPROCESSING_MODE = os.getenv("PREPROCESSING_MODE", "fast").lower()
+
+# --- Décision ---
+DECISION_THRESHOLD = _env_probability("DECISION_THRESHOLD", 0.5)
+
+# --- Prédiction par lot (/predict/batch) ---
+PREDICT_BATCH_MAX_SIZE = _env_int("PREDICT_BATCH_MAX_SIZE", 500)
+
+# --- Cache de prédictions (/predict) ---
+PREDICTION_CACHE_ENABLED = _env_bool("PREDICTION_CACHE_ENABLED", True)
+PREDICTION_CACHE_MAX_SIZE = _env_int("PREDICTION_CACHE_MAX_SIZE", 10_000)
+PREDICTION_CACHE_TTL_SECONDS = _env_float("PREDICTION_CACHE_TTL_SECONDS", 300.0)
+PREDICTION_CACHE_BACKEND = os.getenv("PREDICTION_CACHE_BACKEND", "memory").lower()
+PREDICTION_CACHE_SHARED_PATH = os.getenv(
+    "PREDICTION_CACHE_SHARED_PATH",
+    os.path.join(tempfile.gettempdir(), "futurisys_prediction_cache.bin"),
+)
+
+# --- Exécuteur d'inférence dédié (backpressure) ---
+INFERENCE_WORKERS = _env_int("INFERENCE_WORKERS", min(4, os.cpu_count() or 1))
+INFERENCE_QUEUE_SIZE = _env_int("INFERENCE_QUEUE_SIZE", 64)
+INFERENCE_RETRY_AFTER_SECONDS = _env_int("INFERENCE_RETRY_AFTER_SECONDS", 1)
+
+# --- Micro-batching des appels /predict concurrents ---
+MICRO_BATCH_ENABLED = _env_bool("MICRO_BATCH_ENABLED", False)
+MICRO_BATCH_MAX_SIZE = _env_int("MICRO_BATCH_MAX_SIZE", 32)
+MICRO_BATCH_MAX_WAIT_MS = _env_float("MICRO_BATCH_MAX_WAIT_MS", 2.0)
+MICRO_BATCH_QUEUE_SIZE = _env_int("MICRO_BATCH_QUEUE_SIZE", 256)
+
+# --- Authentification : cache des utilisateurs résolus ---
+AUTH_CACHE_ENABLED = _env_bool("AUTH_CACHE_ENABLED", True)
+AUTH_CACHE_TTL_SECONDS = _env_float("AUTH_CACHE_TTL_SECONDS", 10.0)
+AUTH_CACHE_MAX_SIZE = _env_int("AUTH_CACHE_MAX_SIZE", 1024)
+JWT_CACHE_ENABLED = _env_bool("JWT_CACHE_ENABLED", True)
+JWT_CACHE_MAX_SIZE = _env_int("JWT_CACHE_MAX_SIZE", 4096)
+
+# --- Hachage des mots de passe (bcrypt) ---
+PASSWORD_HASH_WORKERS = _env_int("PASSWORD_HASH_WORKERS", 2)
+PASSWORD_HASH_QUEUE_SIZE = _env_int("PASSWORD_HASH_QUEUE_SIZE", 32)
+PASSWORD_HASH_RETRY_AFTER_SECONDS = _env_int("PASSWORD_HASH_RETRY_AFTER_SECONDS", 1)
+
+# --- Écriture différée des entrées/sorties de /predict ---
+AUDIT_WRITE_BEHIND = _env_bool("AUDIT_WRITE_BEHIND", False)
+AUDIT_QUEUE_MAX_SIZE = _env_int("AUDIT_QUEUE_MAX_SIZE", 10_000)
+AUDIT_BATCH_SIZE = _env_int("AUDIT_BATCH_SIZE", 500)
+AUDIT_FLUSH_INTERVAL_MS = _env_float("AUDIT_FLUSH_INTERVAL_MS", 200.0)
+AUDIT_FULL_POLICIES = ("sync", "reject", "drop")
+AUDIT_QUEUE_FULL_POLICY = _env_choice("AUDIT_QUEUE_FULL_POLICY", "sync", AUDIT_FULL_POLICIES)
+AUDIT_RETRY_AFTER_SECONDS = _env_int("AUDIT_RETRY_AFTER_SECONDS", 1)
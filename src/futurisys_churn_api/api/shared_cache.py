@@ -0,0 +1,309 @@
+"""
+Cache de prédictions partagé entre workers : table à adressage ouvert dans un fichier mmap.
+
+Pourquoi ?
+----------
+Avec `uvicorn --workers N`, chaque processus a son propre `PredictionCache` : le taux
+de hit est divisé par N et la mémoire multipliée par N. Ce backend place la table dans
+un fichier projeté en mémoire (`mmap`), visible par tous les workers de la machine
+(idéalement sur un tmpfs, ex: `/dev/shm`).
+
+Disposition du fichier
+----------------------
+- en-tête (64 octets) : magic, version de format, nombre de slots, génération ;
+- `n_slots` slots de 40 octets : seq (u32), empreinte (16 octets), probabilité (f64),
+  horodatage d'écriture (f64, `time.time()` : commun à tous les processus).
+
+L'empreinte = 16 premiers octets de SHA-256(génération, version du modèle, clé payload) :
+une autre version de modèle ne retrouve donc jamais les entrées d'une autre, et `clear()`
+se contente d'incrémenter la génération (O(1)).
+
+Changement de taille ou de format
+---------------------------------
+Un fichier existant n'est **jamais** tronqué : réduire un fichier encore projeté par un
+autre worker ferait lever SIGBUS à son prochain accès. Une nouvelle table est construite
+dans un fichier temporaire puis mise en place par `os.replace` ; l'ancien fichier (encore
+projeté par les autres workers, donc toujours valide) est marqué **retiré** dans son
+en-tête. Chaque accès relit l'en-tête : un worker qui le trouve retiré se reprojette sur
+le fichier courant et en adopte la taille.
+
+Concurrence
+-----------
+- Lectures **sans verrou** (seqlock) : `seq` impair = écriture en cours ; le lecteur relit
+  `seq` après la copie du slot et recommence si la valeur a changé. L'écrivain repart de
+  `seq | 1` : un `seq` resté impair (écrivain tué pendant la copie) redevient pair à la
+  prochaine écriture du slot au lieu d'inverser la parité pour toujours.
+- Écritures sérialisées par un verrou `fcntl.flock` sur un fichier voisin `<path>.lock`
+  (stable, contrairement à la table qui peut être remplacée ; entre processus) et un
+  `threading.Lock` (entre threads d'un même processus). Sans `fcntl` (Windows), seul le
+  verrou de thread est pris : le cache reste correct pour un seul processus.
+- Compteurs (`stats()`) propres au processus, protégés par un `threading.Lock` dédié : les
+  lectures ne prennent pas le verrou d'écriture.
+- Sondage linéaire sur `MAX_PROBE` slots ; table pleine sur cette fenêtre -> le slot le plus
+  ancien est remplacé (éviction approximative).
+
+Les compteurs (hits / misses...) sont propres à chaque processus.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, NamedTuple, Optional
+
+from . import metrics
+
+try:  # verrou inter-processus (POSIX)
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+MAGIC = b"FCPC"
+RETIRED = b"FCPX"  # ancien fichier remplacé : se reprojeter sur `path`
+FORMAT_VERSION = 1
+MAX_PROBE = 8
+MAX_READ_RETRIES = 1000  # au-delà, slot considéré vide (écrivain interrompu en pleine écriture)
+
+_HEADER = struct.Struct("<4sIIQ")   # magic, format, n_slots, génération
+HEADER_SIZE = 64
+_SLOT = struct.Struct("<I4x16sdd")  # seq, empreinte, probabilité, horodatage
+_SEQ = struct.Struct("<I")
+_EMPTY = bytes(16)
+
+
+class _Table(NamedTuple):
+    """Fichier projeté courant : remplacé d'un bloc (jamais taille et projection désaccordées)."""
+    fd: int
+    mm: mmap.mmap
+    n_slots: int
+
+
+def _read_header(fd: int) -> tuple:
+    os.lseek(fd, 0, os.SEEK_SET)
+    return _HEADER.unpack(os.read(fd, _HEADER.size).ljust(_HEADER.size, b"\0"))
+
+
+def _n_slots_for(max_size: int) -> int:
+    """Plus petite puissance de 2 >= max_size (masque de hachage)."""
+    return 1 << max(3, (max(1, max_size) - 1).bit_length())
+
+
+class SharedPredictionCache:
+    """
+    Même interface que `PredictionCache` (get / put / clear / stats), stockage partagé.
+
+    Plusieurs processus ouvrant le même `path` partagent la table ; à l'ouverture, un
+    fichier d'une autre taille ou d'un autre format est remplacé par une table neuve de
+    `max_size`, que les instances déjà ouvertes adoptent à leur accès suivant.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = 10_000,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.time,
+        name: str = "prediction_cache",
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._thread_lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self._counts = dict.fromkeys(("hits", "misses", "evictions", "expirations", "invalidations"), 0)
+        self._retired = []  # tables remplacées : une lecture peut encore s'y dérouler, fermées par close()
+
+        self._configured_slots = _n_slots_for(max_size)
+        self._lock_fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        with self._write_lock():
+            self._table = self._attach(adopt=False)
+        metrics.register_collector(name, self.stats)
+
+    @property
+    def n_slots(self) -> int:
+        return self._table.n_slots
+
+    # --------------------------
+    # Fichier : ouverture, remplacement, reprojection
+    # --------------------------
+    def _attach(self, adopt: bool) -> _Table:
+        """
+        Projette la table de `path` (appelé sous verrou d'écriture).
+
+        `adopt` : adopte la taille du fichier s'il est valide (instance déjà ouverte qui suit
+        le fichier). Sinon, une table valide d'une autre taille que `max_size` est remplacée,
+        comme une table absente ou invalide.
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        magic, fmt, file_slots, _ = _read_header(fd)
+        valid = (
+            magic == MAGIC and fmt == FORMAT_VERSION
+            and os.fstat(fd).st_size == HEADER_SIZE + file_slots * _SLOT.size
+        )
+        if valid and (adopt or file_slots == self._configured_slots):
+            return _Table(fd, mmap.mmap(fd, os.fstat(fd).st_size), file_slots)
+        os.close(fd)
+        return self._replace_file(self._configured_slots, retire_old=valid)
+
+    def _replace_file(self, n_slots: int, retire_old: bool) -> _Table:
+        """Table neuve (zéros) construite à côté, puis mise en place par `os.replace`."""
+        size = HEADER_SIZE + n_slots * _SLOT.size
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.ftruncate(fd, size)  # fichier neuf, projeté par personne
+        mm = mmap.mmap(fd, size)
+        _HEADER.pack_into(mm, 0, MAGIC, FORMAT_VERSION, n_slots, 0)
+        old_fd = os.open(self.path, os.O_RDWR) if retire_old else None
+        os.replace(tmp, self.path)
+        if old_fd is not None:
+            # En-tête seul : l'ancien fichier garde sa taille (pas de SIGBUS chez les autres)
+            os.lseek(old_fd, 0, os.SEEK_SET)
+            os.write(old_fd, RETIRED)
+            os.close(old_fd)
+        return _Table(fd, mm, n_slots)
+
+    def _current(self) -> tuple:
+        """(table, en-tête) à jour : se reprojette d'abord si la table a été remplacée."""
+        table = self._table
+        header = _HEADER.unpack_from(table.mm, 0)
+        if header[0] == MAGIC:
+            return table, header
+        with self._write_lock():
+            if _HEADER.unpack_from(self._table.mm, 0)[0] != MAGIC:
+                self._retired.append(self._table)
+                self._table = self._attach(adopt=True)
+            table = self._table
+            return table, _HEADER.unpack_from(table.mm, 0)
+
+    # --------------------------
+    # Verrous / accès bas niveau
+    # --------------------------
+    @contextmanager
+    def _write_lock(self):
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _generation(self) -> int:
+        return self._current()[1][3]
+
+    @staticmethod
+    def _fingerprint(key: str, version: str, generation: int) -> bytes:
+        raw = f"{generation}:{version}:{key}".encode("utf-8")
+        return hashlib.sha256(raw).digest()[:16]
+
+    @staticmethod
+    def _offset(slot: int) -> int:
+        return HEADER_SIZE + slot * _SLOT.size
+
+    @staticmethod
+    def _probe(fingerprint: bytes, n_slots: int):
+        start = int.from_bytes(fingerprint[:8], "little") & (n_slots - 1)
+        for i in range(MAX_PROBE):
+            yield (start + i) & (n_slots - 1)
+
+    def _read_slot(self, mm: mmap.mmap, slot: int):
+        """Lecture cohérente d'un slot (seqlock) : (empreinte, probabilité, horodatage)."""
+        offset = self._offset(slot)
+        for _ in range(MAX_READ_RETRIES):
+            seq = _SEQ.unpack_from(mm, offset)[0]
+            if seq & 1:
+                continue  # écriture en cours
+            _, fingerprint, value, stored_at = _SLOT.unpack_from(mm, offset)
+            if _SEQ.unpack_from(mm, offset)[0] == seq:
+                return fingerprint, value, stored_at
+        return _EMPTY, 0.0, 0.0
+
+    def _write_slot(self, mm: mmap.mmap, slot: int, fingerprint: bytes, value: float, stored_at: float) -> None:
+        # Appelé sous verrou d'écriture : seq impair pendant la copie, pair ensuite (même si
+        # un écrivain précédent est mort en laissant un seq impair)
+        offset = self._offset(slot)
+        odd = _SEQ.unpack_from(mm, offset)[0] | 1
+        _SEQ.pack_into(mm, offset, odd)
+        _SLOT.pack_into(mm, offset, odd, fingerprint, value, stored_at)
+        _SEQ.pack_into(mm, offset, (odd + 1) & 0xFFFFFFFF)
+
+    def _count(self, name: str) -> None:
+        with self._counts_lock:
+            self._counts[name] += 1
+
+    # --------------------------
+    # API cache
+    # --------------------------
+    def get(self, key: str, version: str) -> Optional[float]:
+        """Probabilité en cache pour `key` et `version`, ou None (absente ou expirée)."""
+        table, header = self._current()
+        fingerprint = self._fingerprint(key, version, header[3])
+        for slot in self._probe(fingerprint, table.n_slots):
+            found, value, stored_at = self._read_slot(table.mm, slot)
+            if found == _EMPTY:
+                break
+            if found == fingerprint:
+                if self._clock() - stored_at > self.ttl_seconds:
+                    self._count("expirations")
+                    break
+                self._count("hits")
+                return value
+        self._count("misses")
+        return None
+
+    def put(self, key: str, version: str, value: float) -> None:
+        """Mémorise `value` ; remplace le slot le plus ancien si la fenêtre de sondage est pleine."""
+        self._current()  # reprojection éventuelle, hors verrou (elle le prend)
+        with self._write_lock():
+            table = self._table
+            header = _HEADER.unpack_from(table.mm, 0)
+            if header[0] != MAGIC:
+                return  # table remplacée entre-temps : écriture perdue, comme une éviction
+            fingerprint = self._fingerprint(key, version, header[3])
+            now = self._clock()
+            target, oldest = None, None
+            for slot in self._probe(fingerprint, table.n_slots):
+                found, _, stored_at = self._read_slot(table.mm, slot)
+                if found == fingerprint or found == _EMPTY:
+                    target = slot
+                    break
+                if oldest is None or stored_at < oldest[1]:
+                    oldest = (slot, stored_at)
+            if target is None:
+                target = oldest[0]
+                self._count("evictions")
+            self._write_slot(table.mm, target, fingerprint, value, now)
+
+    def clear(self) -> None:
+        """Rend toutes les entrées inaccessibles (nouvelle génération), pour tous les workers."""
+        self._current()
+        with self._write_lock():
+            mm = self._table.mm
+            magic, fmt, n_slots, generation = _HEADER.unpack_from(mm, 0)
+            _HEADER.pack_into(mm, 0, magic, fmt, n_slots, generation + 1)
+            self._count("invalidations")
+
+    def close(self) -> None:
+        for table in (*self._retired, self._table):
+            table.mm.close()
+            os.close(table.fd)
+        os.close(self._lock_fd)
+
+    def stats(self) -> dict:
+        """Configuration et compteurs du processus courant (pour /metrics)."""
+        with self._counts_lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            "backend": "shared",
+            "path": self.path,
+            "n_slots": self.n_slots,
+            "ttl_seconds": self.ttl_seconds,
+            "generation": self._generation(),
+            **counts,
+            "hit_ratio": counts["hits"] / lookups if lookups else 0.0,
+        }
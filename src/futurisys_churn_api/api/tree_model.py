@@ -0,0 +1,331 @@
+"""
+Évaluateur NumPy de l'ensemble d'arbres (sans xgboost / scikit-learn / imblearn au service).
+
+Pourquoi ?
+----------
+Servir un modèle figé n'a pas besoin de toute la pile d'entraînement : l'image et la
+mémoire de chaque worker gonflent, l'import est lent. On **exporte** une fois le modèle
+`models/churn_model.joblib` vers une représentation à plat :
+
+- `<nom>.npy`  : tableau structuré, un enregistrement par nœud (tous arbres confondus) :
+  `feature` (i4), `threshold` (f4), `left` / `right` (i4, indices globaux ; une feuille
+  pointe sur elle-même), `default_left` (u1, branche des valeurs manquantes), `value`
+  (f4, valeur de feuille) ; chargeable en `mmap` (quelques millisecondes) ;
+- `<nom>.json` : métadonnées (racines, profondeur max, marge de base, objectif,
+  noms des features, valeur "manquante", version de l'artefact source).
+
+L'évaluation est vectorisée : au chargement, chaque arbre est déplié en arbre binaire
+**complet** de profondeur `max_depth` (ordre "tas" : enfants de h en 2h+1 / 2h+2 ; une
+feuille peu profonde est recopiée sur ses deux sous-branches). Toutes les lignes d'un bloc
+descendent alors tous les arbres en même temps, un niveau par itération, avec une simple
+arithmétique d'indices. La règle de split est celle de XGBoost : `x < seuil` en float32
+-> gauche ; NaN -> `default_left`.
+
+Un arbre complet compte 2**max_depth feuilles : la profondeur est donc limitée à
+`MAX_TREE_DEPTH` (modèles `grow_policy=lossguide` ou `max_depth=0` trop profonds refusés à
+l'export comme au chargement ; les servir avec `MODEL_BACKEND=joblib`).
+
+Modèles supportés
+-----------------
+`XGBClassifier` (booster gbtree, objectif `binary:logistic`, splits numériques), seul
+ou en dernière étape d'un `Pipeline` sklearn/imblearn dont les autres étapes sont des
+échantillonneurs (SMOTE...) inactifs à la prédiction. Tout autre cas lève `TreeModelError`.
+
+Export (CLI)
+------------
+    python -m futurisys_churn_api.api.tree_model \\
+        --model models/churn_model.joblib --out models/churn_model_trees.npy --check
+
+`--check` compare `predict_proba` des deux implémentations sur `data/data_employees.csv`.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+NODE_DTYPE = np.dtype([
+    ("feature", "<i4"),
+    ("threshold", "<f4"),
+    ("left", "<i4"),
+    ("right", "<i4"),
+    ("default_left", "u1"),
+    ("value", "<f4"),
+])
+EVAL_BLOCK_ROWS = 1024  # (n_lignes x n_arbres) indices par niveau : reste dans le cache CPU
+MAX_TREE_DEPTH = 16  # arbre complet : 2**16 feuilles, ~1 Mo par arbre une fois déplié
+
+
+class TreeModelError(ValueError):
+    """Modèle non exportable ou fichier d'arbres invalide."""
+
+
+def metadata_path(path) -> Path:
+    """Fichier de métadonnées associé à `<nom>.npy` : `<nom>.json`."""
+    return Path(path).with_suffix(".json")
+
+
+# --------------------------
+# Export depuis XGBoost
+# --------------------------
+def _final_estimator(model):
+    """Dernière étape d'un Pipeline ; les autres doivent être des échantillonneurs."""
+    steps = getattr(model, "steps", None)
+    if steps is None:
+        return model
+    for name, step in steps[:-1]:
+        if step is None or step == "passthrough" or hasattr(step, "fit_resample"):
+            continue  # SMOTE & co : aucun effet à la prédiction
+        raise TreeModelError(f"Étape de pipeline non supportée à l'export : '{name}' ({type(step).__name__})")
+    return steps[-1][1]
+
+
+def _check_depth(max_depth: int) -> None:
+    if max_depth > MAX_TREE_DEPTH:
+        raise TreeModelError(
+            f"Profondeur d'arbre {max_depth} > {MAX_TREE_DEPTH} : l'évaluateur NumPy déplie chaque "
+            f"arbre en 2**profondeur nœuds (mémoire prohibitive). Servir ce modèle avec MODEL_BACKEND=joblib."
+        )
+
+
+def _base_margin(base_score: float, objective: str) -> float:
+    if objective == "binary:logistic":
+        return math.log(base_score / (1.0 - base_score))
+    raise TreeModelError(f"Objectif non supporté : {objective}")
+
+
+def compile_trees(model) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Convertit un XGBClassifier binaire (éventuellement en pipeline) en (nœuds, métadonnées).
+
+    Lève
+    ----
+    TreeModelError
+        Booster / objectif / type de split non supporté, ou arbres plus profonds que
+        `MAX_TREE_DEPTH`.
+    """
+    estimator = _final_estimator(model)
+    if not hasattr(estimator, "get_booster"):
+        raise TreeModelError(f"Estimateur non supporté : {type(estimator).__name__} (XGBClassifier attendu)")
+    booster = estimator.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+
+    objective = learner["objective"]["name"]
+    params = learner["learner_model_param"]
+    if int(params.get("num_class", "0")) > 1 or int(params.get("num_target", "1")) != 1:
+        raise TreeModelError("Seuls les modèles binaires à une sortie sont supportés.")
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise TreeModelError(f"Booster non supporté : {gbm['name']}")
+
+    trees = gbm["model"]["trees"]
+    # Early stopping : XGBClassifier.predict_proba n'utilise que les meilleures itérations
+    try:
+        best_iteration = estimator.best_iteration
+    except AttributeError:
+        best_iteration = None
+    if best_iteration is not None:
+        indptr = gbm["model"]["iteration_indptr"]
+        trees = trees[: indptr[best_iteration + 1]]
+
+    n_nodes = sum(len(t["left_children"]) for t in trees)
+    nodes = np.zeros(n_nodes, dtype=NODE_DTYPE)
+    roots, max_depth, offset = [], 0, 0
+    for tree in trees:
+        if any(tree["split_type"]):
+            raise TreeModelError("Splits catégoriels non supportés.")
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        right = np.asarray(tree["right_children"], dtype=np.int64)
+        idx = np.arange(len(left))
+        leaf = left == -1
+        block = nodes[offset: offset + len(left)]
+        block["feature"] = np.where(leaf, 0, tree["split_indices"])
+        block["threshold"] = np.where(leaf, 0.0, tree["split_conditions"])
+        block["left"] = offset + np.where(leaf, idx, left)
+        block["right"] = offset + np.where(leaf, idx, right)
+        block["default_left"] = tree["default_left"]
+        # Feuille : XGBoost stocke la valeur dans split_conditions
+        block["value"] = np.where(leaf, tree["split_conditions"], 0.0)
+
+        depth = np.zeros(len(left), dtype=np.int64)
+        for i in range(len(left)):  # parents avant enfants dans le format XGBoost
+            if not leaf[i]:
+                depth[left[i]] = depth[right[i]] = depth[i] + 1
+        max_depth = max(max_depth, int(depth.max()))
+        roots.append(offset)
+        offset += len(left)
+    _check_depth(max_depth)
+
+    base_score = float(str(params["base_score"]).strip("[]"))
+    missing = getattr(estimator, "missing", np.nan)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "objective": objective,
+        "base_margin": _base_margin(base_score, objective),
+        "n_features": int(params["num_feature"]),
+        "feature_names": learner.get("feature_names") or None,
+        "missing": None if missing is None or np.isnan(missing) else float(missing),
+        "max_depth": max_depth,
+        "roots": roots,
+    }
+    return nodes, meta
+
+
+def export_model(model, out_path, source_version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Écrit `<out>.npy` + `<out>.json` (remplacement atomique : un worker qui a déjà
+    projeté l'ancien fichier en mémoire continue de le lire sans erreur).
+    """
+    nodes, meta = compile_trees(model)
+    meta["source_version"] = source_version
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_npy = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_npy, "wb") as f:
+        np.save(f, nodes)
+    tmp_json = metadata_path(out_path).with_name(metadata_path(out_path).name + ".tmp")
+    tmp_json.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp_npy, out_path)
+    os.replace(tmp_json, metadata_path(out_path))
+    return meta
+
+
+# --------------------------
+# Évaluation
+# --------------------------
+class TreeEnsemble:
+    """Ensemble d'arbres à plat ; `predict_proba` compatible avec l'estimateur d'origine."""
+
+    def __init__(self, nodes: np.ndarray, meta: Dict[str, Any]):
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise TreeModelError(f"Version de format inattendue : {meta.get('format_version')}")
+        if nodes.dtype != NODE_DTYPE:
+            raise TreeModelError(f"Type de nœuds inattendu : {nodes.dtype}")
+        self.meta = meta
+        self.n_features = int(meta["n_features"])
+        self.feature_names: Optional[Sequence[str]] = meta.get("feature_names")
+        self.classes_ = np.array([0, 1])
+        self._roots = np.asarray(meta["roots"], dtype=np.int32)
+        self._max_depth = int(meta["max_depth"])
+        _check_depth(self._max_depth)
+        self._base_margin = float(meta["base_margin"])
+        self._missing = meta.get("missing")
+        self._compile_heap(nodes)
+
+    def _compile_heap(self, nodes: np.ndarray) -> None:
+        """Déplie les arbres en arbres complets (tableaux (n_arbres, 2**D - 1) et (n_arbres, 2**D))."""
+        left, right = np.asarray(nodes["left"]), np.asarray(nodes["right"])
+        levels, current = [], self._roots[:, None]
+        for _ in range(self._max_depth):
+            levels.append(current)
+            # Une feuille pointe sur elle-même : elle se recopie sur ses deux enfants
+            current = np.stack([left[current], right[current]], axis=2).reshape(len(self._roots), -1)
+        internal = np.concatenate(levels, axis=1) if levels else np.empty((len(self._roots), 0), np.int32)
+
+        self._n_internal = internal.shape[1]
+        self._heap_feature = np.ascontiguousarray(nodes["feature"][internal], dtype=np.int64).ravel()
+        self._heap_threshold = np.ascontiguousarray(nodes["threshold"][internal]).ravel()
+        self._heap_default_left = np.asarray(nodes["default_left"][internal], dtype=bool).ravel()
+        self._heap_value = np.ascontiguousarray(nodes["value"][current], dtype=np.float64).ravel()
+        self._n_leaves = current.shape[1]
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "TreeEnsemble":
+        """Charge `<nom>.npy` (projeté en mémoire par défaut) et ses métadonnées."""
+        nodes = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        meta = json.loads(metadata_path(path).read_text(encoding="utf-8"))
+        return cls(nodes, meta)
+
+    @classmethod
+    def from_bytes(cls, npy: bytes, meta_json: bytes) -> "TreeEnsemble":
+        """Construit l'ensemble depuis le contenu déjà lu de `<nom>.npy` et `<nom>.json`."""
+        nodes = np.load(io.BytesIO(npy), allow_pickle=False)
+        return cls(nodes, json.loads(meta_json.decode("utf-8")))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self._roots)
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Valeur de la feuille atteinte dans chaque arbre, forme (n_lignes, n_arbres)."""
+        n_trees = len(self._roots)
+        has_nan = bool(np.isnan(X).any())
+        row_base = (np.arange(X.shape[0], dtype=np.int64) * X.shape[1])[:, None]
+        tree_base = (np.arange(n_trees, dtype=np.int64) * self._n_internal)[None, :]
+        flat_x = X.ravel()
+
+        heap = np.zeros((X.shape[0], n_trees), dtype=np.int64)
+        for _ in range(self._max_depth):
+            node = tree_base + heap
+            x = flat_x[row_base + self._heap_feature[node]]
+            go_right = ~(x < self._heap_threshold[node])
+            if has_nan:
+                go_right = np.where(np.isnan(x), ~self._heap_default_left[node], go_right)
+            heap = 2 * heap + 1 + go_right
+
+        leaf = heap - self._n_internal
+        return self._heap_value[(np.arange(n_trees, dtype=np.int64) * self._n_leaves)[None, :] + leaf]
+
+    def predict_margin(self, X) -> np.ndarray:
+        """Marge brute (log-odds) par ligne."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise TreeModelError(f"Entrée de forme {X.shape} ; {self.n_features} colonnes attendues")
+        if self._missing is not None:
+            X = np.where(X == self._missing, np.float32(np.nan), X)
+
+        margin = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], EVAL_BLOCK_ROWS):
+            block = X[start: start + EVAL_BLOCK_ROWS]
+            margin[start: start + len(block)] = self._leaf_values(np.ascontiguousarray(block)).sum(axis=1)
+        return margin + self._base_margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Probabilités (n, 2) : [P(reste), P(part)], comme `XGBClassifier.predict_proba`."""
+        p = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - p, p])
+
+
+# --------------------------
+# CLI
+# --------------------------
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Exporte churn_model.joblib en arbres NumPy (.npy + .json).")
+    parser.add_argument("--model", default="models/churn_model.joblib")
+    parser.add_argument("--out", default="models/churn_model_trees.npy")
+    parser.add_argument("--check", action="store_true", help="vérifie la parité sur data/data_employees.csv")
+    parser.add_argument("--dataset", default="data/data_employees.csv")
+    parser.add_argument("--features", default="models/input_features.json")
+    args = parser.parse_args(argv)
+
+    import joblib  # dépendances d'entraînement : uniquement à l'export
+
+    from . import inference
+
+    with open(args.model, "rb") as f:
+        content = f.read()
+    model = joblib.load(args.model)
+    meta = export_model(model, args.out, source_version=inference.artifact_version(content))
+    print(f"{len(meta['roots'])} arbres (profondeur max {meta['max_depth']}) écrits dans {args.out}")
+
+    if args.check:
+        import pandas as pd
+
+        from .feature_plan import FeaturePlan
+        from .preprocessing import encode_batch
+
+        with open(args.features, "r", encoding="utf-8") as f:
+            X = encode_batch(pd.read_csv(args.dataset), FeaturePlan.compile(json.load(f)))
+        diff = np.abs(TreeEnsemble.load(args.out).predict_proba(X) - model.predict_proba(X)).max()
+        print(f"Écart max de predict_proba sur {len(X)} lignes : {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Réservation de paquets d'entrées pour les workers parallèles de `batch_predict`.
+
+Pourquoi ?
+----------
+Deux exécutions simultanées de `batch_predict` lisent les mêmes entrées sans sortie et
+les scorent deux fois. En mode parallèle (`--workers N`, sur un ou plusieurs hôtes),
+chaque worker **réserve** un paquet disjoint avant de le scorer :
+
+- PostgreSQL : `SELECT ... FOR UPDATE OF prediction_inputs SKIP LOCKED LIMIT n`. Les
+  lignes restent verrouillées jusqu'au commit des sorties ; les autres workers sautent
+  les lignes verrouillées au lieu de les attendre. Un worker qui meurt libère ses verrous
+  (fin de session) : les lignes redeviennent disponibles.
+  Sous READ COMMITTED, le verrou ne réévalue pas l'anti-jointure : une entrée dont le
+  verrou vient d'être relâché par le commit d'un autre worker peut être verrouillée alors
+  que sa sortie existe déjà (invisible dans l'instantané de la requête). Les sorties des
+  entrées verrouillées sont donc recherchées à nouveau dans une **requête séparée**
+  (nouvel instantané, qui voit ce commit) et ces entrées sont écartées du paquet.
+- SQLite (pas de verrou de ligne) : bail sur une **plage d'ids** (`batch_leases`). Un
+  worker réserve les `n` entrées sans sortie suivant la plus haute plage déjà réservée ;
+  l'unicité de `start_id` départage deux workers concurrents (le perdant réessaie). Un
+  bail expiré (`lease_seconds`) et non terminé est repris par un autre worker ; la
+  terminaison n'est validée que si le worker détient toujours le bail (sinon ses
+  sorties sont annulées).
+
+Les deux stratégies ne considèrent que les entrées d'id > `after_id` (marque haute de la
+version de modèle, cf. `watermarks.py`) et exposent la même interface : `claim(db)`
+renvoie le paquet réservé (lignes brutes) ou None s'il n'y a plus de travail,
+`complete(db, claim)` valide, `release_finished(db)` (avant de lancer les workers)
+oublie les réservations terminées des exécutions précédentes.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Mapping, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import BatchLease, PredictionInput, PredictionOutput
+
+DEFAULT_LEASE_SECONDS = 300.0
+
+
+def unscored_inputs():
+    """SELECT des entrées sans sortie (anti-jointure LEFT JOIN ... IS NULL), par id croissant."""
+    inputs, outputs = PredictionInput.__table__, PredictionOutput.__table__
+    return (
+        select(inputs)
+        .outerjoin(outputs, outputs.c.input_id == inputs.c.id)
+        .where(outputs.c.id.is_(None))
+        .order_by(inputs.c.id)
+    )
+
+
+@dataclass
+class Claim:
+    """Paquet réservé par un worker (`lease_id` : bail SQLite, None sous PostgreSQL)."""
+    rows: List[Mapping[str, Any]]
+    lease_id: Optional[int] = None
+
+
+class SkipLockedClaims:
+    """Réservation par verrous de lignes (`FOR UPDATE SKIP LOCKED`, PostgreSQL)."""
+
+    def __init__(self, chunk_size: int, after_id: int = 0):
+        self.chunk_size = chunk_size
+        self.after_id = after_id
+
+    def statement(self, after_id: Optional[int] = None):
+        inputs = PredictionInput.__table__
+        return (
+            unscored_inputs()
+            .where(inputs.c.id > (self.after_id if after_id is None else after_id))
+            .limit(self.chunk_size)
+            .with_for_update(skip_locked=True, of=inputs)
+        )
+
+    def claim(self, db: Session) -> Optional[Claim]:
+        outputs = PredictionOutput.__table__
+        after_id = self.after_id
+        while True:
+            rows = db.execute(self.statement(after_id)).mappings().all()
+            if not rows:
+                db.rollback()
+                return None
+            # Nouvel instantané : sorties validées par un autre worker depuis la lecture
+            ids = [row["id"] for row in rows]
+            scored = set(db.scalars(select(outputs.c.input_id).where(outputs.c.input_id.in_(ids))))
+            rows = [row for row in rows if row["id"] not in scored]
+            if rows:
+                return Claim(rows)
+            after_id = ids[-1]  # paquet entièrement déjà scoré : on passe à la suite
+
+    def complete(self, db: Session, claim: Claim) -> bool:
+        db.commit()  # sorties + libération des verrous
+        return True
+
+    def release_finished(self, db: Session) -> None:
+        """Rien à faire : les verrous disparaissent au commit."""
+
+
+class LeaseClaims:
+    """Réservation par baux sur des plages d'ids (`batch_leases`, SQLite et autres SGBD)."""
+
+    def __init__(
+        self,
+        chunk_size: int,
+        worker: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        clock: Callable[[], float] = time.time,
+        after_id: int = 0,
+    ):
+        self.chunk_size = chunk_size
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self.after_id = after_id
+
+    def release_finished(self, db: Session) -> None:
+        """
+        Supprime les baux terminés : la prochaine plage repart de `after_id` (ou des baux
+        encore actifs) au lieu de la fin de la dernière exécution, pour ne pas sauter
+        les entrées restées sans sortie sous cette fin.
+        """
+        leases = BatchLease.__table__
+        db.execute(delete(leases).where(leases.c.done.is_(True)))
+        db.commit()
+
+    def _reclaim_expired(self, db: Session) -> Optional[int]:
+        leases = BatchLease.__table__
+        expired = db.execute(
+            select(leases.c.id, leases.c.expires_at)
+            .where(leases.c.done.is_(False), leases.c.expires_at < self.clock())
+            .order_by(leases.c.start_id)
+            .limit(1)
+        ).first()
+        if expired is None:
+            return None
+        taken = db.execute(
+            update(leases)
+            .where(leases.c.id == expired.id, leases.c.expires_at == expired.expires_at)
+            .values(worker=self.worker, expires_at=self.clock() + self.lease_seconds)
+        ).rowcount
+        db.commit()
+        return expired.id if taken == 1 else -1  # -1 : repris par un autre worker, réessayer
+
+    def _lease_next_range(self, db: Session) -> Optional[int]:
+        leases, inputs = BatchLease.__table__, PredictionInput.__table__
+        cursor = max(db.scalar(select(func.max(leases.c.end_id))) or 0, self.after_id)
+        ids = db.scalars(
+            unscored_inputs().with_only_columns(inputs.c.id).where(inputs.c.id > cursor).limit(self.chunk_size)
+        ).all()
+        if not ids:
+            return None
+        try:
+            lease_id = db.execute(
+                insert(leases).values(
+                    start_id=ids[0], end_id=ids[-1], worker=self.worker,
+                    expires_at=self.clock() + self.lease_seconds, done=False,
+                )
+            ).inserted_primary_key[0]
+            # Les baux terminés sous la plus haute plage ne servent plus
+            db.execute(delete(leases).where(leases.c.done.is_(True), leases.c.end_id < cursor))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return -1  # plage réservée entre-temps par un autre worker, réessayer
+        return lease_id
+
+    def claim(self, db: Session) -> Optional[Claim]:
+        leases, inputs = BatchLease.__table__, PredictionInput.__table__
+        while True:
+            lease_id = self._reclaim_expired(db)
+            if lease_id is None:
+                lease_id = self._lease_next_range(db)
+            if lease_id is None:
+                return None
+            if lease_id == -1:
+                continue
+            start_id, end_id = db.execute(
+                select(leases.c.start_id, leases.c.end_id).where(leases.c.id == lease_id)
+            ).one()
+            rows = db.execute(
+                unscored_inputs().where(inputs.c.id.between(start_id, end_id))
+            ).mappings().all()
+            return Claim(rows, lease_id)
+
+    def complete(self, db: Session, claim: Claim) -> bool:
+        """Marque le bail terminé et valide les sorties ; False (rollback) si le bail a été perdu."""
+        leases = BatchLease.__table__
+        kept = db.execute(
+            update(leases)
+            .where(leases.c.id == claim.lease_id, leases.c.worker == self.worker, leases.c.done.is_(False))
+            .values(done=True)
+        ).rowcount
+        if kept != 1:
+            db.rollback()
+            return False
+        db.commit()
+        return True
+
+
+def claims_for(
+    db: Session,
+    chunk_size: int,
+    worker: str,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    after_id: int = 0,
+):
+    """Stratégie adaptée au SGBD de `db` : SKIP LOCKED sous PostgreSQL, baux sinon."""
+    if db.get_bind().dialect.name == "postgresql":
+        return SkipLockedClaims(chunk_size, after_id)
+    return LeaseClaims(chunk_size, worker, lease_seconds, after_id=after_id)
@@ -4,7 +4,8 @@ create_db.py — Outil CLI pour créer la base PostgreSQL et (re)créer les tabl
 Fonctions principales
 ---------------------
 - ensure_database_exists() : vérifie l'existence de la BDD cible ; la crée si besoin.
-- manage_database_tables() : crée les tables SQLAlchemy (avec option --recreate pour drop+create).
+- manage_database_tables() : crée les tables SQLAlchemy (avec option --recreate pour drop+create),
+  puis ajoute aux tables existantes les colonnes / index manquants (`migrate`, sans perte).
 
 Usage
 -----
@@ -32,6 +33,7 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
 
 from futurisys_churn_api.database.connection import Base
+from futurisys_churn_api.database import migrate
 from futurisys_churn_api.database import models  # noqa: F401 (side effect: charge les modèles)
 
 
@@ -83,6 +85,10 @@ def manage_database_tables(engine: Engine, recreate: bool = False) -> None:
     """
     Crée les tables SQLAlchemy (à partir de Base.metadata). Si `recreate=True`, supprime d'abord.
 
+    Sur une base existante, `create_all` ne modifie pas les tables déjà présentes : les
+    colonnes et index ajoutés depuis (ex: `prediction_outputs.request_id`) sont donc
+    appliqués ensuite par `migrate.migrate` (sans perte de données).
+
     Parameters
     ----------
     engine : Engine
@@ -112,6 +118,13 @@ def manage_database_tables(engine: Engine, recreate: bool = False) -> None:
         print("[OK] Tables créées.")
     except Exception as e:
         print(f"[ERREUR] Create tables: {e}")
+        return
+
+    try:
+        for description in migrate.migrate(engine):
+            print(f"[OK] {description}")
+    except migrate.MigrationError as e:
+        print(f"[ERREUR] Mise à niveau du schéma : {e}")
 
 
 def main() -> None:
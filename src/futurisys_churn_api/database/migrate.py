@@ -0,0 +1,228 @@
+"""
+Mise à niveau du schéma d'une base existante, **sans** perte de données.
+
+Pourquoi ?
+----------
+`create_db` (`Base.metadata.create_all`) crée les tables manquantes mais ne touche pas
+aux tables existantes : un index ou une colonne ajouté(e) aux modèles n'arrive jamais
+sur une base déjà en service, sauf `create_db --recreate`, qui efface tout.
+
+Ce script compare la base aux modèles (`database/models.py`) et applique, dans une seule
+transaction, uniquement ce qui manque :
+- tables absentes (avec leurs index) ;
+- colonnes absentes, si elles acceptent NULL (`ALTER TABLE ... ADD COLUMN`) ;
+- index absents (`CREATE [UNIQUE] INDEX`) ;
+- PostgreSQL : trigger `prediction_inputs_notify` (`AFTER INSERT ... FOR EACH STATEMENT`,
+  `NOTIFY prediction_inputs`) attendu par `batch_predict --follow`, qui ne fait que
+  `LISTEN` (ni verrou de table ni droits DDL au démarrage du worker).
+
+Avant un index **unique**, les doublons éventuels sont comptés : la migration s'arrête
+(rien n'est appliqué) sauf avec `--dedupe`, qui conserve la ligne la plus récente (plus
+grand `id`) de chaque groupe. Ex. : plusieurs sorties pour la même entrée avant l'index
+unique sur `prediction_outputs.input_id`.
+
+Usage (BDD de `DATABASE_URL`) :
+    python -m futurisys_churn_api.database.migrate --dry-run   # affiche le plan
+    python -m futurisys_churn_api.database.migrate
+    python -m futurisys_churn_api.database.migrate --dedupe
+
+NB : sous PostgreSQL, `CREATE INDEX` bloque les écritures sur la table pendant la
+construction de l'index : lancer la migration hors des heures de charge.
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass
+from typing import Callable, List
+
+from sqlalchemy import and_, delete, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex, Index, Table
+
+from futurisys_churn_api.database import connection
+from futurisys_churn_api.database.connection import Base
+from futurisys_churn_api.database import models  # noqa: F401 (side effect: charge les modèles)
+
+
+NOTIFY_CHANNEL = "prediction_inputs"
+NOTIFY_TRIGGER = "prediction_inputs_notify"
+
+NOTIFY_TRIGGER_DDL = (
+    f"""
+    CREATE OR REPLACE FUNCTION notify_prediction_inputs() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', '');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE TRIGGER {NOTIFY_TRIGGER} AFTER INSERT ON prediction_inputs
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_prediction_inputs()
+    """,
+)
+
+
+class MigrationError(RuntimeError):
+    """Migration impossible sans intervention (colonne NOT NULL, doublons...)."""
+
+
+@dataclass(frozen=True)
+class MigrationStep:
+    """Une opération du plan : description lisible (DDL) + fonction d'application."""
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def count_duplicates(conn: Connection, index: Index) -> int:
+    """Nombre de lignes en trop (hors NULL) pour les colonnes de `index`."""
+    cols = list(index.columns)
+    groups = (
+        select(func.count().label("n"))
+        .where(and_(*[c.is_not(None) for c in cols]))
+        .group_by(*cols)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    return conn.execute(select(func.coalesce(func.sum(groups.c.n - 1), 0))).scalar_one()
+
+
+def delete_duplicates(conn: Connection, index: Index) -> None:
+    """Supprime les doublons de `index`, en gardant la ligne de plus grand `id` par groupe."""
+    table, cols = index.table, list(index.columns)
+    not_null = and_(*[c.is_not(None) for c in cols])
+    keep = select(func.max(table.c.id)).where(not_null).group_by(*cols)
+    conn.execute(delete(table).where(not_null, table.c.id.not_in(keep)))
+
+
+def _column_steps(engine: Engine, table: Table, existing: set) -> List[MigrationStep]:
+    steps = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            raise MigrationError(
+                f"Colonne {table.name}.{column.name} NOT NULL absente : migration manuelle requise"
+            )
+        ddl = (
+            f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+            f"{column.type.compile(dialect=engine.dialect)}"
+        )
+        steps.append(MigrationStep(ddl, lambda conn, ddl=ddl: conn.execute(text(ddl))))
+    return steps
+
+
+def _index_steps(conn: Connection, table: Table, existing: set, dedupe: bool) -> List[MigrationStep]:
+    steps = []
+    for index in sorted(table.indexes, key=lambda i: i.name):
+        if index.name in existing:
+            continue
+        if index.unique:
+            duplicates = count_duplicates(conn, index)
+            if duplicates and not dedupe:
+                raise MigrationError(
+                    f"{duplicates} doublon(s) empêchent l'index unique {index.name} "
+                    "(relancer avec --dedupe pour garder la ligne la plus récente)"
+                )
+            if duplicates:
+                steps.append(MigrationStep(
+                    f"DELETE FROM {table.name} : {duplicates} doublon(s) de {index.name}",
+                    lambda conn, index=index: delete_duplicates(conn, index),
+                ))
+        ddl = str(CreateIndex(index).compile(dialect=conn.dialect))
+        steps.append(MigrationStep(ddl, lambda conn, index=index: index.create(conn)))
+    return steps
+
+
+def notify_trigger_installed(conn: Connection) -> bool:
+    """Le trigger NOTIFY de `prediction_inputs` existe-t-il ? (PostgreSQL, lecture seule)"""
+    return conn.execute(
+        text("SELECT 1 FROM pg_trigger WHERE tgname = :name AND NOT tgisinternal"),
+        {"name": NOTIFY_TRIGGER},
+    ).first() is not None
+
+
+def _notify_steps(conn: Connection) -> List[MigrationStep]:
+    if conn.dialect.name != "postgresql" or notify_trigger_installed(conn):
+        return []
+
+    def apply(conn: Connection) -> None:
+        for ddl in NOTIFY_TRIGGER_DDL:
+            conn.execute(text(ddl))
+
+    return [MigrationStep(f"CREATE TRIGGER {NOTIFY_TRIGGER} (NOTIFY {NOTIFY_CHANNEL})", apply)]
+
+
+def plan_migration(engine: Engine, dedupe: bool = False) -> List[MigrationStep]:
+    """
+    Opérations nécessaires pour aligner la base de `engine` sur les modèles.
+
+    Lève
+    ----
+    MigrationError
+        Colonne NOT NULL manquante, ou doublons bloquant un index unique (sans `dedupe`).
+    """
+    insp = inspect(engine)
+    tables = set(insp.get_table_names())
+    steps: List[MigrationStep] = []
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                steps.append(MigrationStep(
+                    f"CREATE TABLE {table.name}", lambda conn, table=table: table.create(conn)
+                ))
+                continue
+            columns = {c["name"] for c in insp.get_columns(table.name)}
+            indexes = {i["name"] for i in insp.get_indexes(table.name)}
+            steps += _column_steps(engine, table, columns)
+            steps += _index_steps(conn, table, indexes, dedupe)
+        steps += _notify_steps(conn)
+    return steps
+
+
+def migrate(engine: Engine, dry_run: bool = False, dedupe: bool = False) -> List[str]:
+    """
+    Applique (sauf `dry_run`) le plan de migration dans une transaction ; renvoie les
+    descriptions des opérations.
+
+    Lève
+    ----
+    MigrationError
+        cf. `plan_migration` (rien n'est appliqué).
+    """
+    steps = plan_migration(engine, dedupe=dedupe)
+    if steps and not dry_run:
+        with engine.begin() as conn:
+            for step in steps:
+                step.apply(conn)
+    return [step.description for step in steps]
+
+
+def main() -> None:
+    """Point d'entrée CLI."""
+    parser = argparse.ArgumentParser(description="Ajoute tables, colonnes et index manquants (sans perte).")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche le plan sans l'appliquer.")
+    parser.add_argument(
+        "--dedupe", action="store_true",
+        help="Supprime les doublons qui empêchent un index unique (garde le plus grand id).",
+    )
+    args = parser.parse_args()
+
+    if connection.engine is None:
+        print("[x] Base désactivée ou injoignable (DATABASE_ENABLED / DATABASE_URL).")
+        sys.exit(1)
+    try:
+        done = migrate(connection.engine, dry_run=args.dry_run, dedupe=args.dedupe)
+    except MigrationError as e:
+        print(f"[ERREUR] {e}")
+        sys.exit(1)
+
+    if not done:
+        print("[OK] Schéma à jour.")
+        return
+    for description in done:
+        print(f"{'[plan]' if args.dry_run else '[OK]'} {description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,26 @@ Tables
 - users               : comptes API (authentification / rôles)
 - prediction_inputs   : toutes les données d'entrée envoyées au modèle
 - prediction_outputs  : résultat du modèle pour une entrée donnée
+- batch_leases        : plages d'ids réservées par les workers de `batch_predict --workers`
+- scoring_watermarks  : dernier id d'entrée scoré (sans trou) par version de modèle
 
 Relations (simplifiées)
 -----------------------
 - prediction_inputs.user_id  -> users.id           (plusieurs inputs peuvent appartenir à un même user)
 - prediction_outputs.input_id -> prediction_inputs.id  (1–1 : une sortie par entrée)
 - prediction_outputs.user_id  -> users.id          (qui a lancé la prédiction)
+
+Index (cf. motifs de requêtes)
+------------------------------
+- prediction_outputs.input_id  : **unique** (relation 1–1) — anti-jointure de `batch_predict`,
+  jointures sorties -> entrées ; interdit aussi une seconde sortie pour la même entrée ;
+- prediction_outputs.timestamp : tri de `export_latest_predictions` ;
+- prediction_outputs.user_id, prediction_inputs.user_id : historique par utilisateur.
+Base existante : `python -m futurisys_churn_api.database.migrate` (sans perte de données).
 """
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from .connection import Base
@@ -31,7 +41,7 @@ class PredictionInput(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     age = Column(Integer)
     revenu_mensuel = Column(Integer)
     nombre_experiences_precedentes = Column(Integer)
@@ -86,14 +96,17 @@ class PredictionOutput(Base):
     """
     Sortie du modèle pour une entrée donnée.
 
-    Contient la prédiction binaire (0/1) et la probabilité associée.
+    Contient la prédiction binaire (0/1) et la probabilité associée, ainsi que le
+    `request_id` de la requête (en-tête `X-Request-ID`), seul identifiant renvoyé
+    au client en mode d'écriture différée (`AUDIT_WRITE_BEHIND`).
     """
     __tablename__ = "prediction_outputs"
 
     id = Column(Integer, primary_key=True, index=True)
-    input_id = Column(Integer, ForeignKey("prediction_inputs.id"))
-    user_id = Column(Integer, ForeignKey("users.id"))
-    timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    input_id = Column(Integer, ForeignKey("prediction_inputs.id"), unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    request_id = Column(String(64), index=True)
+    timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
     prediction = Column(Integer)
     churn_probability = Column(Float)
     
@@ -101,3 +114,39 @@ class PredictionOutput(Base):
     input = relationship("PredictionInput", back_populates="output")
     user = relationship("User", back_populates="predictions")
 
+
+class BatchLease(Base):
+    """
+    Bail d'un worker de scoring sur une plage d'ids de `prediction_inputs` (SQLite).
+
+    Deux workers ne peuvent pas réserver la même plage (`start_id` unique) ; un bail non
+    terminé dont `expires_at` (epoch, secondes) est dépassé peut être repris par un autre
+    worker (crash, arrêt brutal). Sous PostgreSQL, les workers réservent les lignes par
+    `FOR UPDATE SKIP LOCKED` et n'utilisent pas cette table.
+    """
+    __tablename__ = "batch_leases"
+    __table_args__ = (UniqueConstraint("start_id", name="uq_batch_leases_start_id"),)
+
+    id = Column(Integer, primary_key=True)
+    start_id = Column(Integer, nullable=False)
+    end_id = Column(Integer, nullable=False, index=True)
+    worker = Column(String(128), nullable=False)
+    expires_at = Column(Float, nullable=False)
+    done = Column(Boolean, nullable=False, default=False)
+
+
+class ScoringWatermark(Base):
+    """
+    Marque haute de `batch_predict` pour une version de modèle.
+
+    `last_input_id` : toutes les entrées d'id <= cette valeur ont une sortie (à des trous
+    près : entrée validée tardivement avec un id plus petit, cf. réconciliation) ; les
+    exécutions suivantes ne cherchent du travail qu'au-delà. `reconciled_at` (epoch, s) :
+    fin de la dernière passe complète, qui rattrape ces trous.
+    """
+    __tablename__ = "scoring_watermarks"
+
+    model_version = Column(String(64), primary_key=True)
+    last_input_id = Column(Integer, nullable=False, default=0)
+    reconciled_at = Column(Float, nullable=True)
+    updated_at = Column(Float, nullable=False)
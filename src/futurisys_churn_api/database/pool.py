@@ -0,0 +1,241 @@
+"""
+Pool de connexions configurable et instrumenté.
+
+Pourquoi ?
+----------
+`create_engine(DATABASE_URL, pool_pre_ping=True)` laissait les tailles de pool par défaut
+(5 + 10), pingait la base à **chaque** emprunt de connexion et ne disait rien d'un pool
+épuisé (requêtes qui attendent `pool_timeout` secondes avant d'échouer).
+
+Ce module fournit :
+- `PoolConfig` : taille, débordement, délai d'attente, recyclage et politique de pre-ping
+  (lus dans l'environnement par `connection.py`, variables `DB_POOL_*`) ;
+- `engine_options` : les arguments de `create_engine` adaptés au SGBD ;
+- des classes de pool instrumentées (`InstrumentedQueuePool`...) qui mesurent la durée de
+  chaque emprunt (`PoolMonitor`) : nombre d'emprunts, attentes sur pool épuisé, délais
+  dépassés, histogramme de latence ;
+- `pool_stats` : état courant du pool + mesures, exporté sur `/metrics` (composant `db_pool`).
+
+SQLite (un seul écrivain)
+-------------------------
+SQLite n'accepte qu'une transaction d'écriture à la fois ; le pool n'y change rien. La
+configuration par défaut vise à ce que cette contrainte ne se traduise pas en erreurs :
+- `PRAGMA journal_mode=WAL` : les lectures ne bloquent pas l'écrivain (et réciproquement) ;
+- `PRAGMA busy_timeout` : un second écrivain attend le verrou au lieu d'échouer
+  immédiatement ("database is locked") ;
+- pas de pre-ping (fichier local, pas de connexion réseau à valider) ;
+- base en mémoire : une seule connexion partagée (`StaticPool`), sinon chaque connexion
+  verrait une base vide différente.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+# Bornes supérieures (ms) des classes de l'histogramme de latence d'emprunt
+CHECKOUT_BUCKETS_MS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+PRE_PING_POLICIES = ("auto", "true", "false")
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Réglages du pool (cf. variables `DB_POOL_*` de `connection.py`)."""
+    size: int = 5
+    max_overflow: int = 10
+    timeout: float = 30.0
+    recycle: int = 1800
+    pre_ping: str = "auto"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_journal_mode: str = "wal"
+
+    def pre_ping_enabled(self, url: str) -> bool:
+        """
+        Politique de pre-ping pour `url` : "auto" = oui sauf SQLite.
+
+        Lève
+        ----
+        ValueError
+            Si `pre_ping` n'est pas dans `PRE_PING_POLICIES`.
+        """
+        if self.pre_ping not in PRE_PING_POLICIES:
+            raise ValueError(
+                f"DB_POOL_PRE_PING inconnue : {self.pre_ping!r} (attendu {', '.join(PRE_PING_POLICIES)})"
+            )
+        if self.pre_ping == "auto":
+            return not is_sqlite(url)
+        return self.pre_ping == "true"
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+class PoolMonitor:
+    """Mesures des emprunts de connexion d'un pool (thread-safe)."""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = CHECKOUT_BUCKETS_MS):
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(self.buckets_ms) + 1)  # dernière classe : +Inf
+        self._checkouts = 0
+        self._timeouts = 0
+        self._waits = 0
+        self._wait_ms_sum = 0.0
+        self._checkout_ms_sum = 0.0
+        self._checkout_ms_max = 0.0
+
+    def record(self, elapsed_ms: float, waited: bool, timed_out: bool = False) -> None:
+        """Enregistre un emprunt de `elapsed_ms` ; `waited` = pool épuisé à la demande."""
+        with self._lock:
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._checkouts += 1
+                self._checkout_ms_sum += elapsed_ms
+                self._checkout_ms_max = max(self._checkout_ms_max, elapsed_ms)
+                self._bucket_counts[bisect_left(self.buckets_ms, elapsed_ms)] += 1
+            if waited:
+                self._waits += 1
+                self._wait_ms_sum += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs, latences et histogramme cumulé (`le` en ms, format Prometheus)."""
+        with self._lock:
+            histogram, total = {}, 0
+            for bound, count in zip(self.buckets_ms + (float("inf"),), self._bucket_counts):
+                total += count
+                histogram["+Inf" if bound == float("inf") else f"{bound:g}"] = total
+            return {
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "waits": self._waits,
+                "wait_ms_sum": self._wait_ms_sum,
+                "checkout_ms_sum": self._checkout_ms_sum,
+                "checkout_ms_max": self._checkout_ms_max,
+                "checkout_ms_avg": self._checkout_ms_sum / self._checkouts if self._checkouts else 0.0,
+                "checkout_ms_histogram": histogram,
+            }
+
+
+class _InstrumentedPool:
+    """Mixin : chronomètre `connect()` et transmet le moniteur au pool recréé (`dispose`)."""
+
+    monitor: Optional[PoolMonitor] = None
+
+    def _exhausted(self) -> bool:
+        if not hasattr(self, "checkedout"):  # StaticPool : connexion unique partagée
+            return False
+        return self.checkedin() == 0 and self.checkedout() >= self.size() + max(self._max_overflow, 0)
+
+    def connect(self):
+        monitor = self.monitor
+        if monitor is None:
+            return super().connect()
+        waited = self._exhausted()
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            monitor.record((time.perf_counter() - start) * 1000.0, waited=True, timed_out=True)
+            raise
+        monitor.record((time.perf_counter() - start) * 1000.0, waited=waited)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    """`QueuePool` (engine synchrone) instrumenté."""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool` (engine asynchrone) instrumenté."""
+
+
+class InstrumentedStaticPool(_InstrumentedPool, StaticPool):
+    """`StaticPool` (SQLite en mémoire) instrumenté."""
+
+
+def engine_options(url: str, config: PoolConfig, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Arguments de pool pour `create_engine` / `create_async_engine`.
+
+    Lève
+    ----
+    ValueError
+        Politique de pre-ping inconnue.
+    """
+    options: Dict[str, Any] = {
+        "pool_pre_ping": config.pre_ping_enabled(url),
+        "pool_recycle": config.recycle,
+    }
+    if is_sqlite_memory(url):
+        options["poolclass"] = InstrumentedStaticPool
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=config.size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.timeout,
+    )
+    return options
+
+
+def attach_monitor(engine) -> PoolMonitor:
+    """Branche un `PoolMonitor` sur le pool de `engine` (sync ou async) ; le renvoie."""
+    pool = getattr(engine, "sync_engine", engine).pool
+    pool.monitor = PoolMonitor()
+    return pool.monitor
+
+
+def configure_sqlite(engine, config: PoolConfig) -> None:
+    """Applique `journal_mode` et `busy_timeout` à chaque nouvelle connexion SQLite."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if config.sqlite_journal_mode:
+                cursor.execute(f"PRAGMA journal_mode={config.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA busy_timeout={int(config.sqlite_busy_timeout_ms)}")
+        finally:
+            cursor.close()
+
+
+def pool_stats(engine) -> Optional[Dict[str, Any]]:
+    """État du pool de `engine` (occupation, configuration) + mesures du moniteur."""
+    if engine is None:
+        return None
+    pool = getattr(engine, "sync_engine", engine).pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__, "pre_ping": bool(pool._pre_ping)}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            recycle=pool._recycle,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    monitor = getattr(pool, "monitor", None)
+    if monitor is not None:
+        stats.update(monitor.stats())
+    return stats
@@ -0,0 +1,332 @@
+"""
+Scoring continu : `batch_predict --follow` (processus de longue durée).
+
+Pourquoi ?
+----------
+Sans ce mode, les entrées insérées hors de `/predict` (import, `seed_db`, autre
+application) n'ont de score qu'au prochain lancement manuel ou cron de `batch_predict`.
+Le worker continu les **draine au fil de l'eau**, par micro-lots :
+
+- il attend du travail par sondage (`--poll-seconds`) ou, sous PostgreSQL, par
+  `LISTEN prediction_inputs` : un trigger `AFTER INSERT ... FOR EACH STATEMENT` (installé
+  par `migrate` / `create_db`, jamais par le worker) envoie un `NOTIFY` à chaque insertion ;
+  le sondage reste actif en filet de sécurité (notification perdue pendant une
+  reconnexion). Trigger absent : sondage seul ;
+- un micro-lot part dès que `--chunk-size` entrées attendent, ou que la plus ancienne
+  attend depuis `--max-latency` secondes (même compromis latence / débit que
+  `api/micro_batching.py`) ;
+- il repart de la marque haute (cf. `watermarks.py`), l'avance après chaque lot et
+  réconcilie périodiquement les trous sous la marque (`--reconcile-hours`).
+
+Retard (lag)
+------------
+À chaque cycle, une requête mesure l'arriéré au-delà de la marque : nombre d'entrées
+sans sortie (`backlog`) et âge de la plus ancienne (`oldest_unscored_age_s`, d'après
+`prediction_inputs.timestamp`). Ces valeurs, les compteurs du worker et sa configuration
+sont publiés dans les métriques du processus (composant `scoring_worker`, cf.
+`api/metrics.py`), servies en JSON sur `GET /metrics` avec `--metrics-port`.
+
+Comme `batch_predict` sans `--workers`, le worker suppose être seul à scorer la base
+(ne pas le combiner avec un cron `batch_predict`).
+
+Usage :
+    python -m futurisys_churn_api.database.batch_predict --follow --max-latency 5
+    python -m futurisys_churn_api.database.batch_predict --follow --metrics-port 9108
+"""
+
+import json
+import select as io_select
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from futurisys_churn_api.api import metrics
+from futurisys_churn_api.api.model_registry import LoadedModel
+from futurisys_churn_api.database import batch_claims, batch_predict, watermarks
+from futurisys_churn_api.database.migrate import NOTIFY_CHANNEL, notify_trigger_installed
+from futurisys_churn_api.database.models import PredictionInput
+
+DEFAULT_MAX_LATENCY_SECONDS = 5.0
+DEFAULT_POLL_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class Lag:
+    """Arriéré au-delà de la marque haute (âge None : aucune entrée, ou horodatage absent)."""
+    backlog: int
+    oldest_unscored_age_s: Optional[float]
+
+
+def _epoch(ts: datetime) -> float:
+    # SQLite renvoie des datetimes naïfs : ils sont enregistrés en UTC (cf. models.py)
+    return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def measure_lag(db: Session, after_id: int = 0, now: Optional[float] = None) -> Lag:
+    """Nombre d'entrées sans sortie d'id > `after_id` et âge (s) de la plus ancienne ; une requête."""
+    inputs = PredictionInput.__table__
+    pending = (
+        batch_claims.unscored_inputs()
+        .with_only_columns(inputs.c.id, inputs.c.timestamp)
+        .where(inputs.c.id > after_id)
+        .order_by(None)
+        .subquery()
+    )
+    count, oldest = db.execute(select(func.count(), func.min(pending.c.timestamp))).one()
+    if oldest is None:
+        return Lag(count, None)
+    return Lag(count, max(0.0, (time.time() if now is None else now) - _epoch(oldest)))
+
+
+# ---------- Attente de nouvelles entrées ----------
+
+class PollWaiter:
+    """Attente par sondage : dort jusqu'au prochain cycle (interrompue par `stop`)."""
+
+    mode = "poll"
+
+    def __init__(self, stop: threading.Event):
+        self.stop = stop
+
+    def wait(self, timeout: float) -> None:
+        self.stop.wait(timeout)
+
+    def close(self) -> None:
+        pass
+
+
+class PgNotifyWaiter:
+    """
+    Attente sur `LISTEN prediction_inputs` (PostgreSQL, psycopg2), sur une connexion dédiée
+    hors du pool (`raw` : `engine.raw_connection()`) ; `wait` rend la main à la première
+    notification ou au bout de `timeout`.
+    """
+
+    mode = "listen"
+
+    def __init__(self, raw, stop: threading.Event):
+        self.stop = stop
+        self._raw = raw
+        self._conn = self._raw.dbapi_connection
+        self._conn.autocommit = True
+        with self._conn.cursor() as cur:
+            cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+    def wait(self, timeout: float) -> None:
+        if self.stop.is_set():
+            return
+        if self._conn.notifies or io_select.select([self._conn], [], [], timeout)[0]:
+            self._conn.poll()
+            self._conn.notifies.clear()
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+def make_waiter(engine: Engine, stop: threading.Event, listen: bool = True):
+    """LISTEN/NOTIFY sous PostgreSQL (psycopg2) si le trigger est installé, sondage sinon."""
+    if listen and engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        try:
+            with engine.connect() as conn:
+                installed = notify_trigger_installed(conn)
+            if installed:
+                return PgNotifyWaiter(engine.raw_connection(), stop)
+            print("[i] Trigger NOTIFY absent (lancer `migrate`) : sondage.")
+        except Exception as e:
+            print(f"[i] LISTEN/NOTIFY indisponible ({e}) : sondage.")
+    return PollWaiter(stop)
+
+
+# ---------- Boucle de scoring ----------
+
+class ContinuousScorer:
+    """
+    Draine les entrées sans sortie par micro-lots ; un appel à `step` = un cycle.
+
+    Paramètres
+    ----------
+    session_factory : callable
+        Fabrique de sessions (une session par cycle).
+    loaded : LoadedModel
+        Modèle et `FeaturePlan` (version = clé de la marque haute).
+    chunk_size : int
+        Taille maximale d'un micro-lot ; un lot plein part sans attendre.
+    max_latency : float
+        Attente maximale (s) d'une entrée avant le départ d'un lot incomplet.
+    poll_seconds : float
+        Intervalle de sondage quand rien n'attend.
+    reconcile_seconds : float
+        Intervalle entre deux réconciliations des trous sous la marque.
+    clock : callable
+        Horloge (epoch, s), injectable pour les tests.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        loaded: LoadedModel,
+        chunk_size: int = batch_predict.DEFAULT_CHUNK_SIZE,
+        max_latency: float = DEFAULT_MAX_LATENCY_SECONDS,
+        poll_seconds: float = DEFAULT_POLL_SECONDS,
+        reconcile_seconds: float = watermarks.DEFAULT_RECONCILE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size doit être >= 1")
+        self.session_factory = session_factory
+        self.loaded = loaded
+        self.chunk_size = chunk_size
+        self.max_latency = max_latency
+        self.poll_seconds = poll_seconds
+        self.reconcile_seconds = reconcile_seconds
+        self.clock = clock
+        self.mode = "poll"
+        self.lag = Lag(0, None)
+        self.last_input_id = 0
+        self._lock = threading.Lock()
+        self._counters = {"cycles": 0, "batches": 0, "scored": 0, "reconciliations": 0, "errors": 0}
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def _due(self, lag: Lag) -> bool:
+        if lag.backlog >= self.chunk_size:
+            return True
+        # Âge inconnu (horodatage absent) : pas de raison d'attendre
+        return lag.backlog > 0 and (lag.oldest_unscored_age_s is None or lag.oldest_unscored_age_s >= self.max_latency)
+
+    def step(self) -> float:
+        """
+        Un cycle : réconciliation si elle est due, mesure du retard, micro-lot(s) si
+        l'arriéré est plein ou trop ancien. Renvoie l'attente (s) avant le cycle suivant.
+        """
+        self._count("cycles")
+        version = self.loaded.version
+        with self.session_factory() as db:
+            mark = watermarks.get_watermark(db, version)
+            mark_id = mark.last_input_id if mark else 0
+            if watermarks.needs_reconciliation(mark, self.reconcile_seconds, self.clock):
+                if mark_id:
+                    self._count("scored", batch_predict.score_unscored(db, self.loaded, self.chunk_size, until_id=mark_id))
+                watermarks.save_watermark(db, version, mark_id, reconciled=True, clock=self.clock)
+                db.commit()
+                self._count("reconciliations")
+
+            lag = measure_lag(db, mark_id, self.clock())
+            if self._due(lag):
+                # Draine tout l'arriéré (y compris ce qui arrive pendant) : lots pleins, puis le reste
+                scored = batch_predict.score_unscored(
+                    db, self.loaded, self.chunk_size, after_id=mark_id, advance_version=version
+                )
+                self._count("batches", -(-scored // self.chunk_size))
+                self._count("scored", scored)
+                mark_id = batch_predict.finish_watermark(db, version, reconciled=False)
+                lag = measure_lag(db, mark_id, self.clock())
+            with self._lock:
+                self.lag, self.last_input_id = lag, mark_id
+
+        if lag.backlog == 0 or lag.oldest_unscored_age_s is None:
+            return self.poll_seconds
+        return max(0.0, min(self.poll_seconds, self.max_latency - lag.oldest_unscored_age_s))
+
+    def stats(self) -> Dict[str, Any]:
+        """Collecteur `/metrics` : retard, compteurs et configuration."""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "model_version": self.loaded.version,
+                "backlog": self.lag.backlog,
+                "oldest_unscored_age_s": self.lag.oldest_unscored_age_s,
+                "last_input_id": self.last_input_id,
+                **self._counters,
+                "chunk_size": self.chunk_size,
+                "max_latency_s": self.max_latency,
+                "poll_s": self.poll_seconds,
+            }
+
+    def run(self, waiter, stop: threading.Event) -> None:
+        """Enchaîne les cycles jusqu'à `stop` ; une erreur de cycle est comptée et retentée."""
+        self.mode = waiter.mode
+        while not stop.is_set():
+            try:
+                delay = self.step()
+            except Exception as e:
+                self._count("errors")
+                print(f"[ERREUR] {e} (nouvel essai dans {self.poll_seconds:g} s)")
+                delay = self.poll_seconds
+            if delay > 0:
+                waiter.wait(delay)
+
+
+# ---------- Exposition des métriques ----------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = json.dumps(metrics.snapshot()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pas de ligne de log par requête de scraping
+        pass
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Sert `GET /metrics` (JSON, même format que l'API) dans un thread démon."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="scoring-worker-metrics", daemon=True).start()
+    return server
+
+
+def follow(
+    chunk_size: int = batch_predict.DEFAULT_CHUNK_SIZE,
+    max_latency: float = DEFAULT_MAX_LATENCY_SECONDS,
+    poll_seconds: float = DEFAULT_POLL_SECONDS,
+    reconcile_seconds: float = watermarks.DEFAULT_RECONCILE_SECONDS,
+    metrics_port: Optional[int] = None,
+    listen: bool = True,
+    session_factory: Optional[sessionmaker] = None,
+    stop: Optional[threading.Event] = None,
+) -> ContinuousScorer:
+    """
+    Lance le worker continu jusqu'à SIGINT/SIGTERM (ou `stop`) ; renvoie le scorer (bilan).
+    """
+    loaded = batch_predict.load_artifacts()
+    session_factory = session_factory or batch_predict.get_session_factory()
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+
+    scorer = ContinuousScorer(session_factory, loaded, chunk_size, max_latency, poll_seconds, reconcile_seconds)
+    metrics.register_collector("scoring_worker", scorer.stats)
+    server = serve_metrics(metrics_port) if metrics_port else None
+    waiter = make_waiter(session_factory.kw["bind"], stop, listen)
+    print(
+        f"[OK] Scoring continu ({waiter.mode}) : modèle {loaded.version}, lots de {chunk_size}, "
+        f"latence max {max_latency:g} s{f', métriques :{metrics_port}/metrics' if server else ''}."
+    )
+    try:
+        scorer.run(waiter, stop)
+    finally:
+        waiter.close()
+        if server is not None:
+            server.shutdown()
+        metrics.unregister_collector("scoring_worker")
+        stats = scorer.stats()
+        print(f"[i] Arrêt : {stats['scored']} prédictions en {stats['batches']} lot(s).")
+    return scorer
@@ -0,0 +1,105 @@
+"""
+Marque haute (watermark) de `batch_predict` : ne chercher du travail qu'au-delà.
+
+Pourquoi ?
+----------
+Trouver les entrées sans sortie par anti-jointure depuis le début de `prediction_inputs`
+coûte de plus en plus cher à mesure que l'historique grandit, même quand seules quelques
+lignes sont nouvelles (la plupart des entrées de `/predict` ont déjà leur sortie).
+
+Une ligne de `scoring_watermarks` par version de modèle retient `last_input_id` : toutes
+les entrées d'id <= cette valeur ont une sortie. Une exécution incrémentale ne parcourt
+que `id > last_input_id` (parcours de la clé primaire + index unique des sorties) : son
+coût dépend du nombre de nouvelles entrées, pas de la taille de la table.
+
+Trous et réconciliation
+-----------------------
+Une entrée validée après une entrée d'id plus grand (transactions concurrentes sous
+PostgreSQL : l'id est attribué à l'INSERT, visible au COMMIT) peut se retrouver sous la
+marque sans sortie. Une passe de **réconciliation** (ids <= marque) les rattrape : automatiquement
+à la première exécution d'une version de modèle, puis toutes les `reconcile_every`
+secondes (`reconciled_at`), ou à la demande (`batch_predict --full`).
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import PredictionInput, PredictionOutput, ScoringWatermark
+
+DEFAULT_RECONCILE_SECONDS = 24 * 3600.0
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """État persistant pour une version de modèle."""
+    model_version: str
+    last_input_id: int
+    reconciled_at: Optional[float]
+
+
+def get_watermark(db: Session, model_version: str) -> Optional[Watermark]:
+    """Marque de `model_version`, ou None si cette version n'a jamais tourné."""
+    marks = ScoringWatermark.__table__
+    row = db.execute(
+        select(marks.c.last_input_id, marks.c.reconciled_at).where(marks.c.model_version == model_version)
+    ).first()
+    if row is None:
+        return None
+    return Watermark(model_version, row.last_input_id, row.reconciled_at)
+
+
+def save_watermark(
+    db: Session,
+    model_version: str,
+    last_input_id: int,
+    reconciled: bool = False,
+    clock: Callable[[], float] = time.time,
+) -> None:
+    """Enregistre (sans commit) la marque ; `reconciled=True` date aussi la passe complète."""
+    marks = ScoringWatermark.__table__
+    now = clock()
+    values = {"last_input_id": last_input_id, "updated_at": now}
+    if reconciled:
+        values["reconciled_at"] = now
+    updated = db.execute(
+        update(marks).where(marks.c.model_version == model_version).values(**values)
+    ).rowcount
+    if updated == 0:
+        db.execute(insert(marks).values(model_version=model_version, **values))
+
+
+def next_watermark(db: Session, after_id: int) -> int:
+    """
+    Plus grand id tel que toutes les entrées de (`after_id`, id] aient une sortie.
+
+    Une seule requête (un seul instantané) : juste avant la première entrée sans sortie
+    au-delà de `after_id`, sinon le plus grand id de la table. Coût proportionnel aux
+    entrées au-delà de `after_id`.
+    """
+    inputs, outputs = PredictionInput.__table__, PredictionOutput.__table__
+    first_unscored = (
+        select(inputs.c.id)
+        .outerjoin(outputs, outputs.c.input_id == inputs.c.id)
+        .where(inputs.c.id > after_id, outputs.c.id.is_(None))
+        .order_by(inputs.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    last_id = select(func.max(inputs.c.id)).scalar_subquery()
+    candidate = db.scalar(select(func.coalesce(first_unscored - 1, last_id, after_id)))
+    return max(candidate, after_id)
+
+
+def needs_reconciliation(
+    mark: Optional[Watermark],
+    every_seconds: float = DEFAULT_RECONCILE_SECONDS,
+    clock: Callable[[], float] = time.time,
+) -> bool:
+    """Passe complète requise : version jamais réconciliée, ou dernière passe trop ancienne."""
+    if mark is None or mark.reconciled_at is None:
+        return True
+    return clock() - mark.reconciled_at >= every_seconds
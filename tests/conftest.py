@@ -4,6 +4,7 @@ Fichier de configuration Pytest (chargé automatiquement par pytest).
 Il définit des *fixtures* réutilisables pour tous les tests :
 - client_no_db : client d'API authentifié, sans base de données (mode "mock").
 - client_with_db : client d'API authentifié, avec base SQLite jetable par test.
+- client_with_async_db : idem avec l'engine asynchrone (DATABASE_ASYNC=true, aiosqlite).
 - dataset_df : charge le dataset de test si disponible.
 - model_available : indique si les artefacts ML (modèle + features) sont présents.
 - sample_payload : payload d'exemple conforme au schéma Pydantic EmployeeData.
@@ -15,6 +16,7 @@ Notes importantes :
   les sessions et on gère la suppression avec précaution.
 """
 
+import asyncio
 import os
 from pathlib import Path
 import importlib
@@ -87,8 +89,7 @@ def client_no_db():
 # ------------------------------
 # FIXTURE: client_with_db
 # ------------------------------
-@pytest.fixture(scope="function")
-def client_with_db():
+def _db_client(async_mode: bool = False):
     """
     Client FastAPI authentifié avec *token*, pour un environnement AVEC base SQLite jetable.
 
@@ -100,6 +101,8 @@ def client_with_db():
     - On crée un utilisateur réel, obtient un token, et on retourne un client pré-authentifié.
 
     Le scope=function garantit un environnement propre à chaque test.
+
+    `async_mode=True` active en plus `DATABASE_ASYNC` (engine aiosqlite sur le même fichier).
     """
     db_file = Path(__file__).parent / "_tmp_api.db"
 
@@ -121,6 +124,7 @@ def client_with_db():
     # Active et configure la BDD
     os.environ["DATABASE_ENABLED"] = "true"
     os.environ["DATABASE_URL"] = f"sqlite:///{db_file.as_posix()}"
+    os.environ["DATABASE_ASYNC"] = "true" if async_mode else "false"
 
     # Recharge les modules qui dépendent de la config DB/API
     from futurisys_churn_api.api.endpoints import auth, prediction
@@ -147,6 +151,8 @@ def client_with_db():
     close_all_sessions()
     if db_conn.engine:
         db_conn.engine.dispose()
+    if db_conn.async_engine:
+        asyncio.run(db_conn.async_engine.dispose())
     if db_file.exists():
         try:
             db_file.unlink()
@@ -155,9 +161,23 @@ def client_with_db():
 
     del os.environ["DATABASE_ENABLED"]
     del os.environ["DATABASE_URL"]
+    del os.environ["DATABASE_ASYNC"]
     importlib.reload(db_conn)
 
 
+@pytest.fixture(scope="function")
+def client_with_db():
+    """Client authentifié avec base SQLite jetable (engine synchrone), cf. `_db_client`."""
+    yield from _db_client()
+
+
+@pytest.fixture(scope="function")
+def client_with_async_db():
+    """Comme `client_with_db`, avec `DATABASE_ASYNC=true` (skip si aiosqlite est absent)."""
+    pytest.importorskip("aiosqlite")
+    yield from _db_client(async_mode=True)
+
+
 # ------------------------------
 # FIXTURE: dataset_df
 # ------------------------------
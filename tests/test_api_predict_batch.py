@@ -0,0 +1,48 @@
+"""
+Tests de l'endpoint de prédiction par lot `POST /predict/batch`.
+
+Vérifie :
+1) l'ordre des résultats et le signalement des éléments invalides sans échec global,
+2) la cohérence avec `/predict` (mêmes probabilités pour les mêmes payloads),
+3) la limite de taille configurable (413).
+
+Le cas "avec base" (insertion en masse) est couvert dans `test_db_sql.py`.
+"""
+
+import pytest
+
+from futurisys_churn_api.api import settings
+
+
+def test_predict_batch_keeps_order_and_reports_errors(client_no_db, sample_payload, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    other = {**sample_payload, "poste": "Consultant", "revenu_mensuel": 9000}
+    invalid = {**sample_payload, "genre": "X"}
+    r = client_no_db.post("/predict/batch", json=[sample_payload, invalid, other, 42])
+    assert r.status_code == 200, r.text
+
+    data = r.json()
+    assert data["n_predictions"] == 2 and data["n_errors"] == 2
+    assert [item["index"] for item in data["results"]] == [0, 1, 2, 3]
+    assert "errors" in data["results"][1] and data["results"][1]["errors"][0]["loc"] == ["genre"]
+    assert "errors" in data["results"][3]
+
+    # Mêmes résultats qu'un appel unitaire à /predict
+    for index, payload in ((0, sample_payload), (2, other)):
+        single = client_no_db.post("/predict", json=payload).json()
+        assert data["results"][index]["prediction"] == single["prediction"]
+        assert data["results"][index]["churn_probability"] == pytest.approx(single["churn_probability"])
+
+
+def test_predict_batch_too_large(client_no_db, sample_payload, monkeypatch):
+    monkeypatch.setattr(settings, "PREDICT_BATCH_MAX_SIZE", 2)
+    r = client_no_db.post("/predict/batch", json=[sample_payload] * 3)
+    assert r.status_code == 413
+
+
+def test_predict_batch_empty(client_no_db):
+    r = client_no_db.post("/predict/batch", json=[])
+    assert r.status_code == 200
+    assert r.json() == {"results": [], "n_predictions": 0, "n_errors": 0}
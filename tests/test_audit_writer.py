@@ -0,0 +1,126 @@
+"""
+Tests de l'écriture différée (`api/audit_writer.py`), sur une base SQLite jetable.
+
+Vérifie :
+1) le regroupement des couples entrée/sortie en lots (un commit par lot),
+2) le vidage complet de la file à l'arrêt (`close`),
+3) le refus d'un dépôt quand la file est pleine,
+4) le comptage d'un lot en échec (rollback, `failed_rows`, `last_error`),
+5) aucun dépôt accepté n'est perdu quand `close` arrive pendant des `offer` concurrents.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from futurisys_churn_api.api.audit_writer import AuditRecord, AuditWriter
+from futurisys_churn_api.database.models import Base, PredictionInput, PredictionOutput
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{(tmp_path / 'audit.db').as_posix()}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def record(i, sample_payload):
+    return AuditRecord(
+        request_id=f"req-{i}", input_data=sample_payload, user_id=None, prediction=i % 2, churn_probability=i / 100
+    )
+
+
+def test_records_are_written_in_batches(session_factory, sample_payload):
+    commits = []
+    writer = AuditWriter(session_factory, max_queue=100, batch_size=10, flush_interval_ms=500, name="test_audit")
+    event.listen(session_factory.kw["bind"], "commit", lambda *_: commits.append(1))
+    try:
+        for i in range(25):
+            assert writer.offer(record(i, sample_payload))
+        assert writer.flush(timeout=5)
+    finally:
+        writer.close()
+
+    with session_factory() as db:
+        outputs = db.query(PredictionOutput).order_by(PredictionOutput.id).all()
+        assert [o.request_id for o in outputs] == [f"req-{i}" for i in range(25)]
+        assert all(o.input_id is not None for o in outputs)
+        assert db.query(PredictionInput).count() == 25
+    stats = writer.stats()
+    assert stats["written_rows"] == 25 and stats["pending"] == 0
+    assert len(commits) == stats["batches"] <= 5
+
+
+def test_close_drains_the_queue(session_factory, sample_payload):
+    writer = AuditWriter(session_factory, max_queue=100, batch_size=100, flush_interval_ms=10_000, name="test_audit_close")
+    for i in range(5):
+        writer.offer(record(i, sample_payload))
+    writer.close(timeout=15)
+    assert not writer.offer(record(99, sample_payload))  # arrêté : dépôt refusé
+    with session_factory() as db:
+        assert db.query(PredictionOutput).count() == 5
+
+
+def test_offer_refused_when_queue_full(session_factory, sample_payload):
+    gate = threading.Event()
+
+    def blocked_factory():
+        gate.wait(5)
+        return session_factory()
+
+    writer = AuditWriter(blocked_factory, max_queue=2, batch_size=1, flush_interval_ms=1, name="test_audit_full")
+    try:
+        assert writer.offer(record(0, sample_payload))
+        assert writer.flush(timeout=0.2) is False  # lot bloqué dans la fabrique de session
+        assert writer.offer(record(1, sample_payload)) and writer.offer(record(2, sample_payload))
+        assert not writer.offer(record(3, sample_payload))
+    finally:
+        gate.set()
+        writer.close()
+    assert writer.stats()["written_rows"] == 3
+
+
+def test_failed_batch_is_counted(sample_payload):
+    def unavailable():
+        raise RuntimeError("base indisponible")
+
+    writer = AuditWriter(unavailable, max_queue=10, batch_size=10, flush_interval_ms=1, name="test_audit_err")
+    try:
+        writer.offer(record(0, sample_payload))
+        assert writer.flush(timeout=5)
+        writer.offer(record(1, sample_payload))  # le thread d'écriture a survécu à l'échec
+        assert writer.flush(timeout=5)
+    finally:
+        writer.close()
+    stats = writer.stats()
+    assert stats["failed_rows"] == 2 and stats["written_rows"] == 0
+    assert "base indisponible" in stats["last_error"]
+
+
+def test_offers_racing_close_are_all_written(session_factory, sample_payload):
+    writer = AuditWriter(session_factory, max_queue=10_000, batch_size=50, flush_interval_ms=1, name="test_audit_race")
+    accepted, start = [], threading.Barrier(5)
+
+    def producer(k):
+        start.wait()
+        n = 0
+        while writer.offer(record(k * 10_000 + n, sample_payload)):
+            n += 1
+        accepted.append(n)
+
+    threads = [threading.Thread(target=producer, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    start.wait()
+    writer.close(timeout=30)  # pendant que les producteurs déposent
+    for t in threads:
+        t.join(timeout=30)
+
+    assert writer.flush(timeout=1)  # rien n'est resté en file après l'arrêt du thread
+    stats = writer.stats()
+    assert stats["pending"] == 0 and stats["written_rows"] == sum(accepted)
+    with session_factory() as db:
+        assert db.query(PredictionOutput).count() == sum(accepted)
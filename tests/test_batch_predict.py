@@ -0,0 +1,247 @@
+"""
+Tests du script `database/batch_predict.py` (prédictions en lot par paquets).
+
+Vérifie, sur une base SQLite jetable :
+1) la pagination sur clé (paquets bornés, entrées déjà scorées ignorées),
+2) le scoring de tout l'arriéré, une sortie par entrée, identique à `inference.predict`,
+3) la reprise après un échec : les paquets validés sont conservés, la relance complète,
+4) le mode parallèle : workers concurrents (threads, puis processus "spawn" via
+   `parallel_batch_predict`) sans double scoring, reprise d'un bail expiré, requête
+   `FOR UPDATE SKIP LOCKED` sous PostgreSQL et entrées verrouillées déjà scorées écartées,
+5) la marque haute par version de modèle : exécution incrémentale au-delà de la marque,
+   trous rattrapés par la réconciliation (`--full`), nouvelle version = passe complète.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, delete, event, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from futurisys_churn_api.api import inference
+from futurisys_churn_api.database import batch_predict as bp
+from futurisys_churn_api.database import watermarks
+from futurisys_churn_api.database.batch_claims import LeaseClaims, SkipLockedClaims
+from futurisys_churn_api.database.models import Base, PredictionInput, PredictionOutput
+
+
+@pytest.fixture
+def session_factory(tmp_path, sample_payload):
+    """Base SQLite avec 10 entrées, dont la n°2 déjà scorée."""
+    engine = create_engine(f"sqlite:///{(tmp_path / 'batch.db').as_posix()}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        db.add_all(
+            PredictionInput(**{**sample_payload, "age": 20 + i}) for i in range(10)
+        )
+        db.flush()
+        db.add(PredictionOutput(input_id=2, prediction=0, churn_probability=0.0))
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def _outputs(factory):
+    with factory() as db:
+        return db.execute(select(PredictionOutput.input_id, PredictionOutput.churn_probability)).all()
+
+
+def test_iter_unscored_chunks_uses_keyset_pages(session_factory):
+    statements = []
+    with session_factory() as db:
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+        chunks = [[row["id"] for row in rows] for rows in bp.iter_unscored_chunks(db, chunk_size=4)]
+
+    assert chunks == [[1, 3, 4, 5], [6, 7, 8, 9], [10]]
+    assert len(statements) == 4  # 3 paquets + la page vide finale
+    assert all("LIMIT" in sql for sql in statements)
+
+    with pytest.raises(ValueError):
+        next(bp.iter_unscored_chunks(db, chunk_size=0))
+
+
+def test_batch_predict_scores_backlog_once(session_factory, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    assert bp.batch_predict(chunk_size=4, session_factory=session_factory) == 9
+    outputs = dict(_outputs(session_factory))
+    assert sorted(outputs) == list(range(1, 11))
+
+    # Même résultat que le scoring du lot complet en une fois
+    loaded = bp.load_artifacts()
+    with session_factory() as db:
+        rows = db.execute(select(PredictionInput.__table__).where(PredictionInput.id != 2)).mappings().all()
+    X = bp.preprocess_for_model(bp.to_columns(rows, loaded.feature_plan.input_columns), len(rows), loaded.feature_plan)
+    _, proba = inference.predict(loaded.model, X)
+    assert [outputs[row["id"]] for row in rows] == pytest.approx(proba.tolist())
+
+    # Relance : rien à faire
+    assert bp.batch_predict(chunk_size=4, session_factory=session_factory) == 0
+
+
+def test_batch_predict_resumes_after_failure(session_factory, model_available, monkeypatch):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    real_predict, calls = inference.predict, []
+
+    def failing_second_chunk(model, X):
+        calls.append(len(X))
+        if len(calls) == 2:
+            raise RuntimeError("panne simulée")
+        return real_predict(model, X)
+
+    monkeypatch.setattr(inference, "predict", failing_second_chunk)
+    with pytest.raises(RuntimeError):
+        bp.batch_predict(chunk_size=4, session_factory=session_factory)
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(PredictionOutput)) == 1 + 4
+
+    monkeypatch.setattr(inference, "predict", real_predict)
+    assert bp.batch_predict(chunk_size=4, session_factory=session_factory) == 5
+    assert sorted(input_id for input_id, _ in _outputs(session_factory)) == list(range(1, 11))
+
+
+def test_skip_locked_claim_statement_for_postgres():
+    sql = str(SkipLockedClaims(chunk_size=50).statement().compile(dialect=postgresql.dialect()))
+    assert "LEFT OUTER JOIN prediction_outputs" in sql
+    assert sql.rstrip().endswith("FOR UPDATE OF prediction_inputs SKIP LOCKED")
+    assert "LIMIT" in sql
+
+
+def test_skip_locked_claim_drops_inputs_scored_since_the_snapshot(session_factory, monkeypatch):
+    """Instantané périmé (READ COMMITTED) : le SELECT verrouillant renvoie des entrées déjà scorées."""
+    inputs = PredictionInput.__table__
+    claims = SkipLockedClaims(chunk_size=3)
+    # Simule l'anti-jointure non réévaluée : toutes les entrées, scorées ou non
+    monkeypatch.setattr(
+        claims, "statement",
+        lambda after_id=None: select(inputs).where(inputs.c.id > (after_id or 0)).order_by(inputs.c.id).limit(3),
+    )
+    with session_factory() as db:
+        db.add_all(PredictionOutput(input_id=i, prediction=0, churn_probability=0.0) for i in (1, 3, 4, 5, 6))
+        db.commit()
+
+        assert [row["id"] for row in claims.claim(db).rows] == [7, 8, 9]  # 1-3 puis 4-6 : déjà scorés
+        db.rollback()
+        db.add_all(PredictionOutput(input_id=i, prediction=0, churn_probability=0.0) for i in (7, 8, 9, 10))
+        db.commit()
+        assert claims.claim(db) is None
+
+
+def test_expired_lease_is_taken_over(session_factory):
+    now = [1000.0]
+    first = LeaseClaims(chunk_size=4, worker="a", lease_seconds=10, clock=lambda: now[0])
+    second = LeaseClaims(chunk_size=4, worker="b", lease_seconds=10, clock=lambda: now[0])
+
+    with session_factory() as db_a, session_factory() as db_b:
+        claim_a = first.claim(db_a)
+        assert [row["id"] for row in claim_a.rows] == [1, 3, 4, 5]
+        # Bail en cours : l'autre worker prend la plage suivante
+        assert [row["id"] for row in second.claim(db_b).rows] == [6, 7, 8, 9]
+        db_b.rollback()
+
+        now[0] += 60  # les deux baux ont expiré : "b" reprend le plus ancien
+        claim_b = second.claim(db_b)
+        assert [row["id"] for row in claim_b.rows] == [1, 3, 4, 5]
+        assert first.complete(db_a, claim_a) is False  # bail perdu : rien n'est validé
+        assert second.complete(db_b, claim_b) is True
+
+
+def test_parallel_workers_score_each_input_once(session_factory, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    totals, errors = {}, []
+
+    def work(name):
+        try:
+            totals[name] = bp.run_worker(chunk_size=2, worker=name, session_factory=session_factory)
+        except Exception as e:  # pragma: no cover - remonté par l'assertion
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=60)
+
+    assert errors == []
+    assert sum(totals.values()) == 9
+    input_ids = [input_id for input_id, _ in _outputs(session_factory)]
+    assert sorted(input_ids) == list(range(1, 11))  # une seule sortie par entrée
+
+
+def test_parallel_batch_predict_spawns_workers(session_factory, model_available, monkeypatch):
+    """Chemin complet : processus "spawn" qui ouvrent leur propre engine (DATABASE_URL)."""
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    engine = session_factory.kw["bind"]
+    monkeypatch.setenv("DATABASE_ENABLED", "true")
+    monkeypatch.setenv("DATABASE_URL", engine.url.render_as_string(hide_password=False))
+    monkeypatch.setattr(bp, "engine", engine)  # processus parent
+
+    assert bp.parallel_batch_predict(workers=2, chunk_size=2) == 9
+    input_ids = [input_id for input_id, _ in _outputs(session_factory)]
+    assert sorted(input_ids) == list(range(1, 11))
+    with session_factory() as db:
+        assert watermarks.get_watermark(db, bp.load_artifacts().version).last_input_id == 10
+
+
+def test_next_watermark_stops_before_first_gap(session_factory):
+    with session_factory() as db:
+        assert watermarks.next_watermark(db, 0) == 0  # entrée 1 sans sortie
+        db.add_all(PredictionOutput(input_id=i, prediction=0, churn_probability=0.0) for i in (1, 3, 4))
+        db.flush()
+        assert watermarks.next_watermark(db, 0) == 4
+        assert watermarks.next_watermark(db, 7) == 7  # 8 sans sortie : la marque ne bouge pas
+        db.add_all(PredictionOutput(input_id=i, prediction=0, churn_probability=0.0) for i in range(5, 11))
+        db.flush()
+        assert watermarks.next_watermark(db, 4) == 10
+
+    mark = watermarks.Watermark("v1", 10, reconciled_at=1000.0)
+    assert watermarks.needs_reconciliation(None)
+    assert not watermarks.needs_reconciliation(mark, every_seconds=60, clock=lambda: 1030.0)
+    assert watermarks.needs_reconciliation(mark, every_seconds=60, clock=lambda: 1060.0)
+
+
+def test_incremental_run_scores_only_beyond_watermark(session_factory, sample_payload, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    version = bp.load_artifacts().version
+
+    assert bp.batch_predict(chunk_size=4, session_factory=session_factory) == 9
+    with session_factory() as db:
+        assert watermarks.get_watermark(db, version).last_input_id == 10
+        # Trou sous la marque (entrée validée en retard) + 3 nouvelles entrées
+        db.execute(delete(PredictionOutput).where(PredictionOutput.input_id == 5))
+        db.add_all(PredictionInput(**sample_payload) for _ in range(3))
+        db.commit()
+
+    statements = []
+    event.listen(
+        session_factory.kw["bind"], "before_cursor_execute", lambda *a: statements.append((a[2], a[3]))
+    )
+    assert bp.batch_predict(chunk_size=4, session_factory=session_factory) == 3
+    # Aucune lecture d'entrées sous la marque
+    reads = [params for sql, params in statements if "FROM prediction_inputs LEFT OUTER JOIN" in sql]
+    assert reads and all(params[0] >= 10 for params in reads)  # borne basse : `id > ?`
+    with session_factory() as db:
+        assert watermarks.get_watermark(db, version).last_input_id == 13
+
+    # La réconciliation rattrape le trou
+    assert bp.batch_predict(chunk_size=4, session_factory=session_factory, full=True) == 1
+    assert sorted(input_id for input_id, _ in _outputs(session_factory)) == list(range(1, 14))
+
+
+def test_new_model_version_starts_with_full_pass(session_factory, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    with session_factory() as db:
+        watermarks.save_watermark(db, "autre-version", 10, reconciled=True)
+        db.commit()
+    assert bp.batch_predict(chunk_size=4, session_factory=session_factory) == 9
@@ -0,0 +1,61 @@
+"""
+Tests de la persistance via l'engine asynchrone (`DATABASE_ASYNC=true`, aiosqlite).
+
+Vérifie, avec la fixture `client_with_async_db` (skippée si aiosqlite est absent) :
+1) que la session de requête est une `AsyncSession` (aucun thread pour le SQL),
+2) l'authentification et la persistance de `/predict` et `/predict/batch`,
+3) que les CLI / l'écriture différée gardent l'engine synchrone sur la même base.
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from futurisys_churn_api.api import security as sec
+from futurisys_churn_api.api.endpoints import prediction
+from futurisys_churn_api.database import connection as db_conn
+from futurisys_churn_api.database.models import PredictionOutput
+
+
+def test_async_url_mapping():
+    assert db_conn.async_database_url("sqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    assert db_conn.async_database_url("postgresql://u:p@h:5432/db") == "postgresql+asyncpg://u:p@h:5432/db"
+    with pytest.raises(ValueError):
+        db_conn.async_database_url("mysql://u:p@h/db")
+
+
+@pytest.mark.usefixtures("model_available")
+def test_predict_persists_through_async_session(client_with_async_db, sample_payload, model_available, monkeypatch):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    sessions, endpoint_sessions = [], []
+    real_lookup, real_run_db = sec.lookup_user, prediction.run_db
+
+    def spying_lookup(db, email):
+        sessions.append(db)
+        return real_lookup(db, email)
+
+    async def spying_run_db(db, fn, *args):
+        endpoint_sessions.append(db)
+        return await real_run_db(db, fn, *args)
+
+    monkeypatch.setattr(sec, "lookup_user", spying_lookup)
+    monkeypatch.setattr(prediction, "run_db", spying_run_db)
+    sec.principal_cache.invalidate()  # force le SELECT d'authentification
+
+    r = client_with_async_db.post("/predict", json=sample_payload)
+    assert r.status_code == 200, r.text
+    assert r.json()["input_id"] == 1 and r.json()["prediction_id"] == 1
+    # Session reçue par l'endpoint (celle de `get_db`, fermée par lui en fin de requête)
+    assert len(endpoint_sessions) == 1 and isinstance(endpoint_sessions[0], AsyncSession)
+    # `run_sync` passe la session synchrone adossée à cette AsyncSession
+    assert len(sessions) == 1 and sessions[0] is endpoint_sessions[0].sync_session
+    assert sessions[0].bind.url.drivername == "sqlite+aiosqlite"
+
+    r = client_with_async_db.post("/predict/batch", json=[sample_payload] * 2)
+    assert r.status_code == 200, r.text
+    assert [x["input_id"] for x in r.json()["results"]] == [2, 3]
+
+    # Lecture par l'engine synchrone (scripts CLI) : mêmes lignes
+    with db_conn.SessionLocal() as db:
+        assert db.query(PredictionOutput).count() == 3
@@ -0,0 +1,124 @@
+"""
+Index des tables de prédiction et migration d'une base existante (`database/migrate.py`).
+
+Vérifie sur SQLite :
+1) les plans d'exécution (EXPLAIN QUERY PLAN) des requêtes courantes utilisent les index
+   déclarés dans les modèles (anti-jointure de batch_predict, export trié, historique
+   par utilisateur) ;
+2) l'index unique sur `prediction_outputs.input_id` ;
+3) la migration d'une base "ancien schéma" : index/colonne ajoutés, données conservées,
+   doublons bloquants sauf `dedupe`, seconde exécution sans effet ; `create_db` l'applique aussi.
+"""
+
+import pytest
+from sqlalchemy import create_engine, func, inspect, insert, select, text
+from sqlalchemy.exc import IntegrityError
+
+from futurisys_churn_api.database import create_db, migrate
+from futurisys_churn_api.database.batch_claims import unscored_inputs
+from futurisys_churn_api.database.models import Base, PredictionInput, PredictionOutput
+
+NEW_INDEXES = [
+    "ix_prediction_inputs_user_id",
+    "ix_prediction_outputs_input_id",
+    "ix_prediction_outputs_request_id",
+    "ix_prediction_outputs_timestamp",
+    "ix_prediction_outputs_user_id",
+]
+
+
+@pytest.fixture
+def engine(tmp_path, sample_payload):
+    """Base SQLite au schéma courant : 3 entrées, sorties pour les deux premières."""
+    eng = create_engine(f"sqlite:///{(tmp_path / 'idx.db').as_posix()}")
+    Base.metadata.create_all(eng)
+    with eng.begin() as conn:
+        conn.execute(insert(PredictionInput), [sample_payload] * 3)
+        conn.execute(insert(PredictionOutput), [
+            {"input_id": 1, "user_id": 7, "prediction": 0, "churn_probability": 0.1},
+            {"input_id": 2, "user_id": 7, "prediction": 1, "churn_probability": 0.9},
+        ])
+    yield eng
+    eng.dispose()
+
+
+def _plan(engine, stmt) -> str:
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def _legacy_schema(engine) -> None:
+    """Ramène la base à l'ancien schéma : sans les nouveaux index ni `request_id`."""
+    with engine.begin() as conn:
+        for name in NEW_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("ALTER TABLE prediction_outputs DROP COLUMN request_id"))
+
+
+def test_query_plans_use_indexes(engine):
+    outputs = PredictionOutput.__table__
+
+    plan = _plan(engine, unscored_inputs().limit(100))
+    assert "USING COVERING INDEX ix_prediction_outputs_input_id (input_id=?)" in plan
+
+    plan = _plan(engine, select(outputs).order_by(outputs.c.timestamp.desc()).limit(10))
+    assert "SCAN prediction_outputs USING INDEX ix_prediction_outputs_timestamp" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = _plan(engine, select(outputs).where(outputs.c.user_id == 7))
+    assert "SEARCH prediction_outputs USING INDEX ix_prediction_outputs_user_id (user_id=?)" in plan
+
+
+def test_second_output_for_same_input_is_rejected(engine):
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(insert(PredictionOutput).values(input_id=1, prediction=0, churn_probability=0.2))
+
+
+def test_migrate_adds_missing_indexes_and_columns(engine):
+    _legacy_schema(engine)
+    assert "ix_prediction_outputs_input_id" not in _plan(engine, unscored_inputs())
+
+    planned = migrate.migrate(engine, dry_run=True)
+    assert "ALTER TABLE prediction_outputs ADD COLUMN request_id VARCHAR(64)" in planned
+    assert "CREATE UNIQUE INDEX ix_prediction_outputs_input_id ON prediction_outputs (input_id)" in planned
+    assert len(planned) == 1 + len(NEW_INDEXES)
+    assert "request_id" not in {c["name"] for c in inspect(engine).get_columns("prediction_outputs")}
+
+    assert migrate.migrate(engine) == planned
+    indexes = {i["name"]: i["unique"] for t in ("prediction_inputs", "prediction_outputs")
+               for i in inspect(engine).get_indexes(t)}
+    assert set(NEW_INDEXES) <= set(indexes)
+    assert indexes["ix_prediction_outputs_input_id"]
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(PredictionOutput)) == 2
+
+    assert migrate.migrate(engine) == []  # idempotente
+
+
+def test_create_db_upgrades_existing_tables(engine, capsys):
+    _legacy_schema(engine)
+    create_db.manage_database_tables(engine)
+
+    assert "request_id" in {c["name"] for c in inspect(engine).get_columns("prediction_outputs")}
+    assert "[OK] ALTER TABLE prediction_outputs ADD COLUMN request_id VARCHAR(64)" in capsys.readouterr().out
+    assert migrate.migrate(engine) == []
+
+
+def test_migrate_refuses_duplicates_unless_dedupe(engine):
+    _legacy_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO prediction_outputs (input_id, prediction, churn_probability) VALUES (1, 1, 0.7)"
+        ))
+
+    with pytest.raises(migrate.MigrationError, match="1 doublon"):
+        migrate.migrate(engine)
+    assert "ix_prediction_outputs_input_id" not in {i["name"] for i in inspect(engine).get_indexes("prediction_outputs")}
+
+    migrate.migrate(engine, dedupe=True)
+    with engine.connect() as conn:
+        rows = conn.execute(select(PredictionOutput.input_id, PredictionOutput.churn_probability)
+                            .order_by(PredictionOutput.input_id)).all()
+    assert rows == [(1, 0.7), (2, 0.9)]  # la sortie la plus récente de l'entrée 1 est gardée
@@ -0,0 +1,86 @@
+"""
+Tests du pool de connexions configurable et instrumenté (`database/pool.py`).
+
+Vérifie :
+1) les options d'engine selon le SGBD (pre-ping "auto", StaticPool pour SQLite en mémoire),
+2) les mesures d'emprunt (compteurs, histogramme cumulé, délai dépassé sur pool épuisé),
+3) la configuration SQLite (journal WAL, busy_timeout) et la conservation du moniteur
+   après `engine.dispose()`.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from futurisys_churn_api.database import pool
+from futurisys_churn_api.database.pool import PoolConfig, PoolMonitor
+
+
+def _sqlite_engine(tmp_path, **config):
+    url = f"sqlite:///{(tmp_path / 'pool.db').as_posix()}"
+    cfg = PoolConfig(**config)
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **pool.engine_options(url, cfg))
+    pool.attach_monitor(engine)
+    pool.configure_sqlite(engine, cfg)
+    return engine
+
+
+def test_engine_options_by_backend():
+    pg = pool.engine_options("postgresql://u:p@db/app", PoolConfig(size=3, max_overflow=2, timeout=4, recycle=60))
+    assert pg == {
+        "pool_pre_ping": True,
+        "pool_recycle": 60,
+        "poolclass": pool.InstrumentedQueuePool,
+        "pool_size": 3,
+        "max_overflow": 2,
+        "pool_timeout": 4,
+    }
+    assert pool.engine_options("postgresql://u:p@db/app", PoolConfig(pre_ping="false"))["pool_pre_ping"] is False
+    assert pool.engine_options("sqlite:///x.db", PoolConfig())["pool_pre_ping"] is False
+    assert pool.engine_options("sqlite://", PoolConfig())["poolclass"] is pool.InstrumentedStaticPool
+    assert pool.engine_options("sqlite:///x.db", PoolConfig(), is_async=True)["poolclass"] is pool.InstrumentedAsyncQueuePool
+    with pytest.raises(ValueError):
+        pool.engine_options("sqlite:///x.db", PoolConfig(pre_ping="sometimes"))
+
+
+def test_monitor_histogram_is_cumulative():
+    monitor = PoolMonitor(buckets_ms=(1, 10))
+    for ms in (0.5, 3, 3, 50):
+        monitor.record(ms, waited=False)
+    monitor.record(20, waited=True, timed_out=True)
+    stats = monitor.stats()
+    assert stats["checkout_ms_histogram"] == {"1": 1, "10": 3, "+Inf": 4}
+    assert (stats["checkouts"], stats["timeouts"], stats["waits"]) == (4, 1, 1)
+    assert stats["checkout_ms_max"] == 50
+
+
+def test_exhausted_pool_counts_wait_and_timeout(tmp_path):
+    engine = _sqlite_engine(tmp_path, size=1, max_overflow=0, timeout=0.05)
+    try:
+        held = engine.connect()
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        stats = pool.pool_stats(engine)
+        assert (stats["size"], stats["max_overflow"], stats["checked_out"]) == (1, 0, 1)
+        assert (stats["checkouts"], stats["timeouts"], stats["waits"]) == (1, 1, 1)
+        assert stats["wait_ms_sum"] >= 50
+        held.close()
+        assert pool.pool_stats(engine)["checked_in"] == 1
+    finally:
+        engine.dispose()
+
+
+def test_sqlite_pragmas_and_monitor_survive_dispose(tmp_path):
+    engine = _sqlite_engine(tmp_path, sqlite_busy_timeout_ms=1234)
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        monitor = engine.pool.monitor
+        engine.dispose()
+        assert engine.pool.monitor is monitor
+        with engine.connect():
+            pass
+        assert pool.pool_stats(engine)["checkouts"] == 2
+    finally:
+        engine.dispose()
@@ -1,10 +1,16 @@
 """
 But du fichier
 --------------
-Vérifier que l'endpoint `/predict` :
-1) fonctionne lorsque la base SQLite temporaire (fixture `client_with_db`) est active,
-2) persiste bien les **entrées** et **sorties** en base,
-3) renvoie dans la réponse les identifiants `input_id` et `prediction_id`
+Vérifier que les endpoints `/predict` et `/predict/batch` :
+1) fonctionnent lorsque la base SQLite temporaire (fixture `client_with_db`) est active,
+2) persistent bien les **entrées** et **sorties** en base (insertion en masse pour le lot,
+   et y compris quand `/predict` est servi par le cache de prédictions),
+3) authentifient l'utilisateur sans bloquer la boucle d'événements (requête SQL
+   déportée dans le threadpool), puis depuis le cache des utilisateurs, invalidé
+   quand l'utilisateur change en base,
+4) n'empruntent qu'une connexion du pool par requête (session partagée auth + endpoint),
+   et, en écriture différée, répondent avec le `request_id` du client avant l'écriture,
+5) renvoient dans la réponse les identifiants `input_id` et `prediction_id`
    correspondant aux lignes créées.
 
 Hypothèses / prérequis
@@ -23,7 +29,16 @@ Cela repose sur le fait que la base SQLite temporaire est **neuve** pour ce test
 (aucune donnée existante) grâce au setup/teardown de la fixture `client_with_db`.
 """
 
+import asyncio
+import importlib
+
 import pytest
+from sqlalchemy import event
+
+from futurisys_churn_api.api import security as sec
+from futurisys_churn_api.api import settings
+from futurisys_churn_api.database import connection as db_conn
+from futurisys_churn_api.database.models import PredictionInput, PredictionOutput, User
 
 
 @pytest.mark.usefixtures("model_available")
@@ -63,3 +78,181 @@ def test_predict_with_sqlite(client_with_db, sample_payload, model_available):
     # Comme la base est fraîche pour ce test, ce sont les premiers IDs
     assert data["prediction_id"] == 1  # première sortie
     assert data["input_id"] == 1       # première entrée
+
+
+def test_predict_batch_persists_with_sqlite(client_with_db, sample_payload, model_available):
+    """
+    Un lot avec un élément invalide : seuls les éléments valides sont insérés,
+    et les identifiants renvoyés suivent l'ordre de la requête.
+    """
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    payloads = [sample_payload, {"age": "pas un entier"}, {**sample_payload, "age": 50}]
+    r = client_with_db.post("/predict/batch", json=payloads)
+    assert r.status_code == 200, r.text
+    results = r.json()["results"]
+
+    assert [res.get("input_id") for res in results] == [1, None, 2]
+    assert [res.get("prediction_id") for res in results] == [1, None, 2]
+
+    with db_conn.SessionLocal() as db:
+        inputs = db.query(PredictionInput).order_by(PredictionInput.id).all()
+        outputs = db.query(PredictionOutput).order_by(PredictionOutput.id).all()
+    assert [i.age for i in inputs] == [20, 50]
+    assert [o.input_id for o in outputs] == [1, 2]
+    assert outputs[1].churn_probability == pytest.approx(results[2]["churn_probability"])
+
+
+def test_predict_cache_hit_is_still_persisted(client_with_db, sample_payload, model_available):
+    """Deux appels identiques : le second est servi par le cache mais journalisé quand même."""
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    first = client_with_db.post("/predict", json=sample_payload).json()
+    second = client_with_db.post("/predict", json=sample_payload).json()
+
+    assert (first["input_id"], second["input_id"]) == (1, 2)
+    assert second["churn_probability"] == pytest.approx(first["churn_probability"])
+    with db_conn.SessionLocal() as db:
+        assert db.query(PredictionOutput).count() == 2
+
+
+def test_ready_checks_database_connection(client_with_db):
+    """Avec BDD activée, /ready vérifie une connexion réelle du pool (SELECT 1)."""
+    r = client_with_db.get("/ready")
+    assert r.json()["checks"]["database"] == "ok"
+
+
+def test_user_lookup_runs_off_the_event_loop(client_with_db, monkeypatch):
+    """La recherche de l'utilisateur (SQL bloquant) ne s'exécute pas sur la boucle asyncio."""
+    calls = []
+
+    def lookup_user(db, email):
+        try:
+            asyncio.get_running_loop()
+            calls.append("boucle")
+        except RuntimeError:
+            calls.append("thread")
+        return sec.User(email=email, hashed_password="x", role="admin", is_active=True)
+
+    monkeypatch.setattr(sec, "lookup_user", lookup_user)
+    r = client_with_db.post("/predict/batch", json=[])  # scope predict:read, sans appel modèle
+    assert r.status_code == 200, r.text
+    assert calls == ["thread"]
+
+
+def test_principal_cache_skips_db_and_follows_user_changes(client_with_db, monkeypatch):
+    """Requêtes suivantes servies par le cache ; désactivation via l'ORM => 401 immédiat."""
+    lookups = []
+    real_lookup = sec.lookup_user
+
+    def counting_lookup(db, email):
+        lookups.append(email)
+        return real_lookup(db, email)
+
+    monkeypatch.setattr(sec, "lookup_user", counting_lookup)
+    sec.principal_cache.invalidate()
+
+    for _ in range(3):
+        assert client_with_db.post("/predict/batch", json=[]).status_code == 200
+    assert lookups == ["test@db.com"]
+
+    with db_conn.SessionLocal() as db:
+        db.query(User).filter(User.email == "test@db.com").one().is_active = False
+        db.commit()
+
+    assert client_with_db.post("/predict/batch", json=[]).status_code == 401
+    assert lookups == ["test@db.com", "test@db.com"]
+
+
+@pytest.mark.usefixtures("model_available")
+def test_one_pool_checkout_per_request(client_with_db, sample_payload, model_available, monkeypatch):
+    """Auth (sans cache) + écriture : une seule session donc un seul emprunt de connexion."""
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    monkeypatch.setattr(settings, "AUTH_CACHE_ENABLED", False)  # force le SELECT de l'auth
+    checkouts = []
+    listener = lambda *_: checkouts.append(1)  # noqa: E731
+    event.listen(db_conn.engine, "checkout", listener)
+    try:
+        for path, body in (("/predict", sample_payload), ("/predict/batch", [sample_payload] * 3)):
+            checkouts.clear()
+            r = client_with_db.post(path, json=body)
+            assert r.status_code == 200, r.text
+            assert len(checkouts) == 1, path
+    finally:
+        event.remove(db_conn.engine, "checkout", listener)
+
+
+@pytest.mark.usefixtures("model_available")
+def test_predict_write_behind_reports_request_id(client_with_db, sample_payload, model_available, monkeypatch):
+    """AUDIT_WRITE_BEHIND : réponse sans ids base, couple écrit plus tard avec le request_id client."""
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    from futurisys_churn_api.api import audit_writer
+
+    monkeypatch.setattr(settings, "AUDIT_WRITE_BEHIND", True)
+    try:
+        r = client_with_db.post("/predict", json=sample_payload, headers={"X-Request-ID": "client-42"})
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["request_id"] == "client-42"
+        assert "prediction_id" not in body
+
+        assert audit_writer.get_audit_writer().flush(timeout=5)
+        with db_conn.SessionLocal() as db:
+            output = db.query(PredictionOutput).filter(PredictionOutput.request_id == "client-42").one()
+            assert output.prediction == body["prediction"]
+            assert output.churn_probability == pytest.approx(body["churn_probability"])
+    finally:
+        audit_writer.shutdown_audit_writer()
+
+
+@pytest.mark.usefixtures("model_available")
+def test_predict_write_behind_reject_uses_audit_retry_after(client_with_db, sample_payload, model_available, monkeypatch):
+    """File d'écriture refusant le dépôt + politique "reject" : 503 avec AUDIT_RETRY_AFTER_SECONDS."""
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    from futurisys_churn_api.api import audit_writer
+
+    closed = audit_writer.AuditWriter(db_conn.SessionLocal, name="test_audit_reject")
+    closed.close()  # n'accepte plus aucun dépôt
+    monkeypatch.setattr(audit_writer, "_writer", closed)
+    monkeypatch.setattr(settings, "AUDIT_WRITE_BEHIND", True)
+    monkeypatch.setattr(settings, "AUDIT_QUEUE_FULL_POLICY", "reject")
+    monkeypatch.setattr(settings, "AUDIT_RETRY_AFTER_SECONDS", 7)
+
+    r = client_with_db.post("/predict", json=sample_payload)
+    assert r.status_code == 503, r.text
+    assert r.headers["Retry-After"] == "7"
+
+
+def test_invalid_audit_policy_is_refused_at_startup(monkeypatch):
+    monkeypatch.setenv("AUDIT_QUEUE_FULL_POLICY", "block")
+    with pytest.raises(ValueError, match="AUDIT_QUEUE_FULL_POLICY"):
+        importlib.reload(settings)
+
+    monkeypatch.setenv("AUDIT_QUEUE_FULL_POLICY", "Reject")
+    importlib.reload(settings)
+    assert settings.AUDIT_QUEUE_FULL_POLICY == "reject"
+
+    monkeypatch.delenv("AUDIT_QUEUE_FULL_POLICY")
+    importlib.reload(settings)
+    assert settings.AUDIT_QUEUE_FULL_POLICY == "sync"
+
+
+def test_metrics_expose_pool_state(client_with_db):
+    """`/metrics` : configuration du pool SQLite (sans pre-ping) et emprunts mesurés."""
+    assert client_with_db.post("/predict/batch", json=[]).status_code == 200
+
+    pool = client_with_db.get("/metrics").json()["components"]["db_pool"]
+    assert pool["enabled"] is True and pool["async"] is None
+    sync = pool["sync"]
+    assert sync["pool"] == "InstrumentedQueuePool"
+    assert sync["pre_ping"] is False
+    assert sync["size"] == db_conn.POOL_CONFIG.size
+    assert sync["checked_out"] == 0
+    assert sync["checkouts"] >= 1
+    assert sync["checkout_ms_histogram"]["+Inf"] == sync["checkouts"]
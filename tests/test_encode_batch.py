@@ -0,0 +1,84 @@
+"""
+But du test
+-----------
+Valider le moteur vectorisé `encode_batch` contre le pipeline pandas de référence
+(`preprocess_dataframe`) :
+1) sur le dataset brut (binaires déjà en 0/1),
+2) sur des colonnes au format API ("Oui"/"Non", "F"/"M"), en object et en catégoriel,
+3) avec des colonnes catégorielles reçues en numérique ou entièrement NaN,
+4) en float32, et avec une erreur explicite si une colonne manque.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from futurisys_churn_api.api.feature_plan import FeaturePlan
+from futurisys_churn_api.api.preprocessing import encode_batch, preprocess_dataframe
+
+FEATURES_PATH = Path("models/input_features.json")
+
+
+@pytest.fixture(scope="module")
+def model_features() -> list[str]:
+    if not FEATURES_PATH.exists():
+        pytest.skip(f"Contrat de features absent: {FEATURES_PATH}")
+    with open(FEATURES_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def api_style_df(dataset_df) -> pd.DataFrame:
+    df = dataset_df.copy()
+    df["genre"] = df["genre"].map({1: "F", 0: "M"})
+    df["heure_supplementaires"] = df["heure_supplementaires"].map({1: "Oui", 0: "Non"})
+    return df
+
+
+def test_encode_batch_matches_reference_on_dataset(dataset_df, model_features):
+    plan = FeaturePlan.compile(model_features)
+    out = encode_batch(dataset_df, plan)
+
+    assert out.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(out, preprocess_dataframe(dataset_df, model_features).to_numpy())
+
+
+def test_encode_batch_api_style_object_and_categorical(api_style_df, model_features, monkeypatch):
+    # Petits blocs pour exercer le découpage en plusieurs blocs de lignes
+    monkeypatch.setattr("futurisys_churn_api.api.preprocessing.BATCH_BLOCK_ROWS", 100)
+    plan = FeaturePlan.compile(model_features)
+    reference = preprocess_dataframe(api_style_df, model_features).to_numpy()
+
+    as_category = api_style_df.astype({c: "category" for c in api_style_df.select_dtypes("object")})
+    np.testing.assert_array_equal(encode_batch(api_style_df, plan), reference)
+    np.testing.assert_array_equal(encode_batch(as_category, plan), reference)
+    np.testing.assert_array_equal(encode_batch(api_style_df.to_dict("list"), plan), reference)
+
+
+def test_encode_batch_non_textual_categorical_columns(api_style_df, model_features):
+    plan = FeaturePlan.compile(model_features)
+    categorical = [name for _, name, _ in plan.ordinal] + [name for name, _ in plan.one_hot]
+    assert categorical
+
+    df = api_style_df.copy()
+    df[categorical[0]] = np.nan                               # toute NaN -> float64
+    df[categorical[-1]] = np.arange(len(df)) % 3              # codes numériques -> int64
+    reference = preprocess_dataframe(df, model_features).to_numpy()
+    np.testing.assert_array_equal(encode_batch(df, plan), reference)
+
+
+def test_encode_batch_float32(api_style_df, model_features):
+    plan = FeaturePlan.compile(model_features)
+    out = encode_batch(api_style_df, plan, dtype=np.float32)
+
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, preprocess_dataframe(api_style_df, model_features).to_numpy(), rtol=1e-6)
+
+
+def test_encode_batch_missing_column_raises():
+    plan = FeaturePlan.compile(["age", "ratio_augmentation_promotion"])
+    with pytest.raises(ValueError, match="annees_depuis_la_derniere_promotion"):
+        encode_batch(pd.DataFrame({"age": [30], "augementation_salaire_precedente": [10]}), plan)
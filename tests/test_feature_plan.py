@@ -0,0 +1,90 @@
+"""
+But du test
+-----------
+Valider le `FeaturePlan` compilé depuis `models/input_features.json` :
+1) parité entre le chemin rapide (`FeaturePlan.encode`, EmployeeData -> ligne NumPy)
+   et le pipeline pandas de référence (`preprocess_dataframe`), sur tout le dataset ;
+2) la feature dérivée `revenu_satisfaction` reproduit la colonne du dataset ;
+3) la compilation échoue dès le démarrage si une colonne du contrat est impossible à produire.
+
+Stratégie (parité)
+------------------
+1) Chaque ligne de `data/data_employees.csv` est reconvertie en payload API
+   (`genre` 1/0 -> "F"/"M", `heure_supplementaires` 1/0 -> "Oui"/"Non").
+2) On encode tous les payloads avec les deux implémentations.
+3) Les matrices obtenues doivent être identiques (mêmes colonnes, mêmes valeurs).
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from futurisys_churn_api.api.constants import MAPPING_POSTE
+from futurisys_churn_api.api.feature_plan import FeaturePlan, FeaturePlanError
+from futurisys_churn_api.api.preprocessing import preprocess_dataframe
+from futurisys_churn_api.api.schemas import EmployeeData
+
+FEATURES_PATH = Path("models/input_features.json")
+
+
+def _dataset_to_payloads(df: pd.DataFrame) -> list[EmployeeData]:
+    """Reconstruit des `EmployeeData` à partir du dataset (binaires déjà encodés en 0/1)."""
+    df = df.copy()
+    df["genre"] = df["genre"].map({1: "F", 0: "M"})
+    df["heure_supplementaires"] = df["heure_supplementaires"].map({1: "Oui", 0: "Non"})
+    fields = list(EmployeeData.model_fields)
+    return [EmployeeData(**rec) for rec in df[fields].to_dict(orient="records")]
+
+
+@pytest.fixture(scope="module")
+def model_features() -> list[str]:
+    if not FEATURES_PATH.exists():
+        pytest.skip(f"Contrat de features absent: {FEATURES_PATH}")
+    with open(FEATURES_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_feature_plan_matches_pandas_pipeline(dataset_df, model_features):
+    payloads = _dataset_to_payloads(dataset_df)
+
+    reference = preprocess_dataframe(
+        pd.DataFrame([p.model_dump() for p in payloads]), model_features
+    )
+    plan = FeaturePlan.compile(model_features)
+    fast = np.vstack([plan.encode(p) for p in payloads])
+
+    assert fast.shape == reference.shape
+    np.testing.assert_allclose(fast, reference.to_numpy(), rtol=1e-12, atol=0)
+
+
+def test_revenu_satisfaction_matches_dataset(dataset_df, model_features):
+    """La formule compilée retrouve la colonne calculée à l'entraînement."""
+    plan = FeaturePlan.compile(model_features)
+    slot = plan.model_features.index("revenu_satisfaction")
+    encoded = np.vstack([plan.encode(p) for p in _dataset_to_payloads(dataset_df)])
+
+    assert encoded[:, slot].tolist() == dataset_df["revenu_satisfaction"].astype(float).tolist()
+
+
+def test_feature_plan_encode_sample(sample_payload):
+    """Règles élémentaires : copie brute, one-hot, binaire, ordinal, forme (1, n)."""
+    plan = FeaturePlan.compile(["age", "statut_marital_Marie", "genre", "poste"])
+    row = plan.encode(EmployeeData(**sample_payload))
+
+    assert row.shape == (1, 4)
+    assert row.dtype == np.float64
+    assert row.tolist() == [[20.0, 1.0, 1.0, 6.0]]
+
+
+def test_feature_plan_rejects_unproducible_column():
+    with pytest.raises(FeaturePlanError, match="feature_inconnue"):
+        FeaturePlan.compile(["age", "feature_inconnue"])
+
+
+def test_feature_plan_rejects_unmapped_ordinal_value():
+    mapping_sans_manager = {k: v for k, v in MAPPING_POSTE.items() if k != "Manager"}
+    with pytest.raises(FeaturePlanError, match="Manager"):
+        FeaturePlan.compile(["poste"], mapping_poste=mapping_sans_manager)
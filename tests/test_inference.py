@@ -0,0 +1,65 @@
+"""
+But du test
+-----------
+Valider l'inférence en un seul appel modèle (`api/inference.py`) :
+1) seuil par défaut : mêmes classes que `model.predict` sur tout le dataset,
+2) le seuil `DECISION_THRESHOLD` pilote la classe renvoyée par `/predict`,
+3) un seuil hors de [0, 1] est refusé : en argument, et dès le chargement des réglages.
+"""
+
+import importlib
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+from futurisys_churn_api.api import inference, settings
+from futurisys_churn_api.api.feature_plan import FeaturePlan
+from futurisys_churn_api.api.preprocessing import encode_batch
+
+
+def test_default_threshold_matches_model_predict(dataset_df, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    model = joblib.load(Path("models/churn_model.joblib"))
+    with open("models/input_features.json", "r", encoding="utf-8") as f:
+        plan = FeaturePlan.compile(json.load(f))
+    X = encode_batch(dataset_df, plan)
+
+    predictions, probabilities = inference.predict(model, X)
+    np.testing.assert_array_equal(predictions, model.predict(X))
+    np.testing.assert_allclose(probabilities, model.predict_proba(X)[:, 1])
+
+
+def test_decide_threshold():
+    probabilities = np.array([0.1, 0.5, 0.7])
+    assert inference.decide(probabilities).tolist() == [0, 0, 1]
+    assert inference.decide(probabilities, threshold=0.3).tolist() == [0, 1, 1]
+    with pytest.raises(ValueError):
+        inference.decide(probabilities, threshold=1.5)
+
+
+def test_predict_uses_configured_threshold(client_no_db, sample_payload, model_available, monkeypatch):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    monkeypatch.setattr(settings, "DECISION_THRESHOLD", 0.0)
+    r = client_no_db.post("/predict", json=sample_payload)
+    assert r.status_code == 200 and r.json()["prediction"] == 1
+
+    monkeypatch.setattr(settings, "DECISION_THRESHOLD", 1.0)
+    r = client_no_db.post("/predict", json=sample_payload)
+    assert r.status_code == 200 and r.json()["prediction"] == 0
+
+
+def test_invalid_threshold_is_refused_at_startup(monkeypatch):
+    monkeypatch.setenv("DECISION_THRESHOLD", "1.5")
+    with pytest.raises(ValueError, match="DECISION_THRESHOLD"):
+        importlib.reload(settings)
+
+    monkeypatch.delenv("DECISION_THRESHOLD")
+    importlib.reload(settings)
+    assert settings.DECISION_THRESHOLD == 0.5
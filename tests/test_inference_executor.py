@@ -0,0 +1,66 @@
+"""
+Tests de l'exécuteur d'inférence borné (`api/executor.py`) et du rejet de charge sur `/predict`.
+
+Vérifie :
+1) l'exécution normale et les statistiques exposées,
+2) le rejet immédiat (`ExecutorSaturated`) quand workers + file sont occupés,
+3) la réponse 503 + `Retry-After` de `/predict` quand l'exécuteur est saturé.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from futurisys_churn_api.api import executor, metrics, settings
+from futurisys_churn_api.api.executor import ExecutorSaturated, InferenceExecutor
+
+
+def test_run_and_stats():
+    pool = InferenceExecutor(max_workers=2, max_queue=1, name="test_exec")
+    try:
+        assert asyncio.run(pool.run(lambda a, b: a + b, 2, 3)) == 5
+        stats = metrics.snapshot()["components"]["test_exec"]
+        assert stats == {"max_workers": 2, "max_queue": 1, "queued": 0, "running": 0, "rejected": 0}
+        assert metrics.snapshot()["summaries"]["test_exec.run_ms"]["count"] >= 1
+    finally:
+        pool.shutdown()
+    assert "test_exec" not in metrics.snapshot()["components"]
+
+
+def test_rejects_when_saturated():
+    gate = threading.Event()
+    pool = InferenceExecutor(max_workers=1, max_queue=1, name="test_exec_full")
+    try:
+        running = pool.submit(gate.wait, 5)
+        queued = pool.submit(lambda: "ok")
+        with pytest.raises(ExecutorSaturated):
+            pool.submit(lambda: "rejetée")
+        assert pool.stats()["rejected"] == 1
+
+        gate.set()
+        assert running.result(timeout=2) is True
+        assert queued.result(timeout=2) == "ok"
+        # Les places sont libérées : une nouvelle soumission passe
+        assert pool.submit(lambda: 1).result(timeout=2) == 1
+    finally:
+        gate.set()
+        pool.shutdown()
+
+
+def test_predict_returns_503_when_saturated(client_no_db, sample_payload, monkeypatch):
+    gate = threading.Event()
+    pool = InferenceExecutor(max_workers=1, max_queue=0, name="test_exec_api")
+    monkeypatch.setattr(executor, "_executor", pool)
+    try:
+        pool.submit(gate.wait, 5)  # occupe l'unique worker
+
+        r = client_no_db.post("/predict", json=sample_payload)
+        assert r.status_code == 503, r.text
+        assert r.headers["Retry-After"] == str(settings.INFERENCE_RETRY_AFTER_SECONDS)
+
+        r = client_no_db.post("/predict/batch", json=[sample_payload])
+        assert r.status_code == 503, r.text
+    finally:
+        gate.set()
+        pool.shutdown()
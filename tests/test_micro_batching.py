@@ -0,0 +1,170 @@
+"""
+Tests du micro-batching (`api/micro_batching.py`) et de son branchement sur `/predict`.
+
+Vérifie :
+1) le regroupement de soumissions concurrentes en un seul appel de scoring,
+2) le déclenchement sur échéance (max_wait_ms) pour un lot incomplet,
+3) la propagation d'une erreur de scoring à chaque appelant,
+4) un batcher par version : pendant un swap, l'ancien sert ses requêtes puis s'arrête une fois vidé,
+5) la parité `/predict` avec / sans micro-batching et l'exposition dans `/metrics`,
+6) des lots plus grands que `INFERENCE_WORKERS` (attente sur la boucle, pas sur un thread),
+7) la file bornée : rejet `ExecutorSaturated`, puis 503 + Retry-After côté `/predict`.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from futurisys_churn_api.api import executor, metrics, settings
+from futurisys_churn_api.api.endpoints import prediction
+from futurisys_churn_api.api.executor import ExecutorSaturated
+from futurisys_churn_api.api.micro_batching import MicroBatcher, VersionedMicroBatchers
+from futurisys_churn_api.api.schemas import EmployeeData
+
+
+def test_concurrent_rows_share_one_call():
+    calls = []
+    gate = threading.Event()
+
+    def score(X):
+        gate.wait(1)
+        calls.append(X.shape[0])
+        return X.sum(axis=1)
+
+    batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=1000, name="test_mb")
+    try:
+        futures = [batcher.submit(np.array([i, 1.0])) for i in range(4)]
+        gate.set()
+        assert [f.result(timeout=2) for f in futures] == [1.0, 2.0, 3.0, 4.0]
+        assert calls == [4]  # lot plein : pas d'attente de l'échéance
+        assert metrics.snapshot()["components"]["test_mb"]["max_batch_size"] == 4
+    finally:
+        batcher.close()
+    assert "test_mb" not in metrics.snapshot()["components"]
+
+
+def test_partial_batch_flushes_after_max_wait():
+    batcher = MicroBatcher(lambda X: X[:, 0] * 2, max_batch_size=100, max_wait_ms=5, name="test_mb_wait")
+    try:
+        assert batcher.score(np.array([[3.0]]), timeout=2) == 6.0
+    finally:
+        batcher.close()
+
+
+def test_scoring_error_reaches_every_caller():
+    def boom(X):
+        raise RuntimeError("modèle indisponible")
+
+    batcher = MicroBatcher(boom, max_batch_size=2, max_wait_ms=50, name="test_mb_err")
+    try:
+        futures = [batcher.submit(np.zeros(2)) for _ in range(2)]
+        for f in futures:
+            with pytest.raises(RuntimeError):
+                f.result(timeout=2)
+    finally:
+        batcher.close()
+
+
+def test_swap_keeps_old_batcher_until_drained():
+    current = ["v1"]
+    pool = VersionedMicroBatchers(lambda v: v == current[0], max_batch_size=4, max_wait_ms=1, name="test_mb_pool")
+    try:
+        with pool.lease("v1", lambda X: X[:, 0] + 1) as old:
+            current[0] = "v2"  # swap pendant une requête v1
+            with pool.lease("v2", lambda X: X[:, 0] + 2) as new:
+                assert new is not old
+                assert new.score(np.array([1.0]), timeout=2) == 3.0
+            assert old.score(np.array([1.0]), timeout=2) == 2.0  # toujours servi, pas redémarré
+            with pool.lease("v1", None) as again:
+                assert again is old  # les requêtes v1 en vol partagent le même batcher
+            assert old._thread is not None
+            stats = metrics.snapshot()["components"]["test_mb_pool"]
+            assert stats["versions"] == {"v1": 1, "v2": 0}
+        assert old._thread is None  # vidé et plus courant : fermé
+        assert metrics.snapshot()["components"]["test_mb_pool"]["versions"] == {"v2": 0}
+    finally:
+        pool.close()
+    assert "test_mb_pool" not in metrics.snapshot()["components"]
+
+
+def test_predict_with_micro_batching(client_no_db, sample_payload, model_available, monkeypatch):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    expected = client_no_db.post("/predict", json=sample_payload).json()
+
+    monkeypatch.setattr(settings, "MICRO_BATCH_ENABLED", True)
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_ENABLED", False)  # force l'appel modèle
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: client_no_db.post("/predict", json=sample_payload), range(16)))
+
+    for r in responses:
+        assert r.status_code == 200, r.text
+        assert r.json()["prediction"] == expected["prediction"]
+        assert r.json()["churn_probability"] == pytest.approx(expected["churn_probability"])
+
+    data = client_no_db.get("/metrics").json()
+    assert data["components"]["micro_batching"]["max_batch_size"] == settings.MICRO_BATCH_MAX_SIZE
+    assert data["summaries"]["micro_batching.batch_size"]["sum"] >= 16
+
+
+def test_batches_are_not_capped_by_inference_workers(sample_payload, model_available, monkeypatch):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    monkeypatch.setattr(settings, "INFERENCE_WORKERS", 1)
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_ENABLED", False)
+    pool = VersionedMicroBatchers(lambda v: True, max_batch_size=8, max_wait_ms=5000, name="test_mb_async")
+    monkeypatch.setattr(prediction, "micro_batchers", pool)
+    executor.shutdown_inference_executor()  # recréé avec un seul thread
+
+    async def burst():
+        payload = EmployeeData(**sample_payload)
+        return await asyncio.gather(*(prediction.score_employee_micro_batched(payload) for _ in range(8)))
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        pool.close()
+        executor.shutdown_inference_executor()
+
+    assert len(set(results)) == 1
+    summary = metrics.snapshot()["summaries"]["test_mb_async.batch_size"]
+    assert (summary["count"], summary["max"]) == (1, 8)  # un seul lot plein, malgré 1 thread
+
+
+def test_full_queue_sheds_load(sample_payload, model_available, monkeypatch):
+    gate = threading.Event()
+
+    def blocked(X):
+        gate.wait(5)
+        return np.tile([0.5, 0.5], (len(X), 1))
+
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_ENABLED", False)
+    pool = VersionedMicroBatchers(lambda v: True, max_batch_size=1, max_wait_ms=0, max_queue=1, name="test_mb_full")
+    monkeypatch.setattr(prediction, "micro_batchers", pool)
+    version = prediction.current_model().version if model_available else "v"
+    try:
+        with pool.lease(version, blocked) as batcher:
+            busy = batcher.submit(np.zeros(2))  # pris par le dispatcher, bloqué dans le scoring
+            while batcher._queue.qsize():
+                time.sleep(0.001)
+            queued = batcher.submit(np.zeros(2))  # occupe l'unique place de la file
+            with pytest.raises(ExecutorSaturated):
+                batcher.submit(np.zeros(2))
+
+            if model_available:  # même batcher (même version) : la requête est rejetée
+                with pytest.raises(HTTPException) as exc:
+                    asyncio.run(prediction.score_employee_micro_batched(EmployeeData(**sample_payload)))
+                assert exc.value.status_code == 503
+                assert exc.value.headers["Retry-After"] == str(settings.INFERENCE_RETRY_AFTER_SECONDS)
+            gate.set()
+            assert busy.result(timeout=5)[1] == queued.result(timeout=5)[1] == 0.5
+        assert metrics.snapshot()["components"]["test_mb_full"]["rejected"] >= 1
+    finally:
+        gate.set()
+        pool.close()
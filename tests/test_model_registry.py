@@ -0,0 +1,96 @@
+"""
+Tests du registre de modèles (`api/model_registry.py`) et des endpoints `/admin/model`.
+
+Vérifie :
+1) chargement paresseux, version = hash du contenu, pas de swap si rien n'a changé,
+2) swap sur nouvel artefact sans toucher une version déjà prise par une requête, rollback,
+3) rechargement automatique sur modification des fichiers, erreur => version conservée,
+4) endpoints d'administration (scope `admin` requis).
+"""
+
+import json
+import os
+import shutil
+import time
+
+import joblib
+import pytest
+
+from futurisys_churn_api.api import metrics
+from futurisys_churn_api.api import security as sec
+from futurisys_churn_api.api.model_registry import ModelRegistry, ModelRegistryError
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    model_path = tmp_path / "model.joblib"
+    features_path = tmp_path / "features.json"
+    joblib.dump({"name": "v1"}, model_path)
+    shutil.copy("models/input_features.json", features_path)
+    yield str(model_path), str(features_path)
+    metrics.unregister_collector("test_registry")
+
+
+def _bump(path, obj):
+    """Réécrit l'artefact avec un mtime différent (résolution des systèmes de fichiers)."""
+    joblib.dump(obj, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_lazy_load_reload_and_rollback(artifacts):
+    model_path, features_path = artifacts
+    registry = ModelRegistry(model_path, features_path, name="test_registry")
+    assert registry.info()["current"] is None          # rien chargé avant la 1re demande
+
+    v1 = registry.current()
+    assert v1.model == {"name": "v1"} and len(v1.version) == 12
+    assert registry.reload() == (v1, False)            # mêmes fichiers -> pas de swap
+    with pytest.raises(ModelRegistryError):
+        registry.rollback()
+
+    _bump(model_path, {"name": "v2"})
+    v2, swapped = registry.reload()
+    assert swapped and v2.version != v1.version and registry.current() is v2
+    assert v1.model == {"name": "v1"}                  # une requête en vol garde sa version
+
+    assert registry.rollback() is v1 and registry.current() is v1
+    assert registry.info()["previous"]["version"] == v2.version
+
+
+def test_auto_reload_on_file_change_and_failed_reload(artifacts):
+    model_path, features_path = artifacts
+    registry = ModelRegistry(model_path, features_path, check_interval=0.01, name="test_registry")
+    v1 = registry.current()
+
+    _bump(model_path, {"name": "v2"})
+    deadline = time.monotonic() + 5
+    while registry.current().version == v1.version and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert registry.current().model == {"name": "v2"}
+
+    with open(features_path, "w", encoding="utf-8") as f:
+        json.dump(["colonne_inconnue"], f)
+    with pytest.raises(Exception):
+        registry.reload()
+    assert registry.current().model == {"name": "v2"}   # version courante conservée
+    assert "FeaturePlanError" in registry.info()["last_error"]
+
+
+def test_admin_endpoints(client_no_db, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    client_no_db.post("/admin/model/reload")  # charge le modèle si besoin
+    info = client_no_db.get("/admin/model").json()
+    assert info["current"]["version"]
+
+    r = client_no_db.post("/admin/model/reload")
+    assert r.status_code == 200 and r.json()["swapped"] is False
+    assert r.json()["version"] == info["current"]["version"]
+    if info["previous"] is None:
+        assert client_no_db.post("/admin/model/rollback").status_code == 409
+
+    token = sec.create_access_token("futurisys_user", scopes=["predict:read"])
+    r = client_no_db.get("/admin/model", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 403
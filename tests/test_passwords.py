@@ -0,0 +1,72 @@
+"""
+Tests du pool bcrypt dédié (`api/passwords.py`) et de son branchement sur `/auth/token`.
+
+Vérifie :
+1) hash / verify via le pool de processus et en mode thread (workers = 0), sans bloquer la boucle,
+2) le hachage précalculé de l'utilisateur de démo (aucun bcrypt à l'import),
+3) le rejet immédiat (`ExecutorSaturated`) et la réponse 503 + `Retry-After`
+   quand le pool est saturé.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from futurisys_churn_api.api import metrics, passwords, settings
+from futurisys_churn_api.api import security as sec
+from futurisys_churn_api.api.executor import ExecutorSaturated
+from futurisys_churn_api.api.passwords import PasswordHasher
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_hash_and_verify(workers):
+    hasher = PasswordHasher(max_workers=workers, max_queue=2, name="test_hasher")
+    try:
+        hashed = asyncio.run(hasher.hash("s3cret"))
+        assert asyncio.run(hasher.verify("s3cret", hashed)) is True
+        assert asyncio.run(hasher.verify("autre", hashed)) is False
+        stats = metrics.snapshot()["components"]["test_hasher"]
+        assert (stats["in_flight"], stats["rejected"]) == (0, 0)
+    finally:
+        hasher.shutdown()
+
+
+def test_thread_mode_does_not_block_event_loop():
+    hasher = PasswordHasher(max_workers=0, max_queue=1, name="test_hasher_thread")
+
+    async def ticks_while_hashing():
+        pending = asyncio.wrap_future(hasher.submit(time.sleep, 0.3))
+        ticks = 0
+        while not pending.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        await pending
+        return ticks
+
+    try:
+        assert asyncio.run(ticks_while_hashing()) >= 5  # la boucle a continué de tourner
+    finally:
+        hasher.shutdown()
+
+
+def test_demo_user_hash_is_precomputed():
+    assert sec.fake_users_db["futurisys_user"]["hashed_password"] == sec.FAKE_USER_PASSWORD_HASH
+    assert sec.verify_password("futurisys_password", sec.FAKE_USER_PASSWORD_HASH)
+
+
+def test_login_returns_503_when_hash_pool_saturated(client_no_db, monkeypatch):
+    hasher = PasswordHasher(max_workers=1, max_queue=0, name="test_hasher_full")
+    monkeypatch.setattr(passwords, "_hasher", hasher)
+    try:
+        busy = hasher.submit(time.sleep, 1)  # occupe l'unique processus
+        with pytest.raises(ExecutorSaturated):
+            hasher.submit(time.sleep, 0)
+
+        r = client_no_db.post("/auth/token", data={"username": "futurisys_user", "password": "futurisys_password"})
+        assert r.status_code == 503, r.text
+        assert r.headers["Retry-After"] == str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)
+        assert hasher.stats()["rejected"] == 2
+        busy.result(timeout=10)
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,70 @@
+"""
+Tests du cache de prédictions (`api/prediction_cache.py`) et de son usage dans `/predict`.
+
+Vérifie :
+1) une clé indépendante de l'ordre des champs du payload,
+2) l'éviction LRU, l'expiration (TTL) et l'isolation des versions de modèle,
+3) qu'un second appel identique à `/predict` est un hit (même réponse).
+"""
+
+import pytest
+
+from futurisys_churn_api.api import metrics
+from futurisys_churn_api.api.prediction_cache import PredictionCache, payload_key
+from futurisys_churn_api.api.schemas import EmployeeData
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_payload_key_is_canonical(sample_payload):
+    reordered = dict(reversed(list(sample_payload.items())))
+    assert payload_key(EmployeeData(**sample_payload)) == payload_key(EmployeeData(**reordered))
+    other = EmployeeData(**{**sample_payload, "age": 21})
+    assert payload_key(other) != payload_key(EmployeeData(**sample_payload))
+
+
+def test_lru_ttl_and_version_isolation():
+    clock = FakeClock()
+    cache = PredictionCache(max_size=2, ttl_seconds=10, clock=clock, name="test_cache")
+
+    cache.put("a", "v1", 0.1)
+    cache.put("b", "v1", 0.2)
+    assert cache.get("a", "v1") == 0.1   # "a" devient le plus récent
+    cache.put("c", "v1", 0.3)            # évince "b"
+    assert cache.get("b", "v1") is None
+    assert cache.get("c", "v1") == 0.3
+
+    clock.now = 11
+    assert cache.get("a", "v1") is None  # expiré
+
+    cache.put("d", "v1", 0.4)
+    assert cache.get("d", "v2") is None  # nouveau modèle : entrée d'une autre version invisible
+    cache.put("d", "v2", 0.5)            # évince "c" (LRU commun aux versions)
+    assert cache.get("d", "v1") == 0.4   # ...mais pas effacée : les requêtes en vol sur v1 la gardent
+    assert cache.get("d", "v2") == 0.5
+    cache.clear()
+    assert len(cache) == 0
+
+    stats = metrics.snapshot()["components"]["test_cache"]
+    assert stats["evictions"] == 2 and stats["expirations"] == 1 and stats["invalidations"] == 1
+    assert stats["hits"] == 4 and stats["model_version"] == "v2"
+    metrics.unregister_collector("test_cache")
+
+
+def test_predict_second_call_hits_cache(client_no_db, sample_payload, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    payload = {**sample_payload, "distance_domicile_travail": 27}
+    before = metrics.snapshot()["components"]["prediction_cache"]["hits"]
+    first = client_no_db.post("/predict", json=payload).json()
+    second = client_no_db.post("/predict", json=payload).json()
+
+    assert second == first
+    assert metrics.snapshot()["components"]["prediction_cache"]["hits"] == before + 1
@@ -0,0 +1,108 @@
+"""
+Tests unitaires des caches d'authentification (`security.PrincipalCache`, `VerifiedTokenCache`).
+
+Vérifie :
+1) hit / miss et taux de succès publiés dans `/metrics`,
+2) l'expiration après `ttl_seconds` (borne de fraîcheur),
+3) l'éviction LRU et l'invalidation ciblée ou totale,
+4) qu'un JWT vérifié n'est plus redécodé jusqu'à son `exp`, et qu'un token
+   invalide n'est jamais mis en cache.
+"""
+
+import pytest
+from jose import JWTError
+
+from futurisys_churn_api.api import metrics
+from futurisys_churn_api.api import security as sec
+from futurisys_churn_api.api.security import Principal, PrincipalCache, VerifiedTokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def principal(email, role="viewer", is_active=True):
+    return Principal(id=1, email=email, role=role, is_active=is_active)
+
+
+def test_hit_miss_and_metrics():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60, name="test_auth_cache")
+    assert cache.get("a@x.fr") is None
+    cache.put(principal("a@x.fr"))
+    assert cache.get("a@x.fr") == principal("a@x.fr")
+
+    stats = metrics.snapshot()["components"]["test_auth_cache"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+    assert stats["ttl_seconds"] == 60
+    metrics.unregister_collector("test_auth_cache")
+
+
+def test_entry_expires_after_ttl():
+    clock = FakeClock()
+    cache = PrincipalCache(ttl_seconds=10, clock=clock, name="test_auth_cache_ttl")
+    cache.put(principal("a@x.fr"))
+    clock.now = 10.0
+    assert cache.get("a@x.fr") is not None
+    clock.now = 10.5
+    assert cache.get("a@x.fr") is None
+    assert cache.stats()["expirations"] == 1
+    metrics.unregister_collector("test_auth_cache_ttl")
+
+
+def test_lru_eviction_and_invalidation():
+    cache = PrincipalCache(max_size=2, ttl_seconds=60, name="test_auth_cache_lru")
+    for email in ("a@x.fr", "b@x.fr"):
+        cache.put(principal(email))
+    cache.get("a@x.fr")              # "b" devient la moins récente
+    cache.put(principal("c@x.fr"))
+    assert cache.get("b@x.fr") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate("a@x.fr")
+    assert cache.get("a@x.fr") is None and cache.get("c@x.fr") is not None
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 2
+    metrics.unregister_collector("test_auth_cache_lru")
+
+
+def test_token_cache_expires_at_exp():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_size=10, clock=clock, name="test_jwt_cache")
+    cache.put("tok", {"sub": "a@x.fr", "exp": 100})
+    cache.put("sans-exp", {"sub": "a@x.fr"})  # pas d'échéance => jamais en cache
+    clock.now = 100.0
+    assert cache.get("tok") == {"sub": "a@x.fr", "exp": 100}
+    clock.now = 100.5
+    assert cache.get("tok") is None
+    assert cache.get("sans-exp") is None
+    metrics.unregister_collector("test_jwt_cache")
+
+
+def test_decode_token_skips_verification_once_cached(monkeypatch):
+    calls = []
+    real_decode = sec.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(sec.jwt, "decode", counting_decode)
+    monkeypatch.setattr(sec.settings, "JWT_CACHE_ENABLED", True)
+    token = sec.create_access_token("a@x.fr", ["predict:read"])
+
+    for _ in range(3):
+        assert sec.decode_token(token)["sub"] == "a@x.fr"
+    assert len(calls) == 1
+
+    # Signature altérée : refusée à chaque fois, jamais mise en cache
+    forged = token[:-2] + ("AA" if token[-2:] != "AA" else "BB")
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            sec.decode_token(forged)
+    assert len(calls) == 3
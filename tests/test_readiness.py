@@ -0,0 +1,62 @@
+"""
+Tests du warmup et des sondes `/health` (liveness) et `/ready` (readiness).
+
+Vérifie :
+1) les lignes de chauffe couvrent toutes les valeurs catégorielles du schéma,
+2) au démarrage (lifespan), le modèle est chargé et chauffé, `/ready` répond 200,
+3) `/ready` répond 503 si la BDD activée est injoignable ou si le modèle n'a pas pu être chargé,
+   alors que `/health` reste à 200.
+"""
+
+from typing import get_args
+
+import pytest
+from fastapi.testclient import TestClient
+
+from futurisys_churn_api.api import metrics, readiness
+from futurisys_churn_api.api.main import app
+from futurisys_churn_api.api.model_registry import ModelRegistry
+from futurisys_churn_api.api.schemas import EmployeeData
+from futurisys_churn_api.database import connection as db_conn
+
+
+def test_warmup_rows_cover_categorical_values():
+    rows = readiness.warmup_rows()
+    for name, info in EmployeeData.model_fields.items():
+        values = get_args(info.annotation)
+        if values:
+            assert {getattr(row, name) for row in rows} == set(values)
+
+
+def test_startup_warms_model_and_reports_ready(model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+
+    with TestClient(app) as client:  # déclenche le lifespan (startup)
+        r = client.get("/ready")
+        assert r.status_code == 200, r.text
+        checks = r.json()["checks"]
+        assert checks["model_loaded"] and checks["warmed_up"] and checks["warmup_ms"] > 0
+        assert checks["database"] == "disabled"
+        assert client.get("/health").json() == {"status": "ok"}
+
+
+def test_not_ready_when_enabled_database_is_missing(monkeypatch):
+    monkeypatch.setattr(db_conn, "DATABASE_ENABLED", True)
+    monkeypatch.setattr(db_conn, "engine", None)
+    client = TestClient(app)
+    r = client.get("/ready")
+    assert r.status_code == 503 and r.json()["checks"]["database"] == "unavailable"
+    assert client.get("/health").status_code == 200
+
+
+def test_not_ready_when_model_cannot_load(tmp_path, monkeypatch):
+    broken = ModelRegistry(str(tmp_path / "absent.joblib"), str(tmp_path / "absent.json"), name="test_broken")
+    monkeypatch.setattr(readiness, "registry", broken)
+
+    readiness.startup()
+    ready, checks = readiness.readiness()
+    assert not ready and not checks["model_loaded"]
+    assert "FileNotFoundError" in checks["startup_error"]
+    readiness._startup_error.clear()
+    metrics.unregister_collector("test_broken")
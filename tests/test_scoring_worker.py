@@ -0,0 +1,259 @@
+"""
+Tests du worker de scoring continu (`database/scoring_worker.py`, `batch_predict --follow`).
+
+Vérifie, sur une base SQLite jetable :
+1) la mesure du retard (arriéré au-delà de la marque, âge de la plus ancienne entrée),
+2) les micro-lots : un lot incomplet attend `max_latency`, un lot plein part aussitôt,
+3) la boucle complète (sondage) : nouvelles entrées scorées au fil de l'eau, arrêt propre,
+4) l'exposition des métriques (`GET /metrics`),
+5) le réveil par LISTEN/NOTIFY (connexion psycopg2 simulée sur un socketpair) et le
+   trigger NOTIFY laissé à `migrate` (jamais créé par le worker).
+"""
+
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from futurisys_churn_api.api import metrics
+from futurisys_churn_api.database import batch_predict as bp
+from futurisys_churn_api.database import scoring_worker as sw
+from futurisys_churn_api.database import migrate, watermarks
+from futurisys_churn_api.database.models import Base, PredictionInput, PredictionOutput
+
+
+@pytest.fixture
+def session_factory(tmp_path, sample_payload):
+    """Base SQLite avec 10 entrées horodatées à l'instant présent, dont la n°2 déjà scorée."""
+    engine = create_engine(f"sqlite:///{(tmp_path / 'worker.db').as_posix()}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        db.add_all(PredictionInput(**sample_payload) for _ in range(10))
+        db.flush()
+        db.add(PredictionOutput(input_id=2, prediction=0, churn_probability=0.0))
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def _scored_ids(factory):
+    with factory() as db:
+        return sorted(db.scalars(select(PredictionOutput.input_id)).all())
+
+
+def test_measure_lag_counts_backlog_beyond_watermark(session_factory):
+    old = datetime.now(timezone.utc) - timedelta(seconds=120)
+    with session_factory() as db:
+        db.get(PredictionInput, 3).timestamp = old
+        db.commit()
+
+        lag = sw.measure_lag(db)
+        assert lag.backlog == 9
+        assert 119 <= lag.oldest_unscored_age_s < 180
+        assert sw.measure_lag(db, after_id=3).backlog == 7
+        assert sw.measure_lag(db, after_id=3).oldest_unscored_age_s < 60
+        assert sw.measure_lag(db, after_id=10) == sw.Lag(0, None)
+
+
+def test_partial_batch_waits_for_max_latency(session_factory, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    offset = [0.0]
+    scorer = sw.ContinuousScorer(
+        session_factory, bp.load_artifacts(), chunk_size=50, max_latency=30,
+        poll_seconds=5, clock=lambda: time.time() + offset[0],
+    )
+
+    delay = scorer.step()  # 9 entrées récentes < 50 : le lot attend
+    assert 0 < delay <= 5
+    assert _scored_ids(session_factory) == [2]
+    assert scorer.stats()["backlog"] == 9
+    assert scorer.stats()["reconciliations"] == 1  # première exécution de cette version
+
+    offset[0] = 60  # la plus ancienne attend depuis plus de max_latency
+    assert scorer.step() == 5
+    assert _scored_ids(session_factory) == list(range(1, 11))
+    stats = scorer.stats()
+    assert (stats["backlog"], stats["oldest_unscored_age_s"], stats["scored"]) == (0, None, 9)
+    assert stats["last_input_id"] == 10
+    with session_factory() as db:
+        assert watermarks.get_watermark(db, scorer.loaded.version).last_input_id == 10
+
+
+def test_full_batch_is_scored_immediately(session_factory, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    scorer = sw.ContinuousScorer(session_factory, bp.load_artifacts(), chunk_size=4, max_latency=3600)
+
+    scorer.step()
+    assert _scored_ids(session_factory) == list(range(1, 11))
+    assert scorer.stats()["batches"] == 3  # 4 + 4 + 1 : l'arriéré est drainé en entier
+
+
+def test_follow_scores_new_inputs_until_stopped(session_factory, sample_payload, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    stop, result, errors = threading.Event(), {}, []
+
+    def work():
+        try:
+            result["scorer"] = sw.follow(
+                chunk_size=100, max_latency=0.05, poll_seconds=0.02,
+                session_factory=session_factory, stop=stop,
+            )
+        except Exception as e:  # pragma: no cover - remonté par l'assertion
+            errors.append(e)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 30
+        while _scored_ids(session_factory) != list(range(1, 11)) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        with session_factory() as db:
+            db.add_all(PredictionInput(**sample_payload) for _ in range(3))
+            db.commit()
+        while len(_scored_ids(session_factory)) < 13 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert metrics.snapshot()["components"]["scoring_worker"]["mode"] == "poll"
+    finally:
+        stop.set()
+        thread.join(timeout=30)
+
+    assert errors == []
+    assert _scored_ids(session_factory) == list(range(1, 14))
+    assert result["scorer"].stats()["scored"] == 12
+    assert "scoring_worker" not in metrics.snapshot()["components"]
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(PredictionOutput)) == 13
+
+
+def test_metrics_server_serves_snapshot():
+    metrics.register_collector("scoring_worker", lambda: {"backlog": 4, "oldest_unscored_age_s": 1.5})
+    server = sw.serve_metrics(0, host="127.0.0.1")
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+            body = json.load(resp)
+        assert body["components"]["scoring_worker"] == {"backlog": 4, "oldest_unscored_age_s": 1.5}
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/autre", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+        metrics.unregister_collector("scoring_worker")
+
+
+def test_make_waiter_polls_without_postgres(session_factory):
+    stop = threading.Event()
+    waiter = sw.make_waiter(session_factory.kw["bind"], stop)
+    assert isinstance(waiter, sw.PollWaiter)
+    stop.set()
+    start = time.monotonic()
+    waiter.wait(10)  # interrompu par stop
+    assert time.monotonic() - start < 1
+    waiter.close()
+
+
+class FakeNotifyConnection:
+    """Connexion psycopg2 minimale : `fileno` lisible à l'arrivée d'une notification."""
+
+    def __init__(self):
+        self._sock, self.server = socket.socketpair()
+        self.notifies, self.executed, self.autocommit = [], [], False
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                conn.executed.append(sql)
+
+        return Cursor()
+
+    def poll(self):
+        self._sock.setblocking(False)
+        try:
+            while self._sock.recv(64):
+                self.notifies.append(("NOTIFY", migrate.NOTIFY_CHANNEL))
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        self._sock.close()
+        self.server.close()
+
+
+class FakeRaw:
+    def __init__(self):
+        self.dbapi_connection = FakeNotifyConnection()
+
+    def close(self):
+        self.dbapi_connection.close()
+
+
+def test_listen_waiter_wakes_up_on_notification():
+    raw, stop = FakeRaw(), threading.Event()
+    conn = raw.dbapi_connection
+    waiter = sw.PgNotifyWaiter(raw, stop)
+    assert conn.executed == [f"LISTEN {migrate.NOTIFY_CHANNEL}"]  # ni CREATE ni DROP : LISTEN seul
+    assert conn.autocommit is True
+    try:
+        timer = threading.Timer(0.1, conn.server.send, args=(b"!",))
+        timer.start()
+        start = time.monotonic()
+        waiter.wait(10)
+        assert time.monotonic() - start < 5  # réveillé par la notification, pas par le délai
+        assert conn.notifies == []  # consommées
+
+        start = time.monotonic()
+        waiter.wait(0.05)  # rien : sortie au bout du délai
+        assert 0.04 <= time.monotonic() - start < 5
+    finally:
+        timer.join()
+        waiter.close()
+
+
+def test_notify_trigger_is_left_to_migrate(session_factory):
+    assert migrate.migrate(session_factory.kw["bind"], dry_run=True) == []  # rien sous SQLite
+    assert any(migrate.NOTIFY_TRIGGER in ddl for ddl in migrate.NOTIFY_TRIGGER_DDL)
+
+
+def test_run_counts_failed_cycle_and_retries(session_factory, model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    scorer = sw.ContinuousScorer(session_factory, bp.load_artifacts(), poll_seconds=0.01)
+    stop, delays = threading.Event(), []
+
+    def flaky_step():
+        if not delays:
+            raise RuntimeError("base injoignable")
+        return 0.01
+
+    class RecordingWaiter(sw.PollWaiter):
+        def wait(self, timeout):
+            delays.append(timeout)
+            if len(delays) == 2:
+                stop.set()
+
+    scorer.step = flaky_step
+    scorer.run(RecordingWaiter(stop), stop)
+    assert scorer.stats()["errors"] == 1
+    assert delays == [0.01, 0.01]
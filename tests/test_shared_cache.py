@@ -0,0 +1,216 @@
+"""
+Tests du cache de prédictions partagé (`api/shared_cache.py`).
+
+Vérifie :
+1) get / put, isolation par version de modèle, TTL et `clear()` vu par une autre instance,
+2) plusieurs **processus** écrivant dans la même table : toutes les entrées sont relues,
+3) lectures sans verrou pendant des écritures concurrentes : jamais de valeur incohérente,
+   ni de SIGBUS quand un autre processus change la taille de la table (fichier remplacé),
+4) un slot laissé en écriture (seq impair, écrivain tué) redevient lisible à la prochaine
+   écriture, et les compteurs restent exacts avec des lectures concurrentes,
+5) la sélection du backend par `PREDICTION_CACHE_BACKEND`.
+"""
+
+import multiprocessing
+import os
+import random
+import threading
+
+import pytest
+
+from futurisys_churn_api.api import metrics, settings, shared_cache
+from futurisys_churn_api.api.prediction_cache import PredictionCache, build_prediction_cache
+from futurisys_churn_api.api.shared_cache import SharedPredictionCache
+
+
+def _spawn_context():
+    if shared_cache.fcntl is None:
+        pytest.skip("Verrou inter-processus (fcntl) indisponible sur cette plateforme")
+    # "spawn" : processus neufs, sans hériter des threads du runner de tests
+    return multiprocessing.get_context("spawn")
+
+
+def _expected(key: str) -> float:
+    return int(key) / 1e6
+
+
+def _writer(path, keys, max_size):
+    cache = SharedPredictionCache(path, max_size=max_size, name="test_shared_child")
+    for key in keys:
+        cache.put(key, "v1", _expected(key))
+    cache.close()
+
+
+def _churn_writer(path, n_rounds):
+    # Petite table : évictions permanentes sur les slots lus par l'autre processus
+    cache = SharedPredictionCache(path, max_size=8, name="test_shared_child")
+    for i in range(n_rounds):
+        key = str(i % 64)
+        cache.put(key, "v1", _expected(key))
+    cache.close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    yield str(tmp_path / "cache.bin")
+    for name in ("test_shared", "test_shared_other"):
+        metrics.unregister_collector(name)
+
+
+def test_get_put_version_ttl_and_clear(cache_path):
+    now = [1000.0]
+    cache = SharedPredictionCache(cache_path, max_size=64, ttl_seconds=10, clock=lambda: now[0], name="test_shared")
+    other = SharedPredictionCache(cache_path, max_size=64, ttl_seconds=10, clock=lambda: now[0], name="test_shared_other")
+
+    cache.put("k", "v1", 0.42)
+    assert cache.get("k", "v1") == 0.42
+    assert other.get("k", "v1") == 0.42   # même fichier -> même table
+    assert cache.get("k", "v2") is None   # autre version de modèle
+
+    now[0] += 11
+    assert cache.get("k", "v1") is None   # expiré
+
+    cache.put("k", "v1", 0.5)
+    other.clear()
+    assert cache.get("k", "v1") is None   # clear() vu par toutes les instances
+
+    stats = cache.stats()
+    assert stats["backend"] == "shared" and stats["n_slots"] == 64 and stats["hits"] == 1
+    cache.close()
+    other.close()
+
+
+def test_reopen_with_other_size_resets(cache_path):
+    cache = SharedPredictionCache(cache_path, max_size=64, name="test_shared")
+    cache.put("k", "v1", 0.42)
+    cache.close()
+    resized = SharedPredictionCache(cache_path, max_size=128, name="test_shared")
+    assert resized.get("k", "v1") is None
+    resized.close()
+
+
+def test_resize_replaces_file_while_others_keep_mapping(cache_path):
+    old = SharedPredictionCache(cache_path, max_size=64, name="test_shared")
+    old.put("k", "v1", 0.42)
+    old_inode = os.stat(cache_path).st_ino
+
+    # Autre taille : nouveau fichier mis en place, l'ancien n'est jamais tronqué
+    resized = SharedPredictionCache(cache_path, max_size=128, name="test_shared_other")
+    assert os.stat(cache_path).st_ino != old_inode
+    assert os.fstat(old._table.fd).st_size == shared_cache.HEADER_SIZE + 64 * shared_cache._SLOT.size
+
+    # L'ancienne instance voit l'en-tête retiré, se reprojette et adopte la nouvelle table
+    assert old.get("k", "v1") is None
+    assert old.n_slots == 128
+    old.put("k2", "v1", 0.7)
+    assert resized.get("k2", "v1") == 0.7
+    old.close()
+    resized.close()
+
+
+def _resizing_writer(path, n_rounds):
+    for i in range(n_rounds):
+        cache = SharedPredictionCache(path, max_size=64 if i % 2 else 128, name="test_shared_child")
+        cache.put(str(i), "v1", _expected(str(i)))
+        cache.close()
+
+
+def test_reader_survives_resizes_by_another_process(cache_path):
+    ctx = _spawn_context()
+    reader = SharedPredictionCache(cache_path, max_size=64, name="test_shared")
+    writer = ctx.Process(target=_resizing_writer, args=(cache_path, 200))
+    writer.start()
+    while writer.is_alive():  # un SIGBUS tuerait ce processus
+        for key in range(200):
+            value = reader.get(str(key), "v1")
+            assert value is None or value == _expected(str(key))
+        reader.put("r", "v1", 0.5)
+    writer.join()
+    assert writer.exitcode == 0
+    reader.close()
+
+
+def test_entries_written_by_several_processes(cache_path):
+    ctx = _spawn_context()
+    SharedPredictionCache(cache_path, max_size=16_384, name="test_shared").close()
+
+    chunks = [[str(k) for k in range(start, start + 250)] for start in range(0, 1000, 250)]
+    procs = [ctx.Process(target=_writer, args=(cache_path, keys, 16_384)) for keys in chunks]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    cache = SharedPredictionCache(cache_path, max_size=16_384, name="test_shared")
+    assert all(cache.get(str(k), "v1") == _expected(str(k)) for k in range(1000))
+    cache.close()
+
+
+def test_lock_free_reads_never_see_torn_slots(cache_path):
+    ctx = _spawn_context()
+    reader = SharedPredictionCache(cache_path, max_size=8, name="test_shared")
+    writer = ctx.Process(target=_churn_writer, args=(cache_path, 20_000))
+    writer.start()
+
+    rng = random.Random(0)
+    seen = 0
+    while writer.is_alive():
+        key = str(rng.randrange(64))
+        value = reader.get(key, "v1")
+        if value is not None:
+            assert value == _expected(key)
+            seen += 1
+    writer.join()
+    assert writer.exitcode == 0
+    assert seen > 0
+    reader.close()
+
+
+def test_slot_left_odd_by_dead_writer_recovers(cache_path):
+    cache = SharedPredictionCache(cache_path, max_size=64, name="test_shared")
+    cache.put("k", "v1", 0.1)
+    fingerprint = cache._fingerprint("k", "v1", cache._generation())
+    slot = next(s for s in cache._probe(fingerprint, cache.n_slots) if cache._read_slot(cache._table.mm, s)[0] == fingerprint)
+    offset = cache._offset(slot)
+    shared_cache._SEQ.pack_into(cache._table.mm, offset, shared_cache._SEQ.unpack_from(cache._table.mm, offset)[0] + 1)
+    assert cache.get("k", "v1") is None   # écriture "en cours" pour toujours
+
+    cache.put("k", "v1", 0.2)
+    assert shared_cache._SEQ.unpack_from(cache._table.mm, offset)[0] % 2 == 0
+    assert cache.get("k", "v1") == 0.2
+    cache.close()
+
+
+def test_counters_are_exact_under_concurrent_reads(cache_path):
+    cache = SharedPredictionCache(cache_path, max_size=64, name="test_shared")
+    cache.put("k", "v1", 0.5)
+    n_threads, n_reads = 8, 2_000
+
+    def reader():
+        for i in range(n_reads):
+            cache.get("k" if i % 2 else "absent", "v1")
+
+    threads = [threading.Thread(target=reader) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()
+    assert stats["hits"] == stats["misses"] == n_threads * n_reads // 2
+    cache.close()
+
+
+def test_backend_selection(cache_path, monkeypatch):
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_SHARED_PATH", cache_path)
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_BACKEND", "shared")
+    shared = build_prediction_cache()
+    assert isinstance(shared, SharedPredictionCache)
+    shared.close()
+
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_BACKEND", "memory")
+    assert isinstance(build_prediction_cache(), PredictionCache)
+
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        build_prediction_cache()
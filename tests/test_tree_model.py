@@ -0,0 +1,157 @@
+"""
+Tests de l'export NumPy du modèle (`api/tree_model.py`).
+
+Vérifie :
+1) `TreeEnsemble.predict_proba` reproduit `predict_proba` du modèle joblib sur tout le
+   dataset (y compris avec des valeurs manquantes),
+2) le fichier exporté est chargé en mmap et servi par le `ModelRegistry` (backend "numpy"),
+3) les modèles / pipelines non supportés, trop profonds et les contrats incohérents sont
+   refusés,
+4) le registre construit l'ensemble depuis les octets hachés pour la version (pas de
+   relecture du disque après coup).
+"""
+
+import json
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+from futurisys_churn_api.api import metrics
+from futurisys_churn_api.api.feature_plan import FeaturePlan
+from futurisys_churn_api.api.model_registry import ModelRegistry, ModelRegistryError
+from futurisys_churn_api.api.preprocessing import encode_batch
+from futurisys_churn_api.api.tree_model import (
+    MAX_TREE_DEPTH,
+    TreeEnsemble,
+    TreeModelError,
+    compile_trees,
+    export_model,
+    main,
+)
+
+
+@pytest.fixture(scope="module")
+def joblib_model(model_available):
+    if not model_available:
+        pytest.skip("Modèle non disponible")
+    return joblib.load("models/churn_model.joblib")
+
+
+@pytest.fixture
+def exported(joblib_model, tmp_path):
+    out = tmp_path / "trees.npy"
+    export_model(joblib_model, out)
+    return out
+
+
+@pytest.fixture
+def dataset_X(dataset_df):
+    with open("models/input_features.json", "r", encoding="utf-8") as f:
+        return encode_batch(dataset_df, FeaturePlan.compile(json.load(f)))
+
+
+def test_numpy_evaluator_matches_model(joblib_model, exported, dataset_X):
+    ensemble = TreeEnsemble.load(exported)
+    assert ensemble.n_trees > 0
+    np.testing.assert_allclose(ensemble.predict_proba(dataset_X), joblib_model.predict_proba(dataset_X), atol=1e-6)
+
+    with_nan = dataset_X.copy()
+    with_nan[::3, 0] = np.nan
+    with_nan[::7, 5] = np.nan
+    np.testing.assert_allclose(ensemble.predict_proba(with_nan), joblib_model.predict_proba(with_nan), atol=1e-6)
+
+    with pytest.raises(TreeModelError):
+        ensemble.predict_proba(dataset_X[:, :3])
+
+
+def test_export_is_memory_mapped(exported):
+    nodes = np.load(exported, mmap_mode="r")
+    assert isinstance(nodes, np.memmap)
+    meta = json.loads(exported.with_suffix(".json").read_text(encoding="utf-8"))
+    assert meta["objective"] == "binary:logistic" and len(meta["roots"]) == TreeEnsemble.load(exported).n_trees
+
+
+def test_registry_serves_numpy_backend(exported, tmp_path, dataset_X, joblib_model):
+    features = tmp_path / "features.json"
+    shutil.copy("models/input_features.json", features)
+    registry = ModelRegistry(str(exported), str(features), backend="numpy", name="test_registry_np")
+    try:
+        loaded = registry.current()
+        assert isinstance(loaded.model, TreeEnsemble) and loaded.backend == "numpy"
+        np.testing.assert_allclose(
+            loaded.model.predict_proba(dataset_X[:50]), joblib_model.predict_proba(dataset_X[:50]), atol=1e-6
+        )
+
+        features.write_text(json.dumps(list(reversed(json.loads(features.read_text())))), encoding="utf-8")
+        with pytest.raises(ModelRegistryError):
+            registry.reload()
+    finally:
+        metrics.unregister_collector("test_registry_np")
+
+
+def test_unsupported_models_are_rejected():
+    class FakePipeline:
+        steps = [("scaler", object()), ("xgb", object())]
+
+    with pytest.raises(TreeModelError):
+        compile_trees(FakePipeline())
+    with pytest.raises(TreeModelError):
+        compile_trees(object())
+
+
+class ChainXGB:
+    """Faux XGBClassifier : un seul arbre "peigne" de profondeur `depth` (une feuille par niveau)."""
+
+    def __init__(self, depth):
+        n = 2 * depth + 1  # nœud interne 2k : feuille à gauche (2k+1), suite à droite (2k+2)
+        internal = [i % 2 == 0 and i < n - 1 for i in range(n)]
+        self.tree = {
+            "left_children": [i + 1 if internal[i] else -1 for i in range(n)],
+            "right_children": [i + 2 if internal[i] else -1 for i in range(n)],
+            "split_indices": [0] * n,
+            "split_conditions": [float(i) for i in range(n)],
+            "default_left": [0] * n,
+            "split_type": [0] * n,
+        }
+
+    def get_booster(self):
+        learner = {
+            "objective": {"name": "binary:logistic"},
+            "learner_model_param": {"num_class": "0", "num_target": "1", "base_score": "5E-1", "num_feature": "1"},
+            "gradient_booster": {"name": "gbtree", "model": {"trees": [self.tree]}},
+        }
+        return type("Booster", (), {"save_raw": lambda _, fmt: json.dumps({"learner": learner}).encode()})()
+
+
+def test_trees_deeper_than_limit_are_rejected():
+    nodes, meta = compile_trees(ChainXGB(MAX_TREE_DEPTH))
+    assert meta["max_depth"] == MAX_TREE_DEPTH
+    TreeEnsemble(nodes, meta)  # à la limite : accepté
+
+    with pytest.raises(TreeModelError, match="MODEL_BACKEND=joblib"):
+        compile_trees(ChainXGB(MAX_TREE_DEPTH + 1))
+    with pytest.raises(TreeModelError, match="MODEL_BACKEND=joblib"):
+        TreeEnsemble(nodes, {**meta, "max_depth": 24})  # fichier produit ailleurs
+
+
+def test_registry_loads_the_hashed_snapshot(exported, tmp_path, monkeypatch):
+    features = tmp_path / "features.json"
+    shutil.copy("models/input_features.json", features)
+    registry = ModelRegistry(str(exported), str(features), backend="numpy", name="test_registry_snap")
+
+    def no_disk_read(*args, **kwargs):
+        raise AssertionError("l'ensemble doit venir des octets déjà hachés")
+
+    monkeypatch.setattr(TreeEnsemble, "load", classmethod(no_disk_read))
+    try:
+        assert isinstance(registry.current().model, TreeEnsemble)
+    finally:
+        metrics.unregister_collector("test_registry_snap")
+
+
+def test_cli_export_and_check(joblib_model, tmp_path, capsys):
+    main(["--out", str(tmp_path / "cli.npy"), "--check"])
+    out = capsys.readouterr().out
+    assert "arbres" in out and "Écart max" in out